@@ -0,0 +1,71 @@
+"""
+Explanation
+------------------------------------
+Graph construction and backward pass: ReverseMode objects versus the Arena struct-of-arrays store.
+Builds sum_i sin(c_i * x) * y over n terms (summed pairwise, so ReverseMode.grad() stays within the
+recursion limit), then differentiates with respect to x and y. Reports wall time and the time spent in
+cyclic garbage collections during each run.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_arena.py [n_terms]
+"""
+import gc
+import sys
+import time
+from bad_package.arena import Arena
+from bad_package.elementary_functions import sin
+from bad_package.rad import ReverseMode
+
+class GCTimer():
+    # Accumulates the duration of every garbage collection through gc.callbacks
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._start = time.perf_counter()
+        else:
+            self.total += time.perf_counter() - self._start
+            self.count += 1
+
+def pairwise_sum(terms):
+    while len(terms) > 1:
+        terms = [terms[i] + terms[i + 1] if i + 1 < len(terms) else terms[i] for i in range(0, len(terms), 2)]
+    return terms[0]
+
+def build(x, y, n):
+    return pairwise_sum([sin(0.001 * i * x) * y for i in range(n)])
+
+def run_reversemode(n):
+    x, y = ReverseMode(0.5), ReverseMode(2.0)
+    z = build(x, y, n)
+    z.gradient = 1.0
+    return x.grad(), y.grad()
+
+def run_arena(n, arena):
+    arena.reset()
+    x, y = arena.variable(0.5), arena.variable(2.0)
+    return tuple(arena.gradient(build(x, y, n), [x, y]))
+
+def measure(run):
+    timer = GCTimer()
+    gc.callbacks.append(timer)
+    start = time.perf_counter()
+    try:
+        result = run()
+    finally:
+        elapsed = time.perf_counter() - start
+        gc.callbacks.remove(timer)
+    return result, elapsed, timer
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    arena = Arena()
+    run_arena(n, arena)    # size the buffers once, as a long-running worker would
+    for name, run in (('ReverseMode', lambda: run_reversemode(n)), ('Arena', lambda: run_arena(n, arena))):
+        gc.collect()
+        result, elapsed, timer = measure(run)
+        print(f'{name:12s} {elapsed:7.3f} s   gc: {timer.count:4d} collections, {timer.total:6.3f} s   grad: {result}')
@@ -0,0 +1,41 @@
+"""
+Explanation
+------------------------------------
+Cost of the ReverseMode backward sweep (grad() on both inputs) on a 300 step chain, without and with an unused
+side branch of 5 steps hanging off every step. The graph is rebuilt for every repeat and only the sweep is timed;
+each entry is the best repeat, in milliseconds. grad() recurses once per node along the chain, so the recursion
+limit is raised for the benchmark.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_backward.py
+"""
+import sys
+import time
+from bad_package.elementary_functions import exp, sin
+from bad_package.rad import ReverseMode
+
+def build(side_steps, steps=300):
+    x, y = ReverseMode(1.3), ReverseMode(0.7)
+    z = x
+    for _ in range(steps):
+        z = z * y + sin(z) - 0.5
+        unused = exp(z)
+        for _ in range(side_steps):
+            unused = unused * 0.5 + sin(unused)
+    return x, y, z
+
+def sweep(side_steps, repeat=15):
+    best = float('inf')
+    for _ in range(repeat):
+        x, y, z = build(side_steps)
+        start = time.perf_counter()
+        z.gradient = 1.0
+        x.grad(), y.grad()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(10000)
+    for side_steps in (0, 5):
+        print(f'side branch of {side_steps} steps per step: {sweep(side_steps):.3f} ms')
@@ -0,0 +1,39 @@
+"""
+Explanation
+------------------------------------
+Cache-blocked tape replay: Tape.jacobian() over a large batch replayed in one piece (chunk=None) versus
+chunk by chunk, for an elementwise chain of one and of two variables.
+Runs are interleaved so that noise on a busy machine affects every chunk size alike.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_chunk.py [n_points]
+"""
+import sys
+import time
+import numpy as np
+from bad_package.elementary_functions import cos, exp, sin
+from bad_package.tape import trace
+
+def chain(x):
+    return exp(sin(x)**2 + 3*x)
+
+def chain2(x):
+    return exp(sin(x[0])**2 + 3*x[1]) * cos(x[0]*x[1]) / (1 + x[0]**2)
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = np.random.default_rng(0)
+    chunks = (None, 2048, 16384, 65536)
+    for name, f, point in (('exp(sin(x)**2 + 3*x)', chain, 0.5), ('2 variables', chain2, [0.5, 0.5])):
+        tape = trace(f, point)
+        points = rng.uniform(0, 1, size=n if np.ndim(point) == 0 else (n, len(point)))
+        best = {chunk: float('inf') for chunk in chunks}
+        for repeat in range(3):
+            for chunk in chunks:
+                start = time.perf_counter()
+                tape.jacobian(points, chunk=chunk)
+                best[chunk] = min(best[chunk], time.perf_counter() - start)
+        print(name)
+        for chunk in chunks:
+            print(f'    chunk {str(chunk):>6s} {best[chunk]:7.3f} s   {best[None] / best[chunk]:4.2f}x')
@@ -0,0 +1,41 @@
+"""
+Explanation
+------------------------------------
+Operator dispatch overhead of DualNumber and ReverseMode.
+Times the expressions of tests/test_derivs.py built from DualNumbers (forward mode) and from
+ReverseModes (graph construction plus grad()). The expressions are tiny, so the time is dominated
+by operator dispatch, type checks and object creation rather than arithmetic.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_dispatch.py
+"""
+import timeit
+from bad_package.elementary_functions import exp, sin, ln, pi
+from bad_package.fad import DualNumber
+from bad_package.rad import ReverseMode
+
+EXPRESSIONS = {
+    'exp': (2, lambda x: exp(x**2)),
+    'sin': (pi, lambda x: sin(2*x) + 3),
+    'ln': (4, lambda x: ln(2*x**3)),
+    'combo': (16, lambda x: ((1 + 2*x**2)*(x**3)**2)/((x+19*x**3)**(1/2) * (4*x)**(5/2))
+                            + ((1 + 3*x)**(1/2))/(x + (1+x**2)**(1/2))),
+}
+
+def forward(value, expression):
+    return expression(DualNumber(value)).dual
+
+def reverse(value, expression):
+    x = ReverseMode(value)
+    result = expression(x)
+    result.gradient = 1.0
+    return x.grad()
+
+if __name__ == '__main__':
+    number = 20_000
+    for name, (value, expression) in EXPRESSIONS.items():
+        times = []
+        for run in (forward, reverse):
+            times.append(min(timeit.repeat(lambda: run(value, expression), number=number, repeat=5)) / number)
+        print(f'{name:6s} DualNumber: {times[0] * 1e6:6.2f} us   ReverseMode: {times[1] * 1e6:6.2f} us')
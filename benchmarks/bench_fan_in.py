@@ -0,0 +1,47 @@
+"""
+Explanation
+------------------------------------
+Least squares loss sum((w * x_i + b - y_i)**2) over n data points: w and b are used by n terms each, so their
+nodes have n children. Reports the time of the backward sweep (the graph is rebuilt for every repeat) and the
+relative error of the ReverseMode gradient of w and b against a correctly rounded reference.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_fan_in.py
+"""
+import math
+import sys
+import time
+import numpy as np
+from bad_package.rad import ReverseMode
+
+def loss(w, b, xs, ys):
+    total = 0.0
+    for x, y in zip(xs, ys):
+        total = total + (w * x + b - y) ** 2
+    return total
+
+def sweep(xs, ys, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        w, b = ReverseMode(0.5), ReverseMode(0.1)
+        z = loss(w, b, xs, ys)
+        start = time.perf_counter()
+        z.gradient = 1.0
+        gradient = (w.grad(), b.grad())
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, gradient
+
+if __name__ == '__main__':
+    # The sum is a chain of n additions and grad() recurses along it
+    sys.setrecursionlimit(10**6)
+    rng = np.random.default_rng(0)
+    for n in (10**3, 10**4, 5 * 10**4):
+        xs = rng.normal(size=n).tolist()
+        ys = [3 * x + 1 + e for x, e in zip(xs, rng.normal(size=n))]
+        elapsed, (dw, db) = sweep(xs, ys)
+        residuals = [2 * (0.5 * x + 0.1 - y) for x, y in zip(xs, ys)]
+        exact_w = math.fsum(r * x for r, x in zip(residuals, xs))
+        exact_b = math.fsum(residuals)
+        print(f'n = {n:6d}: {elapsed:8.2f} ms, relative error dw {abs(dw - exact_w) / abs(exact_w):.1e}, '
+              f'db {abs(db - exact_b) / abs(exact_b):.1e}')
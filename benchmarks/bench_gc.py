@@ -0,0 +1,55 @@
+"""
+Explanation
+------------------------------------
+Garbage collection pauses of ReverseAD on a graph of about 10**6 nodes, with the collector left alone
+(gc policy 'default') and paused around _compute() (gc policy 'pause').
+Each of the n terms sin(c_i * x) * y adds three nodes (sin, product, sum); terms are summed pairwise so
+ReverseMode.grad() stays within the recursion limit.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_gc.py [n_terms]
+"""
+import gc
+import sys
+import time
+import numpy as np
+from bad_package.elementary_functions import sin
+from bad_package.gc_control import set_gc_policy
+from bad_package.interface import ReverseAD
+
+class GCTimer():
+    # Records the duration of every garbage collection through gc.callbacks
+    def __init__(self):
+        self.pauses = []
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._start = time.perf_counter()
+        else:
+            self.pauses.append(time.perf_counter() - self._start)
+
+def make_function(n):
+    def f(x):
+        terms = [sin(0.001 * i * x[0]) * x[1] for i in range(n)]
+        while len(terms) > 1:
+            terms = [terms[i] + terms[i + 1] if i + 1 < len(terms) else terms[i] for i in range(0, len(terms), 2)]
+        return terms[0]
+    return f
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 333_334
+    f = make_function(n)
+    for policy in ('default', 'pause'):
+        set_gc_policy(policy)
+        gc.collect()
+        timer = GCTimer()
+        gc.callbacks.append(timer)
+        start = time.perf_counter()
+        ReverseAD(f, np.array([0.5, 2.0]))
+        elapsed = time.perf_counter() - start
+        gc.callbacks.remove(timer)
+        longest = max(timer.pauses, default=0.0)
+        print(f'{policy:8s} {elapsed:7.3f} s   gc: {len(timer.pauses):5d} collections, '
+              f'{sum(timer.pauses):6.3f} s total, {longest * 1e3:7.1f} ms longest')
@@ -0,0 +1,37 @@
+"""
+Explanation
+------------------------------------
+Thread scaling of the batched elementary function kernels.
+Evaluates value + derivative of a few elementary functions over many chunks, once serially
+and once from a thread pool. The kernels spend their time in NumPy C loops that release the GIL,
+so the pooled run should approach (serial time / number of cores).
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_kernel_threads.py
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from bad_package.kernels import value_and_derivative
+
+NAMES = ('exp', 'sin', 'tan', 'arcsin', 'sqrt', 'ln')
+CHUNKS = [np.random.default_rng(i).uniform(0.1, 0.9, 1_000_000) for i in range(16)]
+
+def work(chunk):
+    for name in NAMES:
+        value_and_derivative(name, chunk)
+
+def timed(run):
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    workers = min(4, os.cpu_count() or 1)
+    serial = timed(lambda: [work(chunk) for chunk in CHUNKS])
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        threaded = timed(lambda: list(pool.map(work, CHUNKS)))
+    print(f'serial:    {serial:.3f} s')
+    print(f'{workers} threads: {threaded:.3f} s  (speedup {serial / threaded:.2f}x)')
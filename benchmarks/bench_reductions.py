@@ -0,0 +1,30 @@
+"""
+Explanation
+------------------------------------
+ReverseAD of a least squares loss over n points, written with the builtin sum() (a chain of n additions) and with
+reductions.sum() (one node with n arguments). Each entry is the best of several runs, in milliseconds; the builtin
+version needs a recursion limit above the chain length, which is raised for the benchmark.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_reductions.py
+"""
+import sys
+import timeit
+import numpy as np
+from bad_package import reductions as rd
+from bad_package.interface import ReverseAD
+
+def make_loss(total, n):
+    xs = np.random.default_rng(0).normal(size=n).tolist()
+    ys = [3 * x + 1 for x in xs]
+    return lambda w: total([(w[0] * x + w[1] - y) ** 2 for x, y in zip(xs, ys)])
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(10**6)
+    point = np.array([0.5, 0.1])
+    for n in (10**3, 10**4):
+        for name, total in (('builtin sum', sum), ('reductions.sum', rd.sum)):
+            loss = make_loss(total, n)
+            elapsed = min(timeit.repeat(lambda: ReverseAD(loss, point), number=1, repeat=5))
+            print(f'n = {n:6d} {name:15s} {elapsed * 1e3:8.2f} ms')
@@ -0,0 +1,46 @@
+"""
+Explanation
+------------------------------------
+Jacobian times a (d, p) seed matrix for f(x) = sum(cos(x_i * x_(i+1)) + x_i**2 * sin(x_i)), with p = 10 directions.
+Compares one pass with the seed matrix, p passes with one seed column each, and the full Jacobian (one pass per
+variable) multiplied by the seed afterwards. The time of a plain evaluation (values_only) is the unit:
+the seed matrix costs a constant multiple of it, independent of d.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_seed.py
+"""
+import time
+import numpy as np
+from bad_package.elementary_functions import sin, cos
+from bad_package.interface import AutoDiff
+
+def f(x):
+    return sum(cos(x[i] * x[i + 1]) + x[i]**2 * sin(x[i]) for i in range(len(x) - 1))
+
+def best_of(run, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+if __name__ == '__main__':
+    p = 10
+    rng = np.random.default_rng(0)
+    for d in (100, 1000, 10000):
+        point = np.linspace(0.1, 2.0, d)
+        seed = rng.normal(size=(d, p))
+        plain, _ = best_of(lambda: AutoDiff(f, point, values_only=True).get_primal())
+        matrix, product = best_of(lambda: AutoDiff(f, point, seed=seed).get_jacobian())
+        columns, single = best_of(lambda: [AutoDiff(f, point, seed=seed[:, [j]]).get_jacobian()[0][0]
+                                           for j in range(p)])
+        assert np.allclose(product[0], single)
+        line = f'd = {d:5d}: plain {plain:7.1f} ms, seed matrix {matrix:7.1f} ms ({matrix / plain:4.1f}x), ' \
+               f'{p} seed columns {columns:7.1f} ms'
+        if d <= 1000:
+            full, jacobian = best_of(lambda: AutoDiff(f, point).get_jacobian(), 1)
+            assert np.allclose(np.array(jacobian) @ seed, product)
+            line += f', full Jacobian {full:8.1f} ms'
+        print(line)
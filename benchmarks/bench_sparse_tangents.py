@@ -0,0 +1,63 @@
+"""
+Explanation
+------------------------------------
+Forward mode Jacobians of locally coupled functions of d variables:
+    residuals: d functions r_i = sin(x_i) * x_(i+1) - x_(i-1)**2 (each depends on 3 variables)
+    energy:    one function sum(cos(x_i * x_(i+1)) + x_i**2) (every term depends on 2 variables, the sum on all),
+               with the builtin sum (a chain of additions) and with reductions.sum (one node)
+Compares AutoDiff with scalar tangents (one pass per variable), AutoDiff with sparse tangents (one pass), and one
+pass with dense ndarray tangents.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_sparse_tangents.py
+"""
+import time
+import numpy as np
+from bad_package.elementary_functions import sin, cos
+from bad_package.fad import _dual
+from bad_package.interface import AutoDiff
+from bad_package import reductions
+
+def residual(i, d):
+    def r(x):
+        return sin(x[i]) * x[(i + 1) % d] - x[i - 1]**2
+    return r
+
+def energy(x):
+    return sum(cos(x[i] * x[i + 1]) + x[i]**2 for i in range(len(x) - 1))
+
+def energy_reduced(x):
+    return reductions.sum([cos(x[i] * x[i + 1]) + x[i]**2 for i in range(len(x) - 1)])
+
+def dense_jacobian(functions, point):
+    seeds = np.eye(len(point))
+    trace = [_dual(float(v), seeds[k]) for k, v in enumerate(point)]
+    return [f(trace).dual.tolist() for f in functions]
+
+def best_of(run, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+if __name__ == '__main__':
+    for d in (100, 400, 1600, 6400):
+        point = np.linspace(0.1, 2.0, d)
+        cases = [('energy', [energy]), ('energy/rd', [energy_reduced])]
+        if d <= 1600:
+            # The d x d list of lists returned by get_jacobian() dominates beyond that
+            cases.insert(0, ('residuals', [residual(i, d) for i in range(d)]))
+        for name, functions in cases:
+            # Scalar tangents cost d passes per function; skip the slowest case
+            if d <= 1600 and d * len(functions) <= 400 * 400:
+                scalar, expected = best_of(lambda: AutoDiff(functions, point).get_jacobian(), 1)
+            else:
+                scalar, expected = float('nan'), None
+            sparse, jacobian = best_of(lambda: AutoDiff(functions, point, tangents='sparse').get_jacobian())
+            dense, dense_result = best_of(lambda: dense_jacobian(functions, point))
+            assert np.allclose(jacobian, dense_result)
+            assert expected is None or np.allclose(jacobian, expected)
+            print(f'd = {d:5d} {name:10s}: scalar {scalar:9.1f} ms, sparse {sparse:8.1f} ms, dense {dense:8.1f} ms')
@@ -0,0 +1,38 @@
+"""
+Explanation
+------------------------------------
+Cost of one elementary function call on a DualNumber and on a ReverseMode, per function, plus the power operator.
+Each entry is the best of several timeit repeats, in nanoseconds per call.
+The last line times Tape.jacobian() of sin(x)*cos(x) + sinh(x)*cosh(x) over 10**6 points, where sin/cos and
+sinh/cosh share their evaluations.
+
+Usage
+------------------------------------
+PYTHONPATH=src python benchmarks/bench_transcendentals.py
+"""
+import timeit
+import numpy as np
+from bad_package import elementary_functions as ef
+from bad_package.fad import DualNumber
+from bad_package.rad import ReverseMode
+from bad_package.tape import trace
+
+CASES = {
+    'exp': (ef.exp, 0.5), 'tan': (ef.tan, 0.5), 'csc': (ef.csc, 0.5), 'sec': (ef.sec, 0.5), 'cot': (ef.cot, 0.5),
+    'tanh': (ef.tanh, 0.5), 'sqrt': (ef.sqrt, 0.5),
+    'pow': (lambda x: x ** x, 0.5), 'rpow': (lambda x: 2.0 ** x, 0.5),
+}
+
+def per_call(statement, number=20000, repeat=5):
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1e9
+
+if __name__ == '__main__':
+    print(f'{"function":10s} {"DualNumber":>12s} {"ReverseMode":>12s}')
+    for name, (function, point) in CASES.items():
+        dual = per_call(lambda: function(DualNumber(point)))
+        reverse = per_call(lambda: function(ReverseMode(point)))
+        print(f'{name:10s} {dual:9.0f} ns {reverse:9.0f} ns')
+    tape = trace(lambda x: ef.sin(x) * ef.cos(x) + ef.sinh(x) * ef.cosh(x), 0.5)
+    points = np.random.default_rng(0).uniform(-1, 1, size=10**6)
+    batched = min(timeit.repeat(lambda: tape.jacobian(points), number=1, repeat=5))
+    print(f'batched sin/cos/sinh/cosh jacobian, 10**6 points: {batched * 1e3:.1f} ms')
@@ -0,0 +1,462 @@
+"""
+Explanation
+------------------------------------
+Arena-backed reverse mode: the computation graph is stored as flat, growable NumPy buffers instead of
+one ReverseMode object (with a child list and a tuple per edge) per operation
+
+Items
+------------------------------------
+Arena:
+    Struct-of-arrays graph store: the value, up to two parent indices and the local partial for each parent
+    of every node. Buffers double when full and are kept between evaluations; reset() discards the graph in O(1).
+
+ArenaNode:
+    Thin handle (arena, index, value) passed to the user function. Every overloaded operator and elementary
+    function applied to it appends one node to the arena.
+
+Notes
+------------------------------------
+Nodes only refer to earlier nodes, so the backward pass is a single loop from the output down to the inputs;
+unlike ReverseMode.grad() it does not recurse, so graph depth is not limited by the recursion limit.
+Handles are tied to the evaluation they were created in: using one after reset() raises ValueError.
+"""
+import numpy as np
+from bad_package import kernels
+from bad_package.fad import _as_scalar
+
+# Writing five array elements per operation costs more than the operation itself, so nodes are staged in a
+# Python list and copied into the NumPy buffers in blocks of this many nodes
+_BLOCK = 4096
+
+class ArenaNode():
+    '''
+    Explanation
+    ------------------------------------
+    Handle to one node of an Arena, used like a ReverseMode object inside user functions
+
+    Attributes
+    ------------------------------------
+    arena:
+        Arena the node lives in
+    index:
+        Position of the node in the arena buffers
+    real:
+        Value of the node (float)
+    generation:
+        Arena generation the handle was created in, see Arena.reset()
+
+    Methods
+    ------------------------------------
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __str__(self)
+        Pretty print of the node value and arena position
+
+    Mathematical dunder methods: Add, subtract, multiply, divide, power, negation
+
+    Reverse mathematical dunder methods: Add, subtract, multiply, divide, and power
+    '''
+
+    __slots__ = ('arena', 'index', 'real', 'generation')
+
+    def __init__(self, arena, index, real):
+        self.arena = arena
+        self.index = index
+        self.real = real
+        self.generation = arena.generation
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of ArenaNode instantiation with value, arena position, and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'ArenaNode({self.real}, index: {self.index}, id: {id(self)})'
+
+    def __str__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Pretty print of ArenaNode instantiation
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'real: {self.real}, arena index: {self.index}'
+
+    def _check(self):
+        if self.generation != self.arena.generation:
+            raise ValueError('ArenaNode used after its arena was reset')
+
+    def _operand(self, other):
+        '''
+        Explanation
+        ------------------------------------
+        Private helper resolving the other operand of a binary operator
+
+        Outputs
+        ------------------------------------
+        (value, index): the operand value and its node index (-1 for constants), or (None, None) if unsupported
+
+        Raises
+        ------------------------------------
+        ValueError if either handle is stale or the nodes live in different arenas
+        '''
+        self._check()
+        arena = self.arena
+        cls = type(other)
+        if cls is ArenaNode:
+            if other.arena is not arena or other.generation != arena.generation:
+                raise ValueError('Cannot combine ArenaNodes from different arenas or evaluations')
+            return other.real, other.index
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return None, None
+        return other, -1
+
+    def __add__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        return self.arena._push(self.real + b, self.index, 1.0, j, 1.0)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        return self.arena._push(self.real - b, self.index, 1.0, j, -1.0)
+
+    def __rsub__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        return self.arena._push(b - self.real, self.index, -1.0, j, 1.0)
+
+    def __mul__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        return self.arena._push(self.real * b, self.index, b, j, self.real)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        value = self.real / b
+        return self.arena._push(value, self.index, 1.0 / b, j, -value / b)
+
+    def __rtruediv__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        value = b / self.real
+        return self.arena._push(value, self.index, -value / self.real, j, 1.0 / self.real)
+
+    def __pow__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        value = self.real ** b
+        # The log partial is only needed (and only defined for positive bases) when the exponent is a node
+        return self.arena._push(value, self.index, b * self.real ** (b - 1.0),
+                                j, value * np.log(self.real) if j >= 0 else 0.0)
+
+    def __rpow__(self, other):
+        b, j = self._operand(other)
+        if j is None:
+            return NotImplemented
+        value = b ** self.real
+        return self.arena._push(value, self.index, value * np.log(b),
+                                j, self.real * b ** (self.real - 1.0) if j >= 0 else 0.0)
+
+    def __neg__(self):
+        self._check()
+        return self.arena._push(-self.real, self.index, -1.0)
+
+    def _apply(self, op, param=None):
+        '''
+        Explanation
+        ------------------------------------
+        Hook used by the elementary functions to append themselves to the arena
+
+        Inputs
+        ------------------------------------
+        op: (str) name of the elementary function
+        param: [optional] extra scalar parameter of the function (the base of logBase)
+
+        Outputs
+        ------------------------------------
+        ArenaNode of the result
+
+        Raises
+        ------------------------------------
+        ArithmeticError if the value lies outside the domain on which the derivative is defined
+        '''
+        self._check()
+        value_kernel, derivative_kernel, domain = kernels.KERNELS[op]
+        if domain is not None and not domain(self.real, param):
+            raise ArithmeticError(f'{op}() -- {self.real} lies outside the domain on which the derivative is defined')
+        value = float(value_kernel(self.real, param))
+        return self.arena._push(value, self.index, float(derivative_kernel(self.real, value, param)))
+
+
+class Arena():
+    '''
+    Explanation
+    ------------------------------------
+    Growable struct-of-arrays store of a reverse mode computation graph
+
+    Attributes
+    ------------------------------------
+    values:
+        float64 buffer of node values
+    parents:
+        int64 buffer of shape (capacity, 2) with the parent indices of every node (-1 for none)
+    partials:
+        float64 buffer of shape (capacity, 2) with the local partial of every node with respect to each parent
+    size:
+        Number of nodes in use (the most recent ones may still be staged, see _flush())
+    generation:
+        Counter incremented by reset(); handles from earlier generations are rejected
+
+    Methods
+    ------------------------------------
+    __init__(self, capacity=1024)
+        Instantiate Arena object with room for capacity nodes
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __len__(self)
+        Number of nodes in use
+    variable(self, value)
+        New input node
+    reset(self)
+        Discard the graph in O(1), keeping the buffers
+    gradient(self, output, inputs)
+        Backward pass from output, returning d output / d input for every input
+    jacobian(self, f, var_list)
+        Jacobian of one or more user functions (same conventions as ReverseAD)
+
+    Example
+    ------------------------------------
+    arena = Arena()
+    x, y = arena.variable(2.0), arena.variable(3.0)
+    z = x * y + sin(x)
+    arena.gradient(z, [x, y])
+    >>> array([2.58385316, 2.        ])
+    arena.reset()
+    '''
+
+    def __init__(self, capacity=1024):
+        capacity = max(int(capacity), 1)
+        self.values = np.empty(capacity)
+        self.parents = np.empty((capacity, 2), dtype=np.int64)
+        self.partials = np.empty((capacity, 2))
+        self.size = 0
+        self.generation = 0
+        # Nodes appended since the last flush, as (value, parent0, partial0, parent1, partial1) tuples
+        self._staged = []
+        self._flushed = 0
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of Arena instantiation with size, capacity, and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'Arena(size: {self.size}, capacity: {len(self.values)}, id: {id(self)})'
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        # Doubling keeps the amortized cost of appending a node constant
+        capacity = len(self.values)
+        while capacity < needed:
+            capacity *= 2
+        for name in ('values', 'parents', 'partials'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._flushed] = old[:self._flushed]
+            setattr(self, name, new)
+
+    def _flush(self):
+        # Copy the staged nodes into the buffers with one vectorized assignment per buffer
+        if not self._staged:
+            return
+        block = np.array(self._staged, dtype=float)
+        start, stop = self._flushed, self._flushed + len(block)
+        if stop > len(self.values):
+            self._grow(stop)
+        self.values[start:stop] = block[:, 0]
+        self.parents[start:stop] = block[:, 1::2]
+        self.partials[start:stop] = block[:, 2::2]
+        self._flushed = stop
+        self._staged.clear()
+
+    def _push(self, value, parent0=-1, partial0=0.0, parent1=-1, partial1=0.0):
+        '''
+        Explanation
+        ------------------------------------
+        Private helper appending a node with up to two parents (-1 marks a missing parent or a constant operand)
+
+        Outputs
+        ------------------------------------
+        ArenaNode of the new node
+        '''
+        i = self.size
+        staged = self._staged
+        staged.append((value, parent0, partial0, parent1, partial1))
+        if len(staged) >= _BLOCK:
+            self._flush()
+        self.size = i + 1
+        return ArenaNode(self, i, value)
+
+    def variable(self, value):
+        '''
+        Explanation
+        ------------------------------------
+        Append an input node
+
+        Inputs
+        ------------------------------------
+        value: int or float (NumPy scalars included)
+
+        Outputs
+        ------------------------------------
+        ArenaNode
+
+        Raises
+        ------------------------------------
+        TypeError if value is not a number
+        '''
+        scalar = _as_scalar(value)
+        if scalar is None:
+            raise TypeError('Arena variables may only be initialized as integers or floats')
+        return self._push(float(scalar))
+
+    def reset(self):
+        '''
+        Explanation
+        ------------------------------------
+        Discard all nodes without freeing or clearing the buffers, so the next evaluation reuses them.
+        Handles created before the reset become invalid.
+        '''
+        self.size = 0
+        self.generation += 1
+        self._staged.clear()
+        self._flushed = 0
+
+    def gradient(self, output, inputs, out=None):
+        '''
+        Explanation
+        ------------------------------------
+        Single backward sweep over the arena from output down to the first input
+
+        Inputs
+        ------------------------------------
+        output: ArenaNode (or a number, when the function did not depend on any input)
+        inputs: list of ArenaNodes to differentiate with respect to
+        out: [optional] float ndarray of shape (# inputs,) the gradient is written into
+
+        Outputs
+        ------------------------------------
+        ndarray of shape (# inputs,) (out itself when given)
+
+        Raises
+        ------------------------------------
+        ValueError if a handle is stale or belongs to another arena
+        '''
+        for node in inputs:
+            node._check()
+            if node.arena is not self:
+                raise ValueError('Cannot differentiate with respect to an ArenaNode of another arena')
+        if out is None:
+            out = np.empty(len(inputs))
+        if not isinstance(output, ArenaNode):
+            out[:] = 0.0
+            return out
+        output._check()
+        self._flush()
+
+        indices = [node.index for node in inputs]
+        start = min(indices + [output.index])
+        stop = max(indices + [output.index]) + 1
+        # Plain lists make the scalar loop below much faster than indexing NumPy arrays element by element
+        parents = self.parents[start:output.index + 1].tolist()
+        partials = self.partials[start:output.index + 1].tolist()
+        adjoints = [0.0] * (stop - start)
+        adjoints[output.index - start] = 1.0
+        for i in range(output.index - start, -1, -1):
+            adjoint = adjoints[i]
+            if adjoint == 0.0:
+                continue
+            (p0, p1), (w0, w1) = parents[i], partials[i]
+            if p0 >= start:
+                adjoints[p0 - start] += adjoint * w0
+            if p1 >= start:
+                adjoints[p1 - start] += adjoint * w1
+        if indices == list(range(start, start + len(inputs))):
+            # Inputs created one after another (the usual case): copy the leading adjoints in one go
+            out[:] = adjoints[:len(inputs)]
+        else:
+            out[:] = [adjoints[i - start] for i in indices]
+        return out
+
+    def jacobian(self, f, var_list):
+        '''
+        Explanation
+        ------------------------------------
+        Jacobian of the user function(s) f at var_list, resetting the arena before every function
+
+        Inputs
+        ------------------------------------
+        f: single function, or list/ndarray of functions (same conventions as ReverseAD)
+        var_list: int, float, list, or ndarray point
+
+        Outputs
+        ------------------------------------
+        ndarray of shape (# functions, # variables)
+
+        Raises
+        ------------------------------------
+        TypeError if f is not callable (a function), list, or ndarray
+        TypeError if var_list is not a list, ndarray, int, or float, or is empty
+        '''
+        if isinstance(var_list, (int, float)):
+            point = [var_list]
+        elif isinstance(var_list, (list, np.ndarray)):
+            point = np.asarray(var_list, dtype=float).ravel().tolist()
+        else:
+            raise TypeError('Second argument in must be a list or ndarray of integers or float or single integers or floats.')
+        if len(point) == 0:
+            raise TypeError('Your variable list must have at least one value!')
+        if isinstance(f, (list, np.ndarray)):
+            functions = list(f)
+        elif callable(f):
+            functions = [f]
+        else:
+            raise TypeError('First argument in must be a list of ndarray of functions or a single function.')
+
+        jacobian = np.empty((len(functions), len(point)))
+        for row, function in enumerate(functions):
+            self.reset()
+            inputs = [self.variable(value) for value in point]
+            output = function(inputs[0] if len(inputs) == 1 else inputs)
+            jacobian[row] = self.gradient(output, inputs)
+        return jacobian
@@ -0,0 +1,313 @@
+"""
+Explanation
+------------------------------------
+Batch evaluation of traced user functions over many points
+
+Items
+------------------------------------
+iter_chunks(points, chunk):
+    Splits an array or any iterable of points into (n, d) arrays of at most chunk points
+
+iter_jacobians(f, points, chunk=4096, prefetch=False, ...):
+    Streams (values, jacobian) chunks for a point stream of any length with O(chunk) memory.
+    f is traced once at the first point and the Tape is replayed on every chunk.
+
+write_jacobians(f, points, jacobian_out, values_out=None, valid_out=None, chunk=4096, start_chunk=None, ...):
+    Writes the Jacobians (and values) of an (N, d) array or np.memmap straight into caller-supplied arrays,
+    memmaps or .npy files, chunk by chunk. Completed chunks are recorded in a .progress file next to the output,
+    so a job that crashed resumes at the first unfinished chunk.
+"""
+import itertools
+import os
+import queue
+import tempfile
+import threading
+import numpy as np
+from bad_package.tape import trace, _float_dtype
+
+def iter_chunks(points, chunk):
+    '''
+    Explanation
+    ------------------------------------
+    Split points into consecutive chunks without materializing more than one chunk at a time
+
+    Inputs
+    ------------------------------------
+    points: ndarray of shape (N,) or (N, d), or any iterable yielding single points (scalars or 1-D arrays)
+    chunk: (int) maximum number of points per chunk
+
+    Outputs
+    ------------------------------------
+    generator of float ndarrays of shape (n, d) with 1 <= n <= chunk
+
+    Raises
+    ------------------------------------
+    ValueError if chunk is not a positive integer
+    '''
+    if not isinstance(chunk, (int, np.integer)) or chunk < 1:
+        raise ValueError(f'chunk must be a positive integer, not {chunk!r}')
+    if isinstance(points, np.ndarray):
+        # Slicing an array (including np.memmap) only reads the rows of the current chunk
+        for start in range(0, len(points), chunk):
+            block = np.asarray(points[start:start + chunk], dtype=float)
+            yield block.reshape(len(block), -1)
+        return
+    iterator = iter(points)
+    while True:
+        block = list(itertools.islice(iterator, chunk))
+        if not block:
+            return
+        block = np.asarray(block, dtype=float)
+        yield block.reshape(len(block), -1)
+
+class _Prefetcher():
+    '''
+    Explanation
+    ------------------------------------
+    Private helper reading the next chunk on a background thread while the current one is being differentiated.
+    The queue holds a single chunk, so at most two chunks are alive at any time.
+    Exceptions raised while reading are re-raised in the consuming thread.
+    '''
+
+    _done = object()
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.queue = queue.Queue(maxsize=1)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        # Poll so that a consumer that stopped early does not leave this thread blocked forever
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for block in self.chunks:
+                if not self._put((block, None)):
+                    return
+        except BaseException as error:
+            self._put((None, error))
+            return
+        self._put((self._done, None))
+
+    def __iter__(self):
+        try:
+            while True:
+                block, error = self.queue.get()
+                if error is not None:
+                    raise error
+                if block is self._done:
+                    return
+                yield block
+        finally:
+            self.stop.set()
+            self.thread.join()
+
+def iter_jacobians(f, points, chunk=4096, prefetch=False, mode='auto', dtype=np.float64, domain_policy='raise', tape=None):
+    '''
+    Explanation
+    ------------------------------------
+    Differentiate f over a stream of points, one chunk at a time.
+    Peak memory is proportional to chunk (two chunks with prefetch), independent of the length of the stream.
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions (same conventions as AutoDiff)
+    points: ndarray (N,) or (N, d) (np.memmap works too), or any iterable of single points, e.g. a generator reading a file
+    chunk: [optional] (int) number of points evaluated together (default 4096)
+    prefetch: [optional] (bool) read the next chunk on a background thread while the current one is evaluated
+    mode: [optional] 'forward', 'reverse' or 'auto', see Tape.jacobian()
+    dtype: [optional] floating point type of the replay, see Tape.jacobian()
+    domain_policy: [optional] 'raise', 'nan' or 'clip', see Tape.jacobian()
+    tape: [optional] already traced (or cached) Tape of f; f is traced at the first point when omitted
+
+    Outputs
+    ------------------------------------
+    generator of (values, jacobian) per chunk, shapes (n, # functions) and (n, # functions, # variables)
+    generator of (values, jacobian, valid) when domain_policy is 'nan' or 'clip'
+
+    Example
+    ------------------------------------
+    def f(x):
+        return x[0]**2 + 3*x[1]
+    rows = (np.array(line.split(), dtype=float) for line in open('points.txt'))
+    for values, jacobian in iter_jacobians(f, rows, chunk=4096, prefetch=True):
+        consume(values, jacobian)
+    '''
+    chunks = iter_chunks(points, chunk)
+    if prefetch:
+        chunks = iter(_Prefetcher(chunks))
+    try:
+        for block in chunks:
+            if tape is None:
+                tape = trace(f, block[0], domain_policy)
+            yield tape.jacobian(block, mode=mode, dtype=dtype, domain_policy=domain_policy)
+    finally:
+        # Closing the generator early also stops the prefetch thread
+        if prefetch:
+            chunks.close()
+
+def _open_output(out, shape, dtype):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper turning an output argument of write_jacobians() into an array of the expected shape
+
+    Inputs
+    ------------------------------------
+    out: None, ndarray/np.memmap, or path of a .npy file (created when missing, opened for update otherwise)
+    shape: tuple, expected shape
+    dtype: numpy dtype of newly created files
+
+    Outputs
+    ------------------------------------
+    None, the ndarray itself, or an np.memmap of the .npy file
+
+    Raises
+    ------------------------------------
+    ValueError if out does not have the expected shape
+    '''
+    if out is None:
+        return None
+    if not isinstance(out, np.ndarray):
+        path = os.fspath(out)
+        if os.path.exists(path):
+            out = np.lib.format.open_memmap(path, mode='r+')
+        else:
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    if out.shape != shape:
+        raise ValueError(f'Output must have shape {shape}, not {out.shape}')
+    return out
+
+def _progress_path(out):
+    # Progress is kept next to the file backing the Jacobian; in-memory arrays have no such file
+    filename = getattr(out, 'filename', None)
+    return None if filename is None else os.fspath(filename) + '.progress'
+
+def _read_progress(path, chunk):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper reading the number of completed chunks from a progress file
+
+    Outputs
+    ------------------------------------
+    int, 0 when there is no progress file
+
+    Raises
+    ------------------------------------
+    ValueError if the progress file was written with a different chunk size
+    '''
+    if path is None or not os.path.exists(path):
+        return 0
+    with open(path) as file:
+        done, recorded_chunk = (int(field) for field in file.read().split())
+    if recorded_chunk != chunk:
+        raise ValueError(f'{path} records chunks of {recorded_chunk} points, resume with chunk={recorded_chunk} (not {chunk})')
+    return done
+
+def _write_progress(path, done, chunk):
+    # Temporary file plus atomic rename, so a crash never leaves a half-written progress file behind
+    directory = os.path.dirname(path) or '.'
+    handle, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as file:
+            file.write(f'{done} {chunk}\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def write_jacobians(f, points, jacobian_out, values_out=None, valid_out=None, chunk=4096, start_chunk=None,
+                    mode='auto', dtype=np.float64, domain_policy='raise', tape=None):
+    '''
+    Explanation
+    ------------------------------------
+    Differentiate f at every row of points and write the results directly into the outputs, one chunk at a time.
+    Each chunk is read from points, replayed on the Tape and written into a slice of jacobian_out, so the full
+    (N, # functions, # variables) Jacobian never has to fit in memory.
+
+    After every chunk the memmapped outputs are flushed and the number of completed chunks is written to
+    <jacobian file>.progress. Calling write_jacobians() again with the same arguments after a crash continues
+    at the first chunk that was not completed; after a successful run it returns without recomputing anything.
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions (same conventions as AutoDiff)
+    points: ndarray or np.memmap of shape (N,) or (N, d)
+    jacobian_out: ndarray/np.memmap of shape (N, # functions, # variables), or path of a .npy file,
+                  created with that shape (and dtype) when missing
+    values_out: [optional] ndarray/np.memmap of shape (N, # functions) or .npy path for the function values
+    valid_out: [optional] boolean ndarray/np.memmap of shape (N,) or .npy path for the domain mask,
+               see Tape.jacobian() (all True under domain_policy='raise')
+    chunk: [optional] (int) number of points evaluated together (default 4096)
+    start_chunk: [optional] (int) index of the first chunk to compute; by default read from the progress file
+                 (0 when there is none, or when jacobian_out is not backed by a file)
+    mode: [optional] 'forward', 'reverse' or 'auto', see Tape.jacobian()
+    dtype: [optional] floating point type of the replay and of newly created .npy files, see Tape.jacobian()
+    domain_policy: [optional] 'raise', 'nan' or 'clip', see Tape.jacobian()
+    tape: [optional] already traced (or cached) Tape of f; f is traced at the first point when omitted
+
+    Outputs
+    ------------------------------------
+    (values_out, jacobian_out, valid_out): the output arrays (np.memmap for .npy paths, None where not requested)
+
+    Raises
+    ------------------------------------
+    TypeError if points is not an ndarray
+    ValueError if chunk is not a positive integer, an output has the wrong shape,
+               or the progress file was written with a different chunk size
+    ArithmeticError if domain_policy is 'raise' and any point leaves the domain (completed chunks stay recorded)
+
+    Example
+    ------------------------------------
+    def f(x):
+        return [x[0]**2 * x[1], sin(x[1])]
+    points = np.load('points.npy', mmap_mode='r')    # (10**8, 2)
+    write_jacobians(f, points, 'jacobians.npy', values_out='values.npy', chunk=65536)
+    jacobians = np.load('jacobians.npy', mmap_mode='r')    # (10**8, 2, 2)
+    '''
+    if not isinstance(points, np.ndarray):
+        raise TypeError(f'points must be an ndarray or np.memmap, not {type(points).__name__}')
+    if not isinstance(chunk, (int, np.integer)) or chunk < 1:
+        raise ValueError(f'chunk must be a positive integer, not {chunk!r}')
+    dtype = _float_dtype(dtype)
+    n_points = len(points)
+    if tape is None:
+        tape = trace(f, np.asarray(points[0], dtype=float).reshape(-1), domain_policy)
+    n_functions = len(tape.outputs)
+
+    jacobian_out = _open_output(jacobian_out, (n_points, n_functions, tape.n_inputs), dtype)
+    values_out = _open_output(values_out, (n_points, n_functions), dtype)
+    valid_out = _open_output(valid_out, (n_points,), bool)
+    outputs = [out for out in (jacobian_out, values_out, valid_out) if out is not None]
+
+    progress = _progress_path(jacobian_out)
+    if start_chunk is None:
+        start_chunk = _read_progress(progress, chunk)
+
+    n_chunks = -(-n_points // chunk)
+    for index in range(start_chunk, n_chunks):
+        start, stop = index * chunk, min((index + 1) * chunk, n_points)
+        block = np.asarray(points[start:stop], dtype=dtype).reshape(stop - start, -1)
+        result = tape.jacobian(block, mode=mode, dtype=dtype, domain_policy=domain_policy,
+                               out=jacobian_out[start:stop])
+        if values_out is not None:
+            values_out[start:stop] = result[0]
+        if valid_out is not None:
+            valid_out[start:stop] = True if domain_policy == 'raise' else result[2]
+        # Flush before recording progress, so every chunk the progress file counts is on disk
+        for out in outputs:
+            if isinstance(out, np.memmap):
+                out.flush()
+        if progress is not None:
+            _write_progress(progress, index + 1, chunk)
+    return values_out, jacobian_out, valid_out
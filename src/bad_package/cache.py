@@ -0,0 +1,199 @@
+"""
+Explanation
+------------------------------------
+Persistent on-disk cache of traced derivative programs, so restarted workers can skip retracing
+
+Items
+------------------------------------
+cache_key(f, var_list):
+    Hex digest identifying a traced program: function source, bytecode and constants, plus the input shape
+
+TapeCache:
+    Directory of saved Tapes keyed by cache_key(). trace() returns the cached Tape when present
+    and traces (then saves) it otherwise.
+
+Notes
+------------------------------------
+The key only covers the code of the functions themselves. Globals, closures or default arguments that change
+between runs are not part of the key; clear the cache (or use a new directory) when those change.
+"""
+import hashlib
+import inspect
+import os
+import tempfile
+import types
+import numpy as np
+from bad_package.optimize import optimize
+from bad_package.tape import Tape, trace
+
+def _hash_function(digest, f):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper feeding the source, bytecode and constants of f into a hashlib digest
+
+    Inputs
+    ------------------------------------
+    digest: hashlib object to update
+    f: user function
+    '''
+    try:
+        digest.update(inspect.getsource(f).encode())
+    except (OSError, TypeError):
+        # Source is unavailable for functions defined in an interactive session; bytecode still identifies them
+        pass
+    code = getattr(f, '__code__', None)
+    if code is not None:
+        _hash_code(digest, code)
+    else:
+        digest.update(repr(f).encode())
+
+def _hash_code(digest, code):
+    # Bytecode, constants and names of a code object and, recursively, of the code objects nested in it
+    # (lambdas, generator expressions, comprehensions), whose repr would contain their memory address
+    digest.update(code.co_code)
+    _hash_constant(digest, code.co_consts)
+    digest.update(repr(code.co_names).encode())
+
+def _hash_constant(digest, value):
+    # Constants are hashed by content, never by anything that differs between processes
+    if isinstance(value, types.CodeType):
+        digest.update(b'code(')
+        _hash_code(digest, value)
+        digest.update(b')')
+    elif isinstance(value, tuple):
+        digest.update(b'tuple(')
+        for item in value:
+            _hash_constant(digest, item)
+        digest.update(b')')
+    elif isinstance(value, frozenset):
+        # Iteration order of strings depends on the per-process hash seed
+        digest.update(b'frozenset(')
+        for item in sorted(repr(item) for item in value):
+            digest.update(item.encode())
+        digest.update(b')')
+    else:
+        digest.update(repr(value).encode())
+        digest.update(b',')
+
+def cache_key(f, var_list):
+    '''
+    Explanation
+    ------------------------------------
+    Key under which the traced program of f at points shaped like var_list is cached
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions
+    var_list: int, float, list, or ndarray point (only its shape enters the key)
+
+    Outputs
+    ------------------------------------
+    str: hexadecimal sha256 digest
+    '''
+    digest = hashlib.sha256()
+    functions = list(f) if isinstance(f, (list, np.ndarray)) else [f]
+    for function in functions:
+        _hash_function(digest, function)
+    shape = 'scalar' if isinstance(var_list, (int, float)) else str(np.shape(var_list))
+    digest.update(shape.encode())
+    return digest.hexdigest()
+
+class TapeCache():
+    '''
+    Explanation
+    ------------------------------------
+    Directory of traced programs saved as .npz files.
+    Writes go through a temporary file followed by an atomic rename, so several workers may share a directory.
+
+    Attributes
+    ------------------------------------
+    directory:
+        Path of the cache directory (created if missing)
+    optimize:
+        Boolean, run optimize() on freshly traced programs before storing them (default True)
+
+    Methods
+    ------------------------------------
+    __init__(self, directory, optimize=True)
+        Instantiate TapeCache object
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    path(self, f, var_list)
+        File the program of f would be cached in
+    load(self, f, var_list)
+        Cached Tape, or None on a miss
+    store(self, f, var_list, tape)
+        Save a Tape under the key of f and var_list
+    trace(self, f, var_list, domain_policy='raise')
+        Cached Tape on a hit, freshly traced (and stored) Tape on a miss
+
+    Example
+    ------------------------------------
+    cache = TapeCache('/tmp/bad_cache')
+    tape = cache.trace(f, np.array([1.0, 2.0]))    # traces f on the first run, loads it afterwards
+    values, jacobian = tape.jacobian(points)
+    '''
+
+    def __init__(self, directory, optimize=True):
+        self.directory = os.fspath(directory)
+        self.optimize = optimize
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of TapeCache instantiation with directory and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'TapeCache({self.directory!r}, id: {id(self)})'
+
+    def path(self, f, var_list):
+        return os.path.join(self.directory, cache_key(f, var_list) + '.npz')
+
+    def load(self, f, var_list):
+        path = self.path(f, var_list)
+        if not os.path.exists(path):
+            return None
+        return Tape.load(path)
+
+    def store(self, f, var_list, tape):
+        path = self.path(f, var_list)
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                tape.save(file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def trace(self, f, var_list, domain_policy='raise'):
+        '''
+        Explanation
+        ------------------------------------
+        Return the traced program of f, loading it from disk when it was traced before.
+        Freshly traced programs are optimized before being stored, so warm restarts load the smaller program.
+
+        Inputs
+        ------------------------------------
+        f: single function, or list/ndarray of functions
+        var_list: int, float, list, or ndarray point to trace at on a miss
+        domain_policy: [optional] domain policy of tracing on a miss, see tape.trace()
+
+        Outputs
+        ------------------------------------
+        Tape object
+        '''
+        tape = self.load(f, var_list)
+        if tape is None:
+            tape = trace(f, var_list, domain_policy)
+            if self.optimize:
+                tape = optimize(tape)
+            self.store(f, var_list, tape)
+        return tape
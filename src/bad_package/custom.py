@@ -0,0 +1,262 @@
+"""
+Explanation
+------------------------------------
+User-defined primitives with custom derivative rules.
+A wrapped function is evaluated on plain floats, even inside AutoDiff and ReverseAD, and differentiated with the
+rule the user supplies: the forward pass creates one DualNumber / one ReverseMode node for the whole call, however
+many operations the function performs internally (an iterative solver, a simulation, a call into compiled code).
+
+Items
+------------------------------------
+CustomPrimitive:
+    Callable wrapper holding the function and its derivative rules
+
+custom_jvp(fun):
+    Decorator turning fun into a CustomPrimitive; define the rule with @fun.defjvp
+
+custom_vjp(fun):
+    Decorator turning fun into a CustomPrimitive; define the rules with fun.defvjp(fwd, bwd)
+
+Notes
+------------------------------------
+Custom primitives take any number of scalar arguments and return a scalar. Either rule is enough for both modes:
+forward mode turns a VJP into the gradient (one bwd call) dotted with the tangents, reverse mode turns a JVP
+into one partial per differentiated argument (one jvp call each). Define both when both should be cheap.
+Custom primitives cannot be recorded on a Tape, an Arena or a lazy graph, whose replay needs array kernels.
+"""
+import functools
+from bad_package.fad import DualNumber, _as_scalar, _dual
+from bad_package.rad import ReverseMode, _node
+
+class CustomPrimitive():
+    '''
+    Explanation
+    ------------------------------------
+    Function of scalar arguments with a user-supplied derivative rule
+
+    Attributes
+    ------------------------------------
+    fun:
+        The wrapped function, only ever called with floats
+    jvp:
+        Forward rule jvp(primals, tangents) -> (value, tangent), or None
+    fwd, bwd:
+        Reverse rules fwd(*primals) -> (value, residuals) and bwd(residuals, cotangent) -> one cotangent per argument, or None
+
+    Methods
+    ------------------------------------
+    __init__(self, fun)
+        Wrap fun, without derivative rules yet
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __call__(self, *args)
+        Evaluate on floats, DualNumbers or ReverseModes
+    defjvp(self, jvp)
+        Set the forward rule (usable as a decorator)
+    defvjp(self, fwd, bwd)
+        Set the reverse rules
+
+    Example
+    ------------------------------------
+    @custom_jvp
+    def cube_root(a):
+        x = 1.0
+        for _ in range(100):
+            x -= (x**3 - a) / (3 * x**2)
+        return x
+
+    @cube_root.defjvp
+    def cube_root_jvp(primals, tangents):
+        x = cube_root(*primals)
+        return x, tangents[0] / (3 * x**2)
+
+    AutoDiff(lambda a: cube_root(a) * a, 8.0).get_jacobian()
+    >>> 2.6666666666666665
+    '''
+
+    def __init__(self, fun):
+        if not callable(fun):
+            raise TypeError('custom_jvp/custom_vjp must wrap a function')
+        self.fun = fun
+        self.jvp = None
+        self.fwd = None
+        self.bwd = None
+        functools.update_wrapper(self, fun)
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of CustomPrimitive instantiation with the wrapped function, defined rules and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        rules = [name for name, rule in (('jvp', self.jvp), ('vjp', self.bwd)) if rule is not None]
+        return f'CustomPrimitive({self.fun.__name__}, rules: {rules}, id: {id(self)})'
+
+    def defjvp(self, jvp):
+        '''
+        Explanation
+        ------------------------------------
+        Set the forward rule
+
+        Inputs
+        ------------------------------------
+        jvp: function jvp(primals, tangents) -> (value, tangent)
+             primals and tangents are tuples of floats with one entry per argument (tangent 0.0 for constants)
+
+        Outputs
+        ------------------------------------
+        jvp, so defjvp can be used as a decorator
+        '''
+        if not callable(jvp):
+            raise TypeError('The jvp rule must be a function')
+        self.jvp = jvp
+        return jvp
+
+    def defvjp(self, fwd, bwd):
+        '''
+        Explanation
+        ------------------------------------
+        Set the reverse rules
+
+        Inputs
+        ------------------------------------
+        fwd: function fwd(*primals) -> (value, residuals); residuals is anything bwd needs
+        bwd: function bwd(residuals, cotangent) -> tuple with one cotangent (float) per argument
+        '''
+        if not callable(fwd) or not callable(bwd):
+            raise TypeError('The fwd and bwd rules must be functions')
+        self.fwd = fwd
+        self.bwd = bwd
+
+    def __call__(self, *args):
+        '''
+        Explanation
+        ------------------------------------
+        Evaluate the primitive. With only plain numbers this calls fun; DualNumber arguments produce one DualNumber
+        and ReverseMode arguments one ReverseMode node, from the derivative rules.
+
+        Inputs
+        ------------------------------------
+        args: ints, floats, DualNumbers, or ReverseModes (not both DualNumbers and ReverseModes)
+
+        Outputs
+        ------------------------------------
+        float, DualNumber, or ReverseMode
+
+        Raises
+        ------------------------------------
+        TypeError if an argument is of another type, DualNumbers and ReverseModes are mixed,
+        or no derivative rule is defined
+        '''
+        primals, duals, nodes = [], [], []
+        for i, arg in enumerate(args):
+            cls = type(arg)
+            if cls is DualNumber or isinstance(arg, DualNumber):
+                duals.append(i)
+                primals.append(float(arg.real))
+            elif cls is ReverseMode or isinstance(arg, ReverseMode):
+                nodes.append(i)
+                primals.append(float(arg.real))
+            else:
+                scalar = arg if cls is float or cls is int else _as_scalar(arg)
+                if scalar is None:
+                    raise TypeError(f'{self.fun.__name__}() -- custom primitives take ints, floats, DualNumbers, '
+                                    f'or ReverseModes, not {cls.__name__}')
+                primals.append(float(scalar))
+        if not duals and not nodes:
+            return self.fun(*primals)
+        if duals and nodes:
+            raise TypeError(f'{self.fun.__name__}() -- cannot mix DualNumbers and ReverseModes')
+        if self.jvp is None and self.bwd is None:
+            raise TypeError(f'{self.fun.__name__}() -- no derivative rule, use defjvp() or defvjp()')
+
+        if duals:
+            tangents = [0.0] * len(args)
+            for i in duals:
+                tangents[i] = args[i].dual
+            value, tangent = self._forward(primals, tangents)
+            return _dual(value, tangent)
+
+        value, partials = self._partials(primals, nodes)
+        f = _node(value)
+        for i, partial in zip(nodes, partials):
+            args[i].child.append((partial, f))
+        return f
+
+    def _forward(self, primals, tangents):
+        # (value, tangent) from the jvp rule, or from the gradient given by one bwd call
+        if self.jvp is not None:
+            return self.jvp(tuple(primals), tuple(tangents))
+        value, residuals = self.fwd(*primals)
+        cotangents = self.bwd(residuals, 1.0)
+        # Tangents may be vectors (sparse.SparseTangent or ndarray); only the 0.0 of constant arguments is skipped
+        return value, sum(c * t for c, t in zip(cotangents, tangents) if type(t) is not float or t != 0.0)
+
+    def _partials(self, primals, active):
+        # (value, partial derivative for every argument index in active), from bwd or one jvp call per argument
+        if self.bwd is not None:
+            value, residuals = self.fwd(*primals)
+            cotangents = self.bwd(residuals, 1.0)
+            return value, [cotangents[i] for i in active]
+        partials = []
+        value = None
+        for i in active:
+            tangents = [0.0] * len(primals)
+            tangents[i] = 1.0
+            value, tangent = self.jvp(tuple(primals), tuple(tangents))
+            partials.append(tangent)
+        return value, partials
+
+def custom_jvp(fun):
+    '''
+    Explanation
+    ------------------------------------
+    Decorator making fun a primitive with a forward derivative rule, set with @fun.defjvp (see CustomPrimitive)
+
+    Inputs
+    ------------------------------------
+    fun: function of scalar arguments returning a scalar
+
+    Outputs
+    ------------------------------------
+    CustomPrimitive
+    '''
+    return CustomPrimitive(fun)
+
+def custom_vjp(fun):
+    '''
+    Explanation
+    ------------------------------------
+    Decorator making fun a primitive with reverse derivative rules, set with fun.defvjp(fwd, bwd) (see CustomPrimitive)
+
+    Inputs
+    ------------------------------------
+    fun: function of scalar arguments returning a scalar
+
+    Outputs
+    ------------------------------------
+    CustomPrimitive
+
+    Example
+    ------------------------------------
+    @custom_vjp
+    def norm(a, b):
+        return (a * a + b * b) ** 0.5
+
+    def norm_fwd(a, b):
+        value = norm(a, b)
+        return value, (a, b, value)
+
+    def norm_bwd(residuals, cotangent):
+        a, b, value = residuals
+        return cotangent * a / value, cotangent * b / value
+
+    norm.defvjp(norm_fwd, norm_bwd)
+    ReverseAD(lambda x: norm(x[0], x[1]), np.array([3.0, 4.0])).get_jacobian()
+    >>> [[0.6, 0.8]]
+    '''
+    return CustomPrimitive(fun)
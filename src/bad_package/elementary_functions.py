@@ -1,9 +1,14 @@
 # Defines and describes the behavior of overloaded operators on different data types within the package
 import numpy as np
-from bad_package.fad import DualNumber
-from bad_package.rad import ReverseMode
+from bad_package import kernels
+from bad_package.kernels import KERNELS as _KERNELS, VALUE_DOMAINS as _VALUE_DOMAINS
+from bad_package.fad import DualNumber, _as_scalar, _dual
+from bad_package.rad import ReverseMode, _node
+from bad_package.tape import TapeNode
+from bad_package.arena import ArenaNode
+from bad_package.lazy import LazyNode
 
-__all__ = ['e', 'pi', 'zero', 'exp', 'ln', 'logBase', 'sin', 'cos', 'tan', 'csc', 'sec', 'cot', 'sinh', 'cosh', 'tanh', 'arcsin', 'arccos', 'arctan', 'arcsinh', 'arccosh', 'arctanh', 'sqrt']
+__all__ = ['e', 'pi', 'zero', 'define_primitive', 'exp', 'ln', 'logBase', 'sin', 'cos', 'tan', 'csc', 'sec', 'cot', 'sinh', 'cosh', 'tanh', 'arcsin', 'arccos', 'arctan', 'arcsinh', 'arccosh', 'arctanh', 'sqrt']
 
 # OVERLOADING CONSTANTS
 e = np.e
@@ -13,6 +18,12 @@ pi = np.pi
 zero = np.sin(pi)
 
 # Helper functions
+
+# Types elementary functions accept as they are, resolved once instead of on every call
+_PASS_THROUGH = frozenset((float, DualNumber, ReverseMode, TapeNode, ArenaNode, LazyNode))
+# Node types that record elementary functions through their _apply() hook
+_RECORDING = (TapeNode, ArenaNode, LazyNode)
+
 def _validate(x, fun):
     '''
     Explanation
@@ -26,23 +37,121 @@ def _validate(x, fun):
 
     Outputs
     ------------------------------------
-    if x is an integer, return float
-    if x is a float, return float
+    if x is an integer (Python or NumPy), return float
+    if x is a float (Python or NumPy), return float
     if x is a DualNumber, return DualNumber
     if x is a ReverseMode, return ReverseMode
+    if x is a TapeNode, return TapeNode
+    if x is an ArenaNode, return ArenaNode
+    if x is a LazyNode, return LazyNode
 
     Raises
     ------------------------------------
-    TypeError: invalid x type, must be int, float, DualNumber, or ReverseMode
+    TypeError: invalid x type, must be int, float, DualNumber, ReverseMode, TapeNode, ArenaNode, or LazyNode
     '''
-    # So we avoid any kind of truncation errors and things, better to do so explicitly
-    if isinstance(x, int):
+    # Exact-type fast path for the common cases
+    if type(x) in _PASS_THROUGH:
+        return x
+    if type(x) is int:
         return float(x)
-    # Check if the element is something we can do the computation with (would have casted int to float already)
-    elif isinstance(x, (DualNumber, ReverseMode, float)):
+    # So we avoid any kind of truncation errors and things, better to do so explicitly (NumPy scalars included)
+    scalar = _as_scalar(x)
+    if scalar is not None:
+        return float(scalar)
+    # Subclasses of the supported types
+    elif isinstance(x, (DualNumber, ReverseMode, TapeNode, ArenaNode, LazyNode)):
         return x
     else:
-        raise TypeError(f'{fun} -- Elementary functions can only do computations on DualNumbers, ReverseModes, integers, and floats')
+        raise TypeError(f'{fun} -- Elementary functions can only do computations on DualNumbers, ReverseModes, TapeNodes, ArenaNodes, LazyNodes, integers, and floats')
+
+def _elementary(name, x, param=None):
+    '''
+    Explanation
+    ------------------------------------
+    Private method applying the primitive name of the kernels registry (bad_package.kernels.KERNELS) to x.
+    Every elementary function goes through here, so floats, DualNumbers, ReverseModes and the recording node types
+    all share one declaration of the value, the derivative and the domain of each function.
+
+    Inputs
+    ------------------------------------
+    name: (str) name of the primitive
+    x: int, float, DualNumber, ReverseMode, TapeNode, ArenaNode or LazyNode
+    param: [optional] extra scalar parameter of the primitive (the base of logBase)
+
+    Outputs
+    ------------------------------------
+    if x is a float, return the value
+    if x is a DualNumber, return DualNumber(value, derivative * x.dual)
+    if x is a ReverseMode, return ReverseMode(value), with the derivative as local partial of x
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording the primitive
+
+    Raises
+    ------------------------------------
+    TypeError: (outsourced) invalid x type
+    ArithmeticError: x is outside the domain of the function (floats) or of its derivative (everything else)
+    '''
+    cls = type(x)
+    # DualNumber and ReverseMode skip validation entirely, everything else is validated (and recorded) first
+    if cls is not DualNumber and cls is not ReverseMode:
+        if cls is not float:
+            x = _validate(x, name + '()')
+            if isinstance(x, _RECORDING):
+                return x._apply(name, param)
+        if type(x) is float:
+            value_kernel, derivative_kernel, domain = _KERNELS[name]
+            value_domain = _VALUE_DOMAINS.get(name, domain)
+            if value_domain is not None and not value_domain(x, param):
+                raise ArithmeticError(f'{name}({type(x)}) -- {x} lies outside the domain of the function')
+            return value_kernel(x, param)
+
+    value_kernel, derivative_kernel, domain = _KERNELS[name]
+    real = x.real
+    if domain is not None and not domain(real, param):
+        raise ArithmeticError(f'{name}({type(x)}) -- {real} lies outside the domain on which the derivative is defined')
+    value = value_kernel(real, param)
+    derivative = derivative_kernel(real, value, param)
+    if cls is DualNumber or isinstance(x, DualNumber):
+        return _dual(value, x.dual * derivative)
+    f = _node(value)
+    x.child.append((derivative, f))
+    return f
+
+def define_primitive(name, value, derivative, domain=None, value_domain=None):
+    '''
+    Explanation
+    ------------------------------------
+    Declare a new elementary function once and get a function that works in every mode:
+    floats, DualNumber, ReverseMode, and the Tape, Arena and lazy graph engines (including batched replay)
+
+    Inputs
+    ------------------------------------
+    name: (str) name of the new primitive, must not be registered yet
+    value: value kernel value(x, param), NumPy ufunc calls that work on floats and arrays alike
+    derivative: derivative kernel derivative(x, v, param), where v is the already computed value at x
+    domain: [optional] predicate domain(x, param), True where the derivative is defined (default: everywhere)
+    value_domain: [optional] predicate for where the value alone is defined, when wider than domain
+
+    Outputs
+    ------------------------------------
+    function of one argument
+
+    Raises
+    ------------------------------------
+    ValueError: name is already registered
+
+    Example
+    ------------------------------------
+    softplus = define_primitive('softplus', lambda x, p: np.logaddexp(0.0, x),
+                                lambda x, v, p: 1.0 / (1.0 + np.exp(-x)))
+    softplus(DualNumber(0.0)).dual
+    >>> 0.5
+    '''
+    kernels.register(name, value, derivative, domain, value_domain)
+    def primitive(x):
+        return _elementary(name, x)
+    primitive.__name__ = primitive.__qualname__ = name
+    primitive.__doc__ = f'Elementary function {name}, declared with define_primitive()'
+    return primitive
 
 # OVERLOADING FUNCTIONS
 def exp(x):
@@ -59,25 +168,14 @@ def exp(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(exp(x.real), exp(x) derivative)
     if x is a ReverseMode, return ReverseMode(exp(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording exp(x) on its tape, arena or lazy graph
     if x is a float, return exp(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'exp()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(exp(x.real), x.dual * exp(x.real))
-        else:
-            f = ReverseMode(exp(x.real))
-            x.child.append((exp(x.real), f))
-            return f
-    else:
-        # Defined (-inf, inf)
-        return np.exp(x)
+    return _elementary('exp', x)
 
 def ln(x):
     '''
@@ -93,6 +191,7 @@ def ln(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(ln(x.real), ln(x) derivative)
     if x is a ReverseMode, return ReverseMode(ln(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording ln(x) on its tape, arena or lazy graph
     if x is a float, return ln(x)
 
     Raises
@@ -100,25 +199,7 @@ def ln(x):
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     ArithmeticError: functional domain error (asymptotes / generally undefined)
     '''
-    x = _validate(x, 'ln()')
-
-    if not isinstance(x, float):
-        # Derivative cannot have x.real == 0
-        if x.real > 0:
-            if isinstance(x, DualNumber):
-                return DualNumber(ln(x.real), x.dual / x.real)
-            else:
-                f = ReverseMode(ln(x.real))
-                x.child.append(((1/x.real), f))
-                return f
-        else:
-            raise ArithmeticError(f'ln({type(x)}) -- Natural log is defined only for values greater than or equal to 1')
-    else:
-        # Defined [1, inf)
-        if x >= 1:
-            return np.log(x)
-        else:
-            raise ArithmeticError(f'ln({type(x)}) -- Natural log is defined only for values greater than or equal to 1')
+    return _elementary('ln', x)
 
 def logBase(x, base):
     '''
@@ -135,6 +216,7 @@ def logBase(x, base):
     ------------------------------------
     if x is a DualNumber, return DualNumber(logBase(x.real, base), logBase(x, base) derivative)
     if x is a ReverseMode, return ReverseMode(logBase(x.real, base))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording logBase(x, base) on its tape, arena or lazy graph
     if x is a float, return ln(x)/ln(base) = log_{base}(x)
 
     Raises
@@ -143,29 +225,10 @@ def logBase(x, base):
     TypeError: invalid base type, must be int or float
     ArithmeticError: functional domain error (undefined log values and the denominator cannot be 0)
     '''
-    x = _validate(x, 'logBase()')
-
     # Taking two arguments requires another check not included in basic validation
     if not isinstance(base, (int, float)):
         raise TypeError(f'logBase({type(x)}, {base}) -- Base must be an integer or a float.')
-
-    if not isinstance(x, float):
-        # Defined everywhere that x and base are non-negative
-        if x.real > 0 and base > 0:
-            if isinstance(x, DualNumber):
-                return DualNumber(logBase(x.real, base), x.dual / (x.real * ln(base)))
-            else:
-                f = ReverseMode(logBase(x.real, base))
-                x.child.append((1/(x.real*ln(base)), f))
-                return f
-        else:
-            raise ArithmeticError(f'logBase({type(x)}) -- Ensure base is greater than or equal to 1 and real part is greater than 0')
-    else:
-        # Defined everywhere that x and base are non-negative
-        if x > 0 and base > 0:
-            return (np.log(x) / np.log(base))
-        else:
-            raise ArithmeticError(f'logBase({type(x)}) -- Ensure base is greater than or equal to 1 and real part is greater than 0')
+    return _elementary('logBase', x, float(base))
 
 def sin(x):
     '''
@@ -181,25 +244,14 @@ def sin(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(sin(x.real), sin(x) derivative)
     if x is a ReverseMode, return ReverseMode(sin(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording sin(x) on its tape, arena or lazy graph
     if x is a float, return sin(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'sin()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(sin(x.real), x.dual * cos(x.real))
-        else:
-            f = ReverseMode(sin(x.real))
-            x.child.append((cos(x.real), f))
-            return f
-    else:
-        # Defined for (-inf, inf)
-        return np.sin(x)
+    return _elementary('sin', x)
 
 def cos(x):
     '''
@@ -215,25 +267,14 @@ def cos(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(cos(x.real), cos(x) derivative)
     if x is a ReverseMode, return ReverseMode(cos(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording cos(x) on its tape, arena or lazy graph
     if x is a float, return cos(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'cos()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(cos(x.real), -1 * sin(x.real) * x.dual)
-        else:
-            f = ReverseMode(cos(x.real))
-            x.child.append((-1 * sin(x.real), f))
-            return f
-    else:
-        # Defined for (-inf, inf)
-        return np.cos(x)
+    return _elementary('cos', x)
 
 def tan(x):
     '''
@@ -249,6 +290,7 @@ def tan(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(tan(x.real), tan(x) derivative)
     if x is a ReverseMode, return ReverseMode(tan(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording tan(x) on its tape, arena or lazy graph
     if x is a float, return tan(x)
 
     Raises
@@ -256,22 +298,7 @@ def tan(x):
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     ArithmeticError: invalid x, cos(x) cannot be 0.
     '''
-    x = _validate(x, 'tan()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, 0) U (0, inf), but tan has the same bounding which is handled below before div 0 occurs
-        if isinstance(x, DualNumber):
-            return DualNumber(tan(x.real), x.dual / cos(x.real)**2)
-        else:
-            f = ReverseMode(tan(x.real))
-            x.child.append((1/(cos(x.real)**2), f))
-            return f
-    else:
-        # Defined everywhere expect where cosine = 0
-        if abs(np.cos(x)) > zero:
-            return np.tan(x)
-        else:
-            raise ArithmeticError(f'tan({type(x)}) -- Ensure the input does not cause cosine to be 0')
+    return _elementary('tan', x)
 
 def csc(x):
     '''
@@ -288,6 +315,7 @@ def csc(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(csc(x.real), csc(x) derivative)
     if x is a ReverseMode, return ReverseMode(csc(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording csc(x) on its tape, arena or lazy graph
     if x is a float, return csc(x)
 
     Raises
@@ -295,22 +323,7 @@ def csc(x):
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     ArithmeticError: invalid x, sin(x) cannot be 0
     '''
-    x = _validate(x, 'csc()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf), other div zero issues (csc and cot) handled in their functions
-        if isinstance(x, DualNumber):
-            return DualNumber(csc(x.real), -1 * x.dual * csc(x.real) * cot(x.real))
-        else:
-            f = ReverseMode(csc(x.real))
-            x.child.append((-csc(x.real)*(1/tan(x.real)), f))
-            return f
-    else:
-        # Defined everywhere expect where sine = 0
-        if abs(np.sin(x)) > zero:
-            return (1 / np.sin(x))
-        else:
-            raise ArithmeticError(f'csc({type(x)}) -- The sine of the input cannot be 0 due to division')
+    return _elementary('csc', x)
 
 def sec(x):
     '''
@@ -327,6 +340,7 @@ def sec(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(sec(x.real), sec(x) derivative)
     if x is a ReverseMode, return ReverseMode(sec(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording sec(x) on its tape, arena or lazy graph
     if x is a float, return sec(x)
 
     Raises
@@ -334,22 +348,7 @@ def sec(x):
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     ArithmeticError: invalid x, cos(x) cannot be 0
     '''
-    x = _validate(x, 'sec()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf), other div zero issues (sec) handled below
-        if isinstance(x, DualNumber):
-            return DualNumber(sec(x.real), sec(x.real) * tan(x.real) * x.dual)
-        else:
-            f = ReverseMode(sec(x.real))
-            x.child.append((sec(x.real)*tan(x.real), f))
-            return f
-    else:
-        # Defined everywhere expect where cosine = 0
-        if abs(np.cos(x)) > zero:
-            return (1 / np.cos(x))
-        else:
-            raise ArithmeticError(f'sec({type(x)}) -- The cosine of the input cannot be 0 due to division')
+    return _elementary('sec', x)
 
 def cot(x):
     '''
@@ -366,6 +365,7 @@ def cot(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(cot(x.real), cot(x) derivative)
     if x is a ReverseMode, return ReverseMode(cot(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording cot(x) on its tape, arena or lazy graph
     if x is a float, return cot(x)
 
     Raises
@@ -373,22 +373,7 @@ def cot(x):
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     ArithmeticError: invalid x, tan(x) cannot be 0
     '''
-    x = _validate(x, 'cot()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf), other div zero issues (csc) handled in its function
-        if isinstance(x, DualNumber):
-            return DualNumber(cot(x.real), -1 * csc(x.real) * csc(x.real) * x.dual)
-        else:
-            f = ReverseMode(cot(x.real))
-            x.child.append(((-csc(x.real))**2, f))
-            return f
-    else:
-        # Defined everywhere expect where tan = 0 (or sine = 0)
-        if abs(np.tan(x)) > zero:
-            return (1 / np.tan(x))
-        else:
-            raise ArithmeticError(f'cot({type(x)}) -- The tangent of the input cannot be 0 due to division')
+    return _elementary('cot', x)
 
 def sinh(x):
     '''
@@ -404,25 +389,14 @@ def sinh(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(sinh(x.real), sinh(x) derivative)
     if x is a ReverseMode, return ReverseMode(sinh(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording sinh(x) on its tape, arena or lazy graph
     if x is a float, return sinh(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'sinh()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(sinh(x.real), cosh(x.real) * x.dual)
-        else:
-            f = ReverseMode(sinh(x.real))
-            x.child.append((cosh(x.real), f))
-            return f
-    else:
-        # Derivative defined (-inf, inf)
-        return np.sinh(x)
+    return _elementary('sinh', x)
 
 def cosh(x):
     '''
@@ -438,25 +412,14 @@ def cosh(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(cosh(x.real), cosh(x) derivative)
     if x is a ReverseMode, return ReverseMode(cosh(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording cosh(x) on its tape, arena or lazy graph
     if x is a float, return cosh(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'cosh()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(cosh(x.real), sinh(x.real) * x.dual)
-        else:
-            f = ReverseMode(cosh(x.real))
-            x.child.append((sinh(x.real), f))
-            return f
-    else:
-        # Defined (-inf, inf)
-        return np.cosh(x)
+    return _elementary('cosh', x)
 
 def tanh(x):
     '''
@@ -472,25 +435,14 @@ def tanh(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(tanh(x.real), tanh(x) derivative)
     if x is a ReverseMode, return ReverseMode(tanh(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording tanh(x) on its tape, arena or lazy graph
     if x is a float, return tanh(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'tanh()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf), Cosh is never 0
-        if isinstance(x, DualNumber):
-            return DualNumber(tanh(x.real), x.dual / cosh(x.real) ** 2)
-        else:
-            f = ReverseMode(tanh(x.real))
-            x.child.append(((1/cosh(x.real))**2 ,f))
-            return f
-    else:
-        # Defined for (-inf, inf)
-        return np.tanh(x)
+    return _elementary('tanh', x)
 
 def arcsin(x):
     '''
@@ -506,6 +458,7 @@ def arcsin(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(arcsin(x.real), arcsin(x) derivative)
     if x is a ReverseMode, return ReverseMode(arcsin(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording arcsin(x) on its tape, arena or lazy graph
     if x is a float, return arcsin(x)
 
     Raises
@@ -514,25 +467,7 @@ def arcsin(x):
     ArithmeticError: invalid real part of DualNumber, must be within (-1, 1)
     ArithmeticError: invalid x, arcsin() is only defined for the domain [-1, 1]
     '''
-    x = _validate(x, 'arcsin()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-1, 1)
-        if x.real > -1 and x.real < 1:
-            if isinstance(x, DualNumber):
-                return DualNumber(arcsin(x.real), x.dual / sqrt(1 - x.real ** 2))
-            else:
-                f = ReverseMode(arcsin(x.real))
-                x.child.append((1/sqrt(1 - (x.real)**2), f))
-                return f
-        else:
-            raise ArithmeticError(f'arcsin({type(x)}) -- Tried to square-root a negative number. Ensure real part is within (-1, 1)')
-    else:
-        # Defined for [-1, 1]
-        if x >= -1 and x <= 1:
-            return np.arcsin(x)
-        else:
-            raise ArithmeticError(f'arcsin({type(x)}) -- Arcsine is only defined in the domain [-1, 1]')
+    return _elementary('arcsin', x)
 
 def arccos(x):
     '''
@@ -548,6 +483,7 @@ def arccos(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(arccos(x.real), arccos(x) derivative)
     if x is a ReverseMode, return ReverseMode(arccos(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording arccos(x) on its tape, arena or lazy graph
     if x is a float, return arccos(x)
 
     Raises
@@ -556,25 +492,7 @@ def arccos(x):
     ArithmeticError: real part of DualNumber is only defined for the domain (-1, 1)
     ArithmeticError: invalid x, arccos() is only defined for the domain [-1, 1]
     '''
-    x = _validate(x, 'arccos()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-1, 1)
-        if x.real > -1 and x.real < 1:
-            if isinstance(x, DualNumber):
-                return DualNumber(arccos(x.real), (-1 * x.dual) / sqrt(1 - x.real ** 2))
-            else:
-                f = ReverseMode(arccos(x.real))
-                x.child.append((-1/sqrt(1-(x.real)**2), f))
-                return f  
-        else:
-            raise ArithmeticError(f'arccos({type(x)}) --  Real part must be within defined domain (-1, 1) for partial derivatives')
-    else:
-        # Defined for [-1, 1]
-        if x >= -1 and x <= 1:
-            return np.arccos(x)
-        else:
-            raise ArithmeticError(f'arccos({type(x)}) -- Function is only defined in the domain [-1, 1]')
+    return _elementary('arccos', x)
 
 def arctan(x):
     '''
@@ -590,25 +508,14 @@ def arctan(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(arctan(x.real), arctan(x) derivative)
     if x is a ReverseMode, return ReverseMode(arctan(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording arctan(x) on its tape, arena or lazy graph
     if x is a float, return arctan(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'arctan()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(arctan(x.real), x.dual / (1 + x.real ** 2))
-        else:
-            f = ReverseMode(arctan(x.real))
-            x.child.append((1/(1 + x.real**2), f))
-            return f
-    else:
-        # Defined for (-inf, inf)
-        return np.arctan(x)
+    return _elementary('arctan', x)
 
 def arcsinh(x):
     '''
@@ -624,25 +531,14 @@ def arcsinh(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(arcsinh(x.real), arcsinh(x) derivative)
     if x is a ReverseMode, return ReverseMode(arcsinh(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording arcsinh(x) on its tape, arena or lazy graph
     if x is a float, return arcsinh(x)
 
     Raises
     ------------------------------------
     TypeError: (outsourced) invalid x type, must be int, float, DualNumber, or ReverseMode
     '''
-    x = _validate(x, 'arcsinh()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, inf)
-        if isinstance(x, DualNumber):
-            return DualNumber(arcsinh(x.real), x.dual / sqrt(1 + x.real ** 2))
-        else:
-            f = ReverseMode(arcsinh(x.real))
-            x.child.append((1 / sqrt(1 + x.real ** 2), f))
-            return f
-    else:
-        # Defined for (-inf, inf)
-        return np.arcsinh(x)
+    return _elementary('arcsinh', x)
 
 def arccosh(x):
     '''
@@ -658,6 +554,7 @@ def arccosh(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(arccosh(x.real), arccosh(x) derivative)
     if x is a ReverseMode, return ReverseMode(arccosh(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording arccosh(x) on its tape, arena or lazy graph
     if x is a float, return arccosh(x)
 
     Raises
@@ -666,25 +563,7 @@ def arccosh(x):
     ArithmeticError: invalid real part for DualNumber, must be greater than 1
     ArithmeticError: invalid x, only defined for the domain [1, inf)
     '''
-    x = _validate(x, 'arccosh()')
-
-    if not isinstance(x, float):
-        # Derivative defined (1, inf)
-        if x.real > 1:
-            if isinstance(x, DualNumber):
-                return DualNumber(arccosh(x.real), x.dual / (sqrt(x.real - 1) * sqrt(x.real + 1)))
-            else:
-                f = ReverseMode(arccosh(x.real))
-                x.child.append((1 / (sqrt(x.real - 1) * sqrt(x.real + 1)), f))
-                return f
-        else:
-            raise ArithmeticError(f'arccosh({type(x)}) -- Real part must be greater than 1 for derivative involving square-roots')
-    else:
-        # Defined for [1, infinity)
-        if x >= 1:
-            return np.arccosh(x)
-        else:
-            raise ArithmeticError(f'arccosh({type(x)}) -- Function is only defined for domain [1, infinity)')
+    return _elementary('arccosh', x)
 
 def arctanh(x):
     '''
@@ -700,6 +579,7 @@ def arctanh(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(arctanh(x.real), arctanh(x) derivative)
     if x is a ReverseMode, return ReverseMode(arctanh(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording arctanh(x) on its tape, arena or lazy graph
     if x is a float, return arctanh(x)
 
     Raises
@@ -708,25 +588,7 @@ def arctanh(x):
     ArithmeticError: invalid real part for DualNumber, must not be -1 or 1
     ArithmeticError: invalid x, only defined for domain (-1, 1)
     '''
-    x = _validate(x, 'arctanh()')
-
-    if not isinstance(x, float):
-        # Derivative defined (-inf, -1) U (-1, 1) U (1, inf)
-        if x.real is not [-1, 1]:
-            if isinstance(x, DualNumber):
-                return DualNumber(arctanh(x.real), x.dual / (1 - x.real **2))
-            else:
-                f = ReverseMode(arctanh(x.real))
-                x.child.append((1 / (1 - x.real ** 2), f))
-                return f
-        else:
-            raise ArithmeticError(f'arctanh({type(x)}) --  Derivative calculation produces divide by 0 if real part is -1 or 1')
-    else:
-        # Defined for (-1, 1)
-        if x > -1 and x < 1:
-            return np.arctanh(x)
-        else:
-            raise ArithmeticError(f'arctanh({type(x)}) -- Function is only defined for domain (-1, 1)')
+    return _elementary('arctanh', x)
 
 def sqrt(x):
     '''
@@ -742,6 +604,7 @@ def sqrt(x):
     ------------------------------------
     if x is a DualNumber, return DualNumber(sqrt(x.real), sqrt(x) derivative)
     if x is a ReverseMode, return ReverseMode(sqrt(x.real))
+    if x is a TapeNode, ArenaNode or LazyNode, return a node recording sqrt(x) on its tape, arena or lazy graph
     if x is a float, return sqrt(x)
 
     Raises
@@ -750,22 +613,4 @@ def sqrt(x):
     ArithmeticError: real part of DualNumber must be greater than 0
     ArithmeticError: invalid x, cannot be negative
     '''
-    x = _validate(x, 'sqrt()')
-
-    if not isinstance(x, float):
-        # Derivative defined (0, inf)
-        if x.real > 0:
-            if isinstance(x, DualNumber):
-                return DualNumber(sqrt(x.real), (x.dual / 2) * (1 / sqrt(x.real)))
-            else:
-                f = ReverseMode(sqrt(x.real))
-                x.child.append((0.5* x.real ** (-0.5), f))
-                return f
-        else:
-            raise ArithmeticError(f'sqrt({type(x)}) -- Derivative cannot take the square root of a negative number and cannot divide by 0')
-    else:
-        # Defined for [0, infinity)
-        if x >= 0:
-            return np.sqrt(x)
-        else:
-            raise ArithmeticError(f'sqrt({type(x)}) -- Cannot take the square root of a negative number')
\ No newline at end of file
+    return _elementary('sqrt', x)
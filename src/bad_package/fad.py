@@ -1,10 +1,37 @@
 # Imports
 import numpy as np
 
+# Scalar types operators accept; NumPy scalars are converted to the matching Python number
+_SCALARS = (int, float, np.integer, np.floating)
+
+def _as_scalar(value):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper for the slow path of operator dispatch, once the exact-type checks for float, int and
+    the class itself have failed
+
+    Inputs
+    ------------------------------------
+    value: any object
+
+    Outputs
+    ------------------------------------
+    int or float if value is a Python or NumPy number, None otherwise
+    '''
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
 # Dual Class
 class DualNumber:
 
-    _supported_scalars = (int, float)
+    _supported_scalars = _SCALARS
+    __slots__ = ('real', 'dual')
 
     def __init__(self, real, dual=1.0):
         '''
@@ -52,13 +79,17 @@ class DualNumber:
         
         Notes
         ------------------------------------
-        At this stage, DualNumber only supports scalar functions
+        At this stage, DualNumber only supports scalar functions.
+        NumPy integer and floating point scalars are accepted and stored as Python ints and floats.
         '''
-        if isinstance(real, self._supported_scalars) and isinstance(dual, self._supported_scalars):
-            self.real = real
-            self.dual = dual
-        else:
+        if type(real) is not float and type(real) is not int:
+            real = _as_scalar(real)
+        if type(dual) is not float and type(dual) is not int:
+            dual = _as_scalar(dual)
+        if real is None or dual is None:
             raise TypeError('DualNumber real and dual parts may only be initialized as integers or floats')
+        self.real = real
+        self.dual = dual
 
     def __repr__(self):
         '''
@@ -84,9 +115,9 @@ class DualNumber:
         '''  
         return f'real: {self.real}, dual (derivative): {self.dual}'
 
-    def _validate(self, variable):
-        if not isinstance(variable, (*self._supported_scalars, DualNumber)):
-            raise TypeError("Type not supported: must be int or float")
+    # Operators below dispatch on exact types first (DualNumber, float, int) and only fall back to
+    # _as_scalar() for other numbers. Unsupported operands return NotImplemented, so Python tries the
+    # reflected operator of the other operand and raises TypeError when that is not supported either.
 
     def __add__(self, other):
         '''
@@ -128,12 +159,14 @@ class DualNumber:
         5
         6
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(other+self.real, self.dual)
-        else:
-            return DualNumber(self.real+other.real, self.dual+other.dual)
+        cls = type(other)
+        if cls is DualNumber:
+            return _dual(self.real+other.real, self.dual+other.dual)
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(other+self.real, self.dual)
 
     def __radd__(self, other):
         '''
@@ -217,12 +250,14 @@ class DualNumber:
         0
         2
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(self.real-other, self.dual)
-        else:
-            return DualNumber(self.real-other.real, self.dual-other.dual)
+        cls = type(other)
+        if cls is DualNumber:
+            return _dual(self.real-other.real, self.dual-other.dual)
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(self.real-other, self.dual)
  
     def __rsub__(self, other):
         '''
@@ -264,12 +299,14 @@ class DualNumber:
         0
         2
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(other-self.real, -self.dual)
-        else:
-            return DualNumber(-self.real+other.real, -self.dual+other.dual)
+        cls = type(other)
+        if cls is DualNumber:
+            return _dual(-self.real+other.real, -self.dual+other.dual)
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(other-self.real, -self.dual)
        
     def __mul__(self, other):
         '''
@@ -311,14 +348,14 @@ class DualNumber:
         6
         19
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(self.real*other, self.dual*other)
-        else:
-            if other.dual == 0:
-                return DualNumber(self.real*other.real, self.dual*other.real)
-            return DualNumber(self.real*other.real, self.real*other.dual+other.real*self.dual)
+        cls = type(other)
+        if cls is DualNumber:
+            return _dual(self.real*other.real, self.real*other.dual+other.real*self.dual)
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(self.real*other, self.dual*other)
         
     def __rmul__(self, other):
         '''
@@ -406,12 +443,14 @@ class DualNumber:
         ------------------------------------
         Only truediv is implemented here (as opposed to truediv and floordiv). Therefore, using the '/' operator will return a floating-point approximation, not the truncated down result of '//'
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(self.real/other, self.dual/other)
-        else:
-            return DualNumber(self.real/other.real, (other.real*self.dual - self.real*other.dual)/(other.real*other.real))
+        cls = type(other)
+        if cls is DualNumber:
+            return _dual(self.real/other.real, (other.real*self.dual - self.real*other.dual)/(other.real*other.real))
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(self.real/other, self.dual/other)
       
     def __rtruediv__(self, other):
         '''
@@ -457,12 +496,14 @@ class DualNumber:
         ------------------------------------
         Only rtruediv is implemented here (as opposed to rtruediv and rfloordiv). Therefore, using the '/' operator will return a floating-point approximation, not the truncated down result of '//'
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(other/self.real, (-other*self.dual)/(self.real*self.real))
-        else:
-            return DualNumber(other.real/self.real, -(other.real*self.dual - self.real*other.dual)/(other.dual*other.dual))
+        cls = type(other)
+        if cls is DualNumber:
+            return other.__truediv__(self)
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(other/self.real, (-other*self.dual)/(self.real*self.real))
   
     def __neg__(self):
         '''
@@ -493,7 +534,7 @@ class DualNumber:
         -3
         '''
         # No need for type-checks, can only be enacted on a DualNumber object
-        return DualNumber(self.real*(-1), self.dual*(-1))
+        return _dual(-self.real, -self.dual)
 
     def __pow__(self, other):
         '''
@@ -535,12 +576,15 @@ class DualNumber:
         25
         311.6516346759676
         '''
-        self._validate(other)
-
-        if isinstance(other, self._supported_scalars):
-            return DualNumber(self.real**other, self.dual*other*self.real**(other-1))
-        else:
-            return DualNumber(self.real**other.real, self.real**other.real*(self.dual*(other.real/self.real) + other.dual*np.log(self.real)))
+        cls = type(other)
+        if cls is DualNumber:
+            value = self.real**other.real
+            return _dual(value, value*(self.dual*(other.real/self.real) + other.dual*np.log(self.real)))
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        return _dual(self.real**other, self.dual*other*self.real**(other-1))
         
     def __rpow__(self, other):
         '''
@@ -582,7 +626,21 @@ class DualNumber:
         25
         311.6516346759676
         '''
-        # Other type-error cases handled in __pow__
-        self._validate(other)
+        cls = type(other)
+        if cls is DualNumber:
+            return other.__pow__(self)
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        value = other**self.real
+        return _dual(value, value*self.dual*np.log(other))
+
+_new = object.__new__
 
-        return DualNumber(other.real**self.real, (other.real**self.real)*self.dual*np.log(other.real))
\ No newline at end of file
+def _dual(real, dual):
+    # Operator results skip the type checks of __init__: both parts are already numbers
+    number = _new(DualNumber)
+    number.real = real
+    number.dual = dual
+    return number
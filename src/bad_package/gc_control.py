@@ -0,0 +1,101 @@
+"""
+Explanation
+------------------------------------
+Garbage collector management around graph construction and the backward pass
+
+Items
+------------------------------------
+gc_paused():
+    Context manager disabling the cyclic garbage collector for its body (nestable and thread-safe)
+
+set_gc_policy(policy) / get_gc_policy():
+    Global setting used by ReverseAD and interface.grad(): 'pause' (default) runs ReverseAD._compute() and every
+    gradient evaluation inside gc_paused(), 'default' leaves the collector alone
+
+managed_gc():
+    Context manager applying the current policy
+
+Notes
+------------------------------------
+The cyclic collector is triggered by the number of container objects allocated, not by the amount of garbage.
+Building a ReverseMode graph allocates a node, a child list and an edge tuple per operation, so large graphs
+trigger many collections, and every generation 2 collection traverses the whole (still live) graph.
+The graph itself is acyclic (child lists only point from inputs towards outputs), so reference counting frees it
+as soon as the last reference goes away and pausing the collector does not leak memory.
+AutoDiff is not affected: its DualNumbers do not form a graph and are freed as soon as they are used.
+The collector is a process-wide switch, so under 'pause' no cyclic garbage is collected in any thread while one
+of these computations runs; choose 'default' when other threads allocate many reference cycles meanwhile.
+"""
+import contextlib
+import gc
+import threading
+
+GC_POLICIES = ('pause', 'default')
+
+_policy = 'pause'
+_lock = threading.Lock()
+_depth = 0
+_was_enabled = False
+
+def set_gc_policy(policy):
+    '''
+    Explanation
+    ------------------------------------
+    Choose how ReverseAD and interface.grad() treat the garbage collector while they compute (AutoDiff never
+    touches it). The policy is global, and pausing disables the collector for the whole process, every thread
+    included, until the computation ends.
+
+    Inputs
+    ------------------------------------
+    policy: 'pause' (disable the cyclic collector during ReverseAD._compute() and gradient evaluations, the default)
+            or 'default' (leave it alone)
+
+    Raises
+    ------------------------------------
+    ValueError if policy is unknown
+    '''
+    global _policy
+    if policy not in GC_POLICIES:
+        raise ValueError(f'policy must be one of {GC_POLICIES}, not {policy!r}')
+    _policy = policy
+
+def get_gc_policy():
+    return _policy
+
+@contextlib.contextmanager
+def gc_paused():
+    '''
+    Explanation
+    ------------------------------------
+    Disable the cyclic garbage collector for the body of the with statement.
+    Nested and concurrent uses (from several threads) share one pause: the collector is re-enabled when the
+    outermost pause ends, and only if it was enabled when the first one started.
+
+    Example
+    ------------------------------------
+    with gc_paused():
+        z = f(trace)
+        z.gradient = 1.0
+        gradients = [x.grad() for x in trace]
+    '''
+    global _depth, _was_enabled
+    with _lock:
+        if _depth == 0:
+            _was_enabled = gc.isenabled()
+            gc.disable()
+        _depth += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _depth -= 1
+            if _depth == 0 and _was_enabled:
+                gc.enable()
+
+def managed_gc():
+    '''
+    Explanation
+    ------------------------------------
+    Context manager applying the global policy: gc_paused() under 'pause', a no-op under 'default'
+    '''
+    return gc_paused() if _policy == 'pause' else contextlib.nullcontext()
@@ -9,15 +9,68 @@ AutoDiff:
     Forward-mode implementation. 
     Internally uses DualNumber objects to track accumulated function value and derivative value. 
     Supports any combination of scalar or vector variables and functions. 
+    wrt= restricts differentiation to a subset of the variables, values_only=True skips differentiation.
+    tangents='sparse' computes all partials in a single pass with sparse tangent vectors (sparse.SparseTangent).
+    seed= a (d, p) matrix S computes the product J S in a single pass, propagating p directions at once.
 
 ReverseAD:
     Reverse mode implementation
     Internally uses ReverseMode objects to track accumulated function value and derivative value.
     Supports any combination of scalar or vector variables and functions
+    wrt= restricts differentiation to a subset of the variables, values_only=True skips differentiation.
+
+grad(f):
+    Gradient of a scalar function with respect to all of its variables, e.g. a loss over many parameters.
+    Returns a function computing a flat ndarray gradient with one backward sweep over an Arena.
 """
+import threading
 import numpy as np
-from bad_package.fad import DualNumber
-from bad_package.rad import ReverseMode
+from bad_package.fad import DualNumber, _dual
+from bad_package.rad import ReverseMode, is_grad_enabled
+from bad_package.arena import Arena
+from bad_package.gc_control import managed_gc
+from bad_package.sparse import SparseTangent, unit_tangents
+
+def _active_indices(wrt, n):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper turning the wrt argument of AutoDiff and ReverseAD into the list of differentiated variable indices
+
+    Inputs
+    ------------------------------------
+    wrt: None (all variables), an index or list of indices, or a boolean mask of length n
+    n: number of variables
+
+    Outputs
+    ------------------------------------
+    list of distinct indices in range(n), in the order of wrt (ascending for a mask)
+
+    Raises
+    ------------------------------------
+    TypeError if wrt is neither indices nor a boolean mask
+    ValueError if an index is out of range or repeated, the mask has the wrong length, or nothing is selected
+    '''
+    if wrt is None:
+        return list(range(n))
+    selection = np.asarray(wrt)
+    if selection.dtype == bool:
+        if selection.shape != (n,):
+            raise ValueError(f'A boolean wrt mask needs one entry per variable ({n}), not shape {selection.shape}')
+        active = np.flatnonzero(selection).tolist()
+    elif selection.size == 0 or np.issubdtype(selection.dtype, np.integer):
+        active = []
+        for index in np.atleast_1d(selection).astype(int).ravel().tolist():
+            if not -n <= index < n:
+                raise ValueError(f'wrt index {index} is out of range for {n} variable(s)')
+            active.append(index % n)
+        if len(set(active)) != len(active):
+            raise ValueError(f'wrt contains repeated indices: {list(wrt)}')
+    else:
+        raise TypeError('wrt must be an index, a list of indices, or a boolean mask')
+    if not active:
+        raise ValueError('wrt must select at least one variable')
+    return active
 
 class AutoDiff():
     '''
@@ -35,7 +88,16 @@ class AutoDiff():
     len_var_list:
         Number of arguments to calculate (dimensionality)
     trace:
-        List of DualNumbers to keep track of the current trace of forward mode
+        List of DualNumbers to keep track of the current trace of forward mode (plain floats for variables not in wrt)
+    wrt:
+        List of indices of the variables differentiated, one Jacobian column each
+    values_only:
+        Boolean, True if only the primal is computed (f runs once on plain floats, no tangents)
+    tangents:
+        'scalar' (one pass per variable in wrt, float tangents) or 'sparse' (one pass per function, the tangent of
+        every value a SparseTangent over the variables in wrt)
+    seed:
+        None, or float ndarray of shape (# variables in wrt, p): the Jacobian returned is J @ seed
     var_is_scalar:
         Boolean determining if a user argument is scalar (True) or in an np.array (False)
     func_is_callable:
@@ -43,8 +105,8 @@ class AutoDiff():
 
     Methods
     ------------------------------------
-    __init__(self, f, var_list)
-        Instantiate AutoDiff object
+    __init__(self, f, var_list, wrt=None, values_only=False, tangents='scalar', seed=None)
+        Instantiate AutoDiff object (values_only is forced inside rad.no_grad())
     __repr__(self)
         Easy-to-read object instantiation with memory location
     __str__(self)
@@ -64,6 +126,10 @@ class AutoDiff():
     ------------------------------------
     TypeError if f is not callable (a function), list, or ndarray
     TypeError if var_list is not a list, ndarray, int, or float
+    TypeError/ValueError if wrt is not a valid selection of variables
+    ValueError if tangents is not 'scalar' or 'sparse'
+    ValueError if seed is not a matrix with one row per variable in wrt, or combined with tangents='sparse'
+    ValueError from get_jacobian() if only values were computed
 
     Example Driver Script to utilize forward interface
     --------------------------------------------------
@@ -88,9 +154,29 @@ class AutoDiff():
     >>> [12]
     print(f'Tangent: {ad.get_jacobian()}')
     >>> [2, 3]
+
+    Subset of the variables (one pass per variable in wrt, the others are plain floats):
+    ad = AutoDiff(vector, x, wrt=[1])
+    print(f'Tangent: {ad.get_jacobian()}')
+    >>> [[3]]
+
+    Values only (a single call of vector on plain floats, e.g. inside a line search):
+    ad = AutoDiff(vector, x, values_only=True)
+    print(f'Primal: {ad.get_primal()}')
+    >>> [12.0]
+
+    Sparse tangents (all partials in one pass; pays off for many variables with each value depending on few):
+    ad = AutoDiff(vector, x, tangents='sparse')
+    print(f'Tangent: {ad.get_jacobian()}')
+    >>> [[2.0, 3.0]]
+
+    Seed matrix (Jacobian times a (# variables, p) matrix in one pass, whatever the number of variables):
+    ad = AutoDiff(vector, x, seed=np.array([[1.0, 0.5], [0.0, 2.0]]))
+    print(f'Tangent: {ad.get_jacobian()}')
+    >>> [[2.0, 7.0]]
     '''
 
-    def __init__(self, f, var_list):
+    def __init__(self, f, var_list, wrt=None, values_only=False, tangents='scalar', seed=None):
         # Flexibility: allow the user to input lists, np.arrays, or single values
         self.var_is_scalar = False
         if isinstance(var_list, (int, float)):
@@ -113,13 +199,35 @@ class AutoDiff():
         self.f = f
         self.var_list = var_list
         self.len_var_list = len(var_list)
+        self.wrt = _active_indices(wrt, self.len_var_list)
+        self.values_only = values_only or not is_grad_enabled()
+        if tangents not in ('scalar', 'sparse'):
+            raise ValueError(f"tangents must be 'scalar' or 'sparse', not {tangents!r}")
+        self.tangents = tangents
+        if seed is not None:
+            seed = np.asarray(seed, dtype=float)
+            if seed.ndim != 2 or seed.shape[0] != len(self.wrt):
+                raise ValueError(f'seed must have shape ({len(self.wrt)}, p), one row per variable in wrt, '
+                                 f'not {seed.shape}')
+            if tangents == 'sparse':
+                raise ValueError("seed cannot be combined with tangents='sparse'")
+        self.seed = seed
         self.jacobian = []
         self.primal = []
         
-        # Make a DualNumber transformed copy of var_list
+        # Make a DualNumber transformed copy of var_list; variables outside wrt stay plain floats (constants)
+        active = set() if self.values_only else set(self.wrt)
         trace = []
-        for variable in var_list:
-            trace.append(DualNumber(float(variable), 1))
+        for k, variable in enumerate(var_list):
+            trace.append(DualNumber(float(variable), 1) if k in active else float(variable))
+        if tangents == 'sparse' and not self.values_only and self.len_var_list > 1:
+            # The j-th variable of wrt is seeded with the j-th unit vector
+            for k, unit in zip(self.wrt, unit_tangents(len(self.wrt))):
+                trace[k] = _dual(trace[k].real, unit)
+        if seed is not None and not self.values_only:
+            # The j-th variable of wrt carries the j-th row of seed; variables with a zero row are constants
+            for k, row in zip(self.wrt, seed):
+                trace[k] = _dual(trace[k].real, row) if row.any() else trace[k].real
         self.trace = trace
 
         # Automatically starts computation, less steps for the user
@@ -159,6 +267,15 @@ class AutoDiff():
         ------------------------------------
         None
         '''
+        if self.values_only:
+            # Plain floats in, plain numbers out: one call per function and no tangent propagation
+            point = self.trace[0] if self.len_var_list == 1 else self.trace
+            self.primal = [f(point).real for f in self.f]
+            return
+        if self.seed is not None or (self.tangents == 'sparse' and self.len_var_list > 1):
+            self._compute_vector()
+            return
+
         # Iterate through all passed functions
         for f in self.f:
             if self.len_var_list == 1:
@@ -170,12 +287,13 @@ class AutoDiff():
                 value = f(self.trace)
                 # Primal trace (evals) and tangent trace (partials) container for this function instance
                 trace, tangent = [], []
-                for i in range(self.len_var_list):
+                for i in self.wrt:
                     # Get current variable we want the partial of, set others as "constants", compute partial
-                    for var in self.trace:
-                        var.dual = 0
+                    for k in self.wrt:
+                        self.trace[k].dual = 0
                     self.trace[i].dual = 1
-                    dp = f(self.trace).dual
+                    # A function not depending on any variable in wrt returns a plain number
+                    dp = getattr(f(self.trace), 'dual', 0.0)
 
                     # Append partial derivative to this function's tangent container and evaluation at this step to this function's primal container
                     updatedDual = DualNumber(value.real, dp)
@@ -187,6 +305,32 @@ class AutoDiff():
                 # The list of partials for this function added to matrix container
                 self.jacobian.append(tangent)
 
+    def _compute_vector(self):
+        '''
+        Explanation
+        ------------------------------------
+        Vector mode: one call per function, every tangent carrying the partials with respect to all variables in wrt
+        (SparseTangents) or the directional derivatives along all columns of seed (ndarrays)
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        n = len(self.wrt) if self.seed is None else self.seed.shape[1]
+        point = self.trace[0] if self.len_var_list == 1 else self.trace
+        for f in self.f:
+            value = f(point)
+            # A function not depending on any variable in wrt returns a plain number; sums may turn out dense
+            tangent = getattr(value, 'dual', 0.0)
+            if type(tangent) is SparseTangent:
+                row = tangent.todense()
+            elif isinstance(tangent, np.ndarray):
+                row = tangent
+            else:
+                row = np.zeros(n)
+            self.primal.append(value.real)
+            self.jacobian.append(row.tolist())
+
     def get_primal(self):
         '''
         Explanation
@@ -241,7 +385,7 @@ class AutoDiff():
 
         Outputs
         ------------------------------------
-        2-D list of shape (# functions, # variables)
+        2-D list of shape (# functions, # variables), or (# functions, p) for a (# variables, p) seed
 
         Example
         ------------------------------------
@@ -264,7 +408,13 @@ class AutoDiff():
         ad = AutoDiff(f, x)
         print(f'Tangent: {ad.get_jacobian()}')
         >>> [[2, 3], [0.54030, -0.90929]]
+
+        Raises
+        ------------------------------------
+        ValueError if the object was created with values_only=True or inside no_grad()
         '''
+        if self.values_only:
+            raise ValueError('No Jacobian: AutoDiff was created with values_only=True or inside no_grad()')
         # Flatten the matrix if we have a single function 
         if (self.func_is_callable and self.var_is_scalar):
             self.jacobian = self.jacobian[0]
@@ -318,7 +468,13 @@ class ReverseAD():
     len_var_list:
         Number of arguments to calculate (dimensionality)
     trace:
-        List of ReverseMode objects to keep track of the current trace of reverse mode
+        List of ReverseMode objects to keep track of the current trace of reverse mode (plain floats for variables not in wrt)
+    wrt:
+        List of indices of the variables differentiated, one Jacobian column each
+    values_only:
+        Boolean, True if only the primal is computed (f runs once on plain floats, no graph is built)
+    primal:
+        List of the function values, one per function
     jacobian:
         List of int/floats representing the Jacobian of a given function(s) and argument(s)
     jacobian_single:
@@ -326,14 +482,18 @@ class ReverseAD():
 
     Methods
     ------------------------------------
-    __init__(self, f, var_list)
-        Instantiate ReverseAD object
+    __init__(self, f, var_list, wrt=None, values_only=False)
+        Instantiate ReverseAD object (values_only is forced inside rad.no_grad())
     __repr__(self)
         Easy-to-read object instantiation with memory location
     __str__(self)
         Pretty print of the passed function(s) and variable(s)
     _compute(self)
         Calculate reverse mode and get jacobian
+    _compute_values(self)
+        Evaluate the functions on plain floats only
+    get_primal(self)
+        Return the function values
     get_jacobian(self)
         Return tangent trace of reverse mode
     get_var_list(self)
@@ -345,6 +505,8 @@ class ReverseAD():
     ------------------------------------
     TypeError if f is not callable (a function), list, or ndarray
     TypeError if var_list is not a list, ndarray, int, or float
+    TypeError/ValueError if wrt is not a valid selection of variables
+    ValueError from get_jacobian() if only values were computed
 
     Example Driver Script to utilize forward interface
     --------------------------------------------------
@@ -367,25 +529,40 @@ class ReverseAD():
     rm = ReverseAD(f, x)
     print(f'Jacobian: {rm.get_jacobian()}')
     >>> [2, 3]
+
+    Subset of the variables (the others are plain floats, so the graph only holds branches depending on wrt):
+    rm = ReverseAD(f, x, wrt=[1])
+    print(f'Jacobian: {rm.get_jacobian()}')
+    >>> [[3.0]]
     '''
     
-    def __init__(self, f, var_list):
+    def __init__(self, f, var_list, wrt=None, values_only=False):
         self.f = f
         self.var_list = var_list
         self.jacobian = []
         self.jacobian_single = 0.0
+        self.primal = []
 
         try:
             self.len_var_list = len(var_list)
         except TypeError:
             self.len_var_list = 1
+        self.wrt = _active_indices(wrt, self.len_var_list)
+        self.values_only = values_only or not is_grad_enabled()
 
         trace = []
         if self.len_var_list > 1:
-            for variable in var_list:
-                trace.append(ReverseMode(float(variable)))
+            # Variables outside wrt stay plain floats (constants)
+            active = set() if self.values_only else set(self.wrt)
+            for k, variable in enumerate(var_list):
+                trace.append(ReverseMode(float(variable)) if k in active else float(variable))
             self.trace = trace
-        self._compute()
+        if self.values_only:
+            self._compute_values()
+            return
+        # The cyclic garbage collector is paused while the graph is alive, see gc_control.set_gc_policy()
+        with managed_gc():
+            self._compute()
 
     def __repr__(self):
         '''
@@ -432,11 +609,7 @@ class ReverseAD():
                     
                     # OPTION 1A1A: variable term is an array with multiple terms
                     if self.len_var_list > 1:
-                        z = self.f(self.trace)
-                        z.gradient = 1.0
-                        self.jacobian.append([trace.grad() for trace in self.trace])
-                        for trace in self.trace:
-                            self._clear_reversemode(trace)
+                        self.jacobian.append(self._active_gradients(self.f))
                             
                     # OPTION 1A1B: variable term is an array with one term        
                     elif self.len_var_list == 1:
@@ -471,11 +644,7 @@ class ReverseAD():
                 # OPTION 2A1: variable term is an array with multiple terms
                 if self.len_var_list > 1:
                     for i in range(len(self.f)):
-                        z = self.f[i](self.trace)
-                        z.gradient = 1.0
-                        self.jacobian.append([trace.grad() for trace in self.trace])
-                        for trace in self.trace:
-                            self._clear_reversemode(trace)
+                        self.jacobian.append(self._active_gradients(self.f[i]))
 
                 # OPTION 2A2: variable term is an array with one term
                 elif self.len_var_list == 1:
@@ -498,6 +667,33 @@ class ReverseAD():
         else:
             raise TypeError('Your function must be either an np.array with one or more functions, or a single callable function.')
 
+    def _active_gradients(self, f):
+        '''
+        Explanation
+        ------------------------------------
+        Helper method to only be used in _compute()
+        Runs f on the trace and returns the partial derivatives with respect to the variables in wrt,
+        then clears their ReverseMode objects for the next function
+
+        Inputs
+        ------------------------------------
+        f: function to differentiate
+
+        Outputs
+        ------------------------------------
+        list of floats, one per index in self.wrt
+        '''
+        z = f(self.trace)
+        self.primal.append(z.real)
+        if not isinstance(z, ReverseMode):
+            # f does not depend on any variable in wrt
+            return [0.0] * len(self.wrt)
+        z.gradient = 1.0
+        gradients = [self.trace[i].grad() for i in self.wrt]
+        for i in self.wrt:
+            self._clear_reversemode(self.trace[i])
+        return gradients
+
     def _clear_reversemode(self, x):
         '''
         Explanation
@@ -536,6 +732,7 @@ class ReverseAD():
         '''
         if isinstance(x, ReverseMode):
             z = self.f(x)
+            self.primal.append(z.real)
             z.gradient = 1.0
             self.jacobian.append(x.grad())
         else:
@@ -555,9 +752,62 @@ class ReverseAD():
         for i in range(len(self.f)):             
             x = ReverseMode(float(self.var_list[0]))
             z = self.f[i](x)
+            self.primal.append(z.real)
             z.gradient = 1.0
             self.jacobian.append(x.grad())
 
+    def _compute_values(self):
+        '''
+        Explanation
+        ------------------------------------
+        Used instead of _compute() when values_only is set
+        Calls every function once on plain floats: no ReverseMode graph, no backward pass
+
+        Inputs
+        ------------------------------------
+        None
+
+        Raises
+        ------------------------------------
+        TypeError if f or var_list is not of a type _compute() accepts
+        '''
+        functions = self.f if isinstance(self.f, np.ndarray) else [self.f]
+        if not all(callable(f) for f in functions):
+            raise TypeError('Function must be callable')
+        if isinstance(self.var_list, np.ndarray):
+            if self.len_var_list == 0:
+                raise TypeError('Your np.array variable list must have at least one value!')
+            point = float(self.var_list[0]) if self.len_var_list == 1 else self.trace
+        elif isinstance(self.var_list, (int, float)):
+            point = float(self.var_list)
+        else:
+            raise TypeError('Your variable must be either an np.array of length >=1, or a single int or float!')
+        self.primal = [f(point).real for f in functions]
+
+    def get_primal(self):
+        '''
+        Explanation
+        ------------------------------------
+        Passed function(s) evaluated at the provided coordinates
+
+        Inputs
+        ------------------------------------
+        None
+
+        Outputs
+        ------------------------------------
+        list with one value per function, or a single value for a single function of an int/float argument
+
+        Example
+        ------------------------------------
+        rm = ReverseAD(lambda x: x[0] * x[1], np.array([2.0, 3.0]), values_only=True)
+        rm.get_primal()
+        >>> [6.0]
+        '''
+        if callable(self.f) and isinstance(self.var_list, (int, float)):
+            return self.primal[0]
+        return self.primal
+
     def get_jacobian(self):
         '''
         Explanation
@@ -573,7 +823,13 @@ class ReverseAD():
         ------------------------------------
         self.jacobian: 2D list of shape (# functions, # variables)
         self.jacobian_single: float
+
+        Raises
+        ------------------------------------
+        ValueError if the object was created with values_only=True or inside no_grad()
         '''
+        if self.values_only:
+            raise ValueError('No Jacobian: ReverseAD was created with values_only=True or inside no_grad()')
         if isinstance(self.var_list, (int, float)):
             return self.jacobian_single
         else:
@@ -609,4 +865,66 @@ class ReverseAD():
         ------------------------------------
         1-D list of originally passed functions
         '''
-        return self.f
\ No newline at end of file
+        return self.f
+
+def grad(f):
+    '''
+    Explanation
+    ------------------------------------
+    Fast path for the gradient of a single scalar function of many variables.
+    The returned function records f on an Arena (reused between calls, one per thread) and runs a single
+    backward sweep, writing the gradient straight into a flat ndarray. No per-variable grad() calls,
+    recursion or nested result lists are involved.
+
+    Inputs
+    ------------------------------------
+    f: single callable function returning a scalar.
+       Called like ReverseAD calls it: with a single value for one variable, with a list for several.
+
+    Outputs
+    ------------------------------------
+    gradient(var_list, out=None): function returning the gradient of f at var_list
+        var_list: int, float, list, or ndarray point
+        out: [optional] float ndarray of shape (# variables,) to write the gradient into
+        returns ndarray of shape (# variables,), or a float when var_list is an int or float
+
+    Raises
+    ------------------------------------
+    TypeError if f is not callable
+    TypeError (when called) if var_list is not a list, ndarray, int, or float, is empty, or f does not return a scalar
+
+    Example
+    ------------------------------------
+    def loss(w):
+        return sum((w[i] - i)**2 for i in range(len(w)))
+    grad(loss)(np.zeros(1000))
+    >>> array([    0.,    -2.,    -4., ..., -1994., -1996., -1998.])
+    '''
+    if not callable(f):
+        raise TypeError('grad() needs a single callable function returning a scalar.')
+    local = threading.local()
+
+    def gradient(var_list, out=None):
+        scalar = isinstance(var_list, (int, float))
+        if scalar:
+            point = [float(var_list)]
+        elif isinstance(var_list, (list, np.ndarray)):
+            point = np.asarray(var_list, dtype=float).ravel().tolist()
+        else:
+            raise TypeError('Second argument in must be a list or ndarray of integers or float or single integers or floats.')
+        if len(point) == 0:
+            raise TypeError('Your variable list must have at least one value!')
+
+        arena = getattr(local, 'arena', None)
+        if arena is None:
+            arena = local.arena = Arena()
+        arena.reset()
+        with managed_gc():
+            inputs = [arena.variable(value) for value in point]
+            output = f(inputs[0] if len(inputs) == 1 else inputs)
+            if isinstance(output, (list, tuple, np.ndarray)):
+                raise TypeError('grad() needs a function returning a scalar; use ReverseAD for several outputs.')
+            result = arena.gradient(output, inputs, out)
+        return float(result[0]) if scalar else result
+
+    return gradient
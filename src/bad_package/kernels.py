@@ -0,0 +1,328 @@
+"""
+Explanation
+------------------------------------
+Batched array kernels for the elementary functions: value, derivative and a per-point domain mask in one call
+
+Items
+------------------------------------
+KERNELS:
+    Registry of primitives: name -> (value kernel, derivative-from-value kernel, domain predicate).
+    The scalar elementary functions (floats, DualNumber, ReverseMode), Tape replay, Arena and lazy graphs
+    all evaluate the elementary functions through this table.
+    Every kernel is a short sequence of NumPy ufunc calls, so the work happens in NumPy's C loops,
+    which release the GIL; kernels hold no state and are safe to call from many threads at once.
+
+PAIRS:
+    sin/cos and sinh/cosh pairs whose derivatives are each other's values, shared by Tape replay
+
+VALUE_DOMAINS:
+    Domains of the value alone, for functions whose derivative is defined on a smaller set (sqrt, arcsin, ...)
+
+register(name, value_kernel, derivative_kernel, domain=None, value_domain=None):
+    Adds a primitive to the registry; every mode and engine picks it up from there
+
+DOMAIN_POLICIES:
+    Accepted values of the domain_policy argument: 'raise', 'nan' and 'clip'
+
+value(name, x, param=None, domain_policy='nan'):
+    Value of the elementary function over an array, with the domain mask
+
+value_and_derivative(name, x, param=None, domain_policy='nan'):
+    Value and derivative of the elementary function over an array, with the domain mask
+
+Notes
+------------------------------------
+Domain checks are vectorized: instead of raising on the first bad point, every kernel returns a boolean mask that is
+False where the derivative is undefined (the same domains the DualNumber/ReverseMode branches of the elementary
+functions enforce). What happens at those points depends on domain_policy:
+    'raise': raise ArithmeticError, like the scalar elementary functions
+    'nan':   set the value and derivative to NaN
+    'clip':  move the point to the nearest representable point inside the domain and evaluate there
+             (functions with poles, such as tan or csc, cannot be clipped and fall back to NaN)
+"""
+import numpy as np
+
+# A machine precision 0 that Numpy produces (same bound the elementary functions use)
+zero = np.sin(np.pi)
+
+# Domain predicates use the builtin abs(), which works on arrays and is much cheaper than np.abs() on the
+# Python floats the scalar elementary functions pass in
+
+def _within_one(x, p):
+    return abs(x) < 1
+
+# name: (value(x, p), derivative(x, v, p), domain(x, p) or None when defined everywhere)
+# p is the extra parameter of the function (the base of logBase) and None otherwise
+KERNELS = {
+    'neg': (lambda x, p: np.negative(x),
+            lambda x, v, p: np.full_like(x, -1.0),
+            None),
+    'exp': (lambda x, p: np.exp(x),
+            lambda x, v, p: v,
+            None),
+    'ln': (lambda x, p: np.log(x),
+           lambda x, v, p: 1.0 / x,
+           lambda x, p: x > 0),
+    'logBase': (lambda x, p: np.log(x) / np.log(p),
+                lambda x, v, p: 1.0 / (x * np.log(p)),
+                lambda x, p: (x > 0) & (p > 0)),
+    'sin': (lambda x, p: np.sin(x),
+            lambda x, v, p: np.cos(x),
+            None),
+    'cos': (lambda x, p: np.cos(x),
+            lambda x, v, p: -np.sin(x),
+            None),
+    'tan': (lambda x, p: np.tan(x),
+            lambda x, v, p: 1.0 + v * v,
+            lambda x, p: abs(np.cos(x)) > zero),
+    'csc': (lambda x, p: 1.0 / np.sin(x),
+            lambda x, v, p: -v / np.tan(x),
+            lambda x, p: abs(np.sin(x)) > zero),
+    'sec': (lambda x, p: 1.0 / np.cos(x),
+            lambda x, v, p: v * np.tan(x),
+            lambda x, p: abs(np.cos(x)) > zero),
+    'cot': (lambda x, p: 1.0 / np.tan(x),
+            lambda x, v, p: -(1.0 + v * v),
+            lambda x, p: abs(np.tan(x)) > zero),
+    'sinh': (lambda x, p: np.sinh(x),
+             lambda x, v, p: np.cosh(x),
+             None),
+    'cosh': (lambda x, p: np.cosh(x),
+             lambda x, v, p: np.sinh(x),
+             None),
+    'tanh': (lambda x, p: np.tanh(x),
+             lambda x, v, p: 1.0 - v * v,
+             None),
+    'arcsin': (lambda x, p: np.arcsin(x),
+               lambda x, v, p: 1.0 / np.sqrt(1.0 - x * x),
+               _within_one),
+    'arccos': (lambda x, p: np.arccos(x),
+               lambda x, v, p: -1.0 / np.sqrt(1.0 - x * x),
+               _within_one),
+    'arctan': (lambda x, p: np.arctan(x),
+               lambda x, v, p: 1.0 / (1.0 + x * x),
+               None),
+    'arcsinh': (lambda x, p: np.arcsinh(x),
+                lambda x, v, p: 1.0 / np.sqrt(1.0 + x * x),
+                None),
+    'arccosh': (lambda x, p: np.arccosh(x),
+                lambda x, v, p: 1.0 / (np.sqrt(x - 1.0) * np.sqrt(x + 1.0)),
+                lambda x, p: x > 1),
+    'arctanh': (lambda x, p: np.arctanh(x),
+                lambda x, v, p: 1.0 / (1.0 - x * x),
+                _within_one),
+    'sqrt': (lambda x, p: np.sqrt(x),
+             lambda x, v, p: 0.5 / v,
+             lambda x, p: x > 0),
+}
+
+# Where the value alone is defined, for functions whose derivative has a smaller domain (floats are
+# evaluated on this domain, everything that carries a derivative on the KERNELS domain)
+VALUE_DOMAINS = {
+    'arcsin': lambda x, p: abs(x) <= 1,
+    'arccos': lambda x, p: abs(x) <= 1,
+    'arccosh': lambda x, p: x >= 1,
+    'sqrt': lambda x, p: x >= 0,
+}
+
+# Paired functions, sincos style: the derivative of each is (sign *) the value of its partner at the same point,
+# so when a program uses both (or differentiates one) they are evaluated once. name: (partner, sign)
+PAIRS = {
+    'sin': ('cos', 1.0),
+    'cos': ('sin', -1.0),
+    'sinh': ('cosh', 1.0),
+    'cosh': ('sinh', 1.0),
+}
+
+# Open intervals (lo, hi) that points are clipped into under domain_policy='clip'
+_CLIP_INTERVALS = {
+    'ln': (0.0, np.inf),
+    'logBase': (0.0, np.inf),
+    'sqrt': (0.0, np.inf),
+    'arcsin': (-1.0, 1.0),
+    'arccos': (-1.0, 1.0),
+    'arctanh': (-1.0, 1.0),
+    'arccosh': (1.0, np.inf),
+}
+
+DOMAIN_POLICIES = ('raise', 'nan', 'clip')
+
+def register(name, value_kernel, derivative_kernel, domain=None, value_domain=None):
+    '''
+    Explanation
+    ------------------------------------
+    Add a primitive to KERNELS (see elementary_functions.define_primitive() for the user-facing function)
+
+    Inputs
+    ------------------------------------
+    name: (str) name of the primitive
+    value_kernel: value(x, p)
+    derivative_kernel: derivative(x, v, p), v being the value at x
+    domain: [optional] predicate domain(x, p) of the derivative, None when defined everywhere
+    value_domain: [optional] predicate for the value alone, when wider than domain
+
+    Raises
+    ------------------------------------
+    ValueError if name is already registered
+    TypeError if a kernel is not callable
+    '''
+    if name in KERNELS:
+        raise ValueError(f'A primitive named {name!r} is already registered')
+    if not all(callable(k) for k in (value_kernel, derivative_kernel)) or \
+            not all(k is None or callable(k) for k in (domain, value_domain)):
+        raise TypeError('Kernels and domain predicates must be callable')
+    KERNELS[name] = (value_kernel, derivative_kernel, domain)
+    if value_domain is not None:
+        VALUE_DOMAINS[name] = value_domain
+
+def _lookup(name):
+    try:
+        return KERNELS[name]
+    except KeyError:
+        raise ValueError(f'No batched kernel for elementary function {name!r}') from None
+
+def _mask(name, x, param):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper evaluating the domain predicate of name over x
+
+    Outputs
+    ------------------------------------
+    boolean ndarray shaped like x, True where the derivative is defined
+    '''
+    domain = _lookup(name)[2]
+    if domain is None:
+        return np.ones(np.shape(x), dtype=bool)
+    return np.asarray(domain(x, param))
+
+def _check_policy(domain_policy):
+    if domain_policy not in DOMAIN_POLICIES:
+        raise ValueError(f'domain_policy must be one of {DOMAIN_POLICIES}, not {domain_policy!r}')
+
+def _clip_bounds(name, dtype):
+    # Closest points strictly inside the open interval, so the kernel values and derivatives stay finite there.
+    # A bound of 0 moves to the smallest normal number rather than the smallest subnormal, whose reciprocal overflows
+    lo, hi = (dtype.type(bound) for bound in _CLIP_INTERVALS[name])
+    lo = np.finfo(dtype).tiny if lo == 0 else np.nextafter(lo, hi)
+    return lo, np.nextafter(hi, lo)
+
+def _apply_policy(name, x, valid, domain_policy):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper handling the points outside the domain before the kernels run
+
+    Inputs
+    ------------------------------------
+    name: (str) name of the elementary function
+    x: ndarray of points
+    valid: boolean ndarray domain mask of x
+    domain_policy: 'raise', 'nan' or 'clip'
+
+    Outputs
+    ------------------------------------
+    (x, invalid_after)
+        x: the points to evaluate at (clipped copies under 'clip')
+        invalid_after: boolean ndarray of points that still have to be set to NaN, or None when there are none
+
+    Raises
+    ------------------------------------
+    ArithmeticError if domain_policy is 'raise' and any point is outside the domain
+    '''
+    if valid.all():
+        return x, None
+    if domain_policy == 'raise':
+        bad = np.size(valid) - np.count_nonzero(valid)
+        raise ArithmeticError(f'{name}() -- {bad} point(s) lie outside the domain on which the derivative is defined')
+    if domain_policy == 'clip' and name in _CLIP_INTERVALS:
+        x = np.clip(x, *_clip_bounds(name, np.result_type(x, np.float32)))
+        return x, None
+    return x, ~valid
+
+def _invalidate(array, invalid):
+    # NaN out the points that could not be evaluated; nothing to do (and no copy) when there are none
+    if invalid is None:
+        return array
+    array = np.array(np.broadcast_to(array, np.shape(invalid)), dtype=np.result_type(array, np.float32))
+    np.putmask(array, invalid, np.nan)
+    return array
+
+def value(name, x, param=None, domain_policy='nan'):
+    '''
+    Explanation
+    ------------------------------------
+    Evaluate an elementary function over an array of points
+
+    Inputs
+    ------------------------------------
+    name: (str) name of the elementary function, e.g. 'sin' or 'logBase'
+    x: float or ndarray of points
+    param: [optional] extra parameter of the function (the base of logBase)
+    domain_policy: [optional] 'raise', 'nan' (default) or 'clip', see the module notes
+
+    Outputs
+    ------------------------------------
+    (value, valid)
+        value: ndarray shaped like x
+        valid: boolean ndarray shaped like x, False where x is outside the domain (before any clipping)
+
+    Raises
+    ------------------------------------
+    ValueError if there is no kernel for name or domain_policy is unknown
+    ArithmeticError if domain_policy is 'raise' and any point is outside the domain
+
+    Example
+    ------------------------------------
+    value('sqrt', np.array([4.0, -1.0]))
+    >>> (array([ 2., nan]), array([ True, False]))
+    '''
+    _check_policy(domain_policy)
+    value_kernel = _lookup(name)[0]
+    x = np.asarray(x)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        valid = _mask(name, x, param)
+        x, invalid = _apply_policy(name, x, valid, domain_policy)
+        result = value_kernel(x, param)
+    return _invalidate(result, invalid), valid
+
+def value_and_derivative(name, x, param=None, domain_policy='nan'):
+    '''
+    Explanation
+    ------------------------------------
+    Evaluate an elementary function and its derivative over an array of points.
+    The derivative is computed from the value wherever that is cheaper (exp, tan, tanh, sqrt, ...).
+
+    Inputs
+    ------------------------------------
+    name: (str) name of the elementary function, e.g. 'sin' or 'logBase'
+    x: float or ndarray of points
+    param: [optional] extra parameter of the function (the base of logBase)
+    domain_policy: [optional] 'raise', 'nan' (default) or 'clip', see the module notes
+
+    Outputs
+    ------------------------------------
+    (value, derivative, valid)
+        value: ndarray shaped like x
+        derivative: ndarray shaped like x
+        valid: boolean ndarray shaped like x, False where x is outside the domain (before any clipping)
+
+    Raises
+    ------------------------------------
+    ValueError if there is no kernel for name or domain_policy is unknown
+    ArithmeticError if domain_policy is 'raise' and any point is outside the domain
+
+    Example
+    ------------------------------------
+    value_and_derivative('ln', np.array([1.0, 0.0]))
+    >>> (array([ 0., nan]), array([ 1., nan]), array([ True, False]))
+    '''
+    _check_policy(domain_policy)
+    value_kernel, derivative_kernel, domain = _lookup(name)
+    x = np.asarray(x)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        valid = _mask(name, x, param)
+        x, invalid = _apply_policy(name, x, valid, domain_policy)
+        result = value_kernel(x, param)
+        derivative = derivative_kernel(x, result, param)
+    return _invalidate(result, invalid), _invalidate(derivative, invalid), valid
@@ -0,0 +1,373 @@
+"""
+Explanation
+------------------------------------
+Lazy mode: overloaded operators and elementary functions build an expression DAG without computing anything.
+Values, derivative order and mode are only chosen when the graph is evaluated.
+
+Items
+------------------------------------
+LazyNode:
+    Node of the expression DAG (operation, argument nodes, parameter). Every overloaded operator and elementary
+    function applied to it returns a new LazyNode.
+
+variables(n):
+    Returns the n input nodes of a new graph
+
+compile_graph(outputs):
+    Compiles the part of the DAG the requested outputs depend on into a Tape (optimized by default)
+
+evaluate(outputs, var_list, order=0, mode='auto'):
+    Compiles (once per set of outputs) and replays the graph at one or a batch of points: values for order=0,
+    values and the Jacobian for order=1, in forward or reverse mode
+
+Notes
+------------------------------------
+Compilation walks the DAG from the requested outputs only, so branches nobody asks for are never evaluated,
+and shared subexpressions are evaluated once. The compiled Tape is replayed with NumPy over whole batches of points.
+Since nothing is computed while the graph is built, domain errors (ln of a negative number, ...) surface in
+evaluate(), according to its domain_policy.
+"""
+import numpy as np
+from bad_package.fad import _as_scalar
+from bad_package.optimize import optimize as optimize_tape
+from bad_package.tape import Tape
+
+class LazyNode():
+    '''
+    Explanation
+    ------------------------------------
+    Node of a lazily built expression DAG
+
+    Attributes
+    ------------------------------------
+    op:
+        Opcode of the node, as on a Tape ('input', 'const', 'add', ..., 'sin', ...)
+    args:
+        Tuple of argument LazyNodes
+    param:
+        Variable index of 'input' nodes, value of 'const' nodes, extra parameter of elementary functions (the base of logBase)
+    n_inputs:
+        Number of variables of the graph the node belongs to (0 for constant expressions)
+
+    Methods
+    ------------------------------------
+    __init__(self, op, args=(), param=None, n_inputs=0)
+        Instantiate LazyNode object (done by variables() and the operators, not the user)
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __str__(self)
+        Pretty print of the node operation
+    evaluate(self, var_list, order=0, mode='auto', dtype=np.float64, domain_policy='raise', optimize=True)
+        Evaluate this node alone, see evaluate()
+
+    Mathematical dunder methods: Add, subtract, multiply, divide, power, negation
+
+    Reverse mathematical dunder methods: Add, subtract, multiply, divide, and power
+    '''
+
+    __slots__ = ('op', 'args', 'param', 'n_inputs', '_tapes')
+
+    def __init__(self, op, args=(), param=None, n_inputs=0):
+        self.op = op
+        self.args = args
+        self.param = param
+        self.n_inputs = n_inputs
+        # Compiled tapes of evaluations rooted at this node, keyed by the requested outputs
+        self._tapes = None
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of LazyNode instantiation with operation and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'LazyNode({self.op}, n_inputs: {self.n_inputs}, id: {id(self)})'
+
+    def __str__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Pretty print of LazyNode instantiation
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        param_str = '' if self.param is None else f' [{self.param}]'
+        return f'{self.op}({len(self.args)} argument(s)){param_str}'
+
+    def _binary(self, op, a, b):
+        '''
+        Explanation
+        ------------------------------------
+        Private helper building the node of a binary operator
+
+        Inputs
+        ------------------------------------
+        op: (str) opcode
+        a, b: LazyNode or scalar operands (one of them is self)
+
+        Outputs
+        ------------------------------------
+        LazyNode, or NotImplemented if the other operand is not supported
+
+        Raises
+        ------------------------------------
+        ValueError if the operands belong to graphs with different numbers of variables
+        '''
+        a, b = _operand(a), _operand(b)
+        if a is None or b is None:
+            return NotImplemented
+        if a.n_inputs and b.n_inputs and a.n_inputs != b.n_inputs:
+            raise ValueError('Cannot combine LazyNodes from different variables() calls')
+        return LazyNode(op, (a, b), None, a.n_inputs or b.n_inputs)
+
+    def __add__(self, other):
+        return self._binary('add', self, other)
+
+    def __radd__(self, other):
+        return self._binary('add', other, self)
+
+    def __sub__(self, other):
+        return self._binary('sub', self, other)
+
+    def __rsub__(self, other):
+        return self._binary('sub', other, self)
+
+    def __mul__(self, other):
+        return self._binary('mul', self, other)
+
+    def __rmul__(self, other):
+        return self._binary('mul', other, self)
+
+    def __truediv__(self, other):
+        return self._binary('div', self, other)
+
+    def __rtruediv__(self, other):
+        return self._binary('div', other, self)
+
+    def __pow__(self, other):
+        return self._binary('pow', self, other)
+
+    def __rpow__(self, other):
+        return self._binary('pow', other, self)
+
+    def __neg__(self):
+        return LazyNode('neg', (self,), None, self.n_inputs)
+
+    def _apply(self, op, param=None):
+        '''
+        Explanation
+        ------------------------------------
+        Hook used by the elementary functions to add themselves to the graph
+
+        Inputs
+        ------------------------------------
+        op: (str) name of the elementary function
+        param: [optional] extra scalar parameter of the function (the base of logBase)
+
+        Outputs
+        ------------------------------------
+        LazyNode of the result
+        '''
+        return LazyNode(op, (self,), param, self.n_inputs)
+
+    def evaluate(self, var_list, order=0, mode='auto', dtype=np.float64, domain_policy='raise', optimize=True):
+        '''
+        Explanation
+        ------------------------------------
+        Evaluate this node on its own, see evaluate()
+
+        Outputs
+        ------------------------------------
+        As evaluate(), without the output axis:
+            order=0: value (scalar for a single point, ndarray of shape (N,) for a batch)
+            order=1: (value, gradient), the gradient of shape (# variables,) or (N, # variables)
+        plus valid as last element when domain_policy is 'nan' or 'clip'
+
+        Example
+        ------------------------------------
+        x, y = variables(2)
+        z = sin(x) * y
+        z.evaluate([0.0, 2.0], order=1)
+        >>> (0.0, array([2., 0.]))
+        '''
+        result = evaluate([self], var_list, order, mode, dtype, domain_policy, optimize)
+        if order == 0 and domain_policy == 'raise':
+            return np.take(result, 0, axis=-1)
+        result = list(result)
+        result[0] = np.take(result[0], 0, axis=-1)
+        if order == 1:
+            result[1] = result[1][..., 0, :]
+        return tuple(result)
+
+def _operand(value):
+    # Wraps scalars into constant nodes; None for unsupported operands
+    if type(value) is LazyNode:
+        return value
+    if type(value) is not float and type(value) is not int:
+        value = _as_scalar(value)
+        if value is None:
+            return None
+    return LazyNode('const', (), float(value))
+
+def variables(n):
+    '''
+    Explanation
+    ------------------------------------
+    Create the input nodes of a new lazy graph
+
+    Inputs
+    ------------------------------------
+    n: (int) number of variables
+
+    Outputs
+    ------------------------------------
+    list of n LazyNodes; the k-th one stands for coordinate k of the points passed to evaluate()
+
+    Raises
+    ------------------------------------
+    ValueError if n is not a positive integer
+    '''
+    if not isinstance(n, (int, np.integer)) or n < 1:
+        raise ValueError(f'n must be a positive integer, not {n!r}')
+    return [LazyNode('input', (), k, int(n)) for k in range(n)]
+
+def compile_graph(outputs, n_inputs=None, optimize=True):
+    '''
+    Explanation
+    ------------------------------------
+    Compile the part of a lazy graph the outputs depend on into a Tape.
+    The DAG is walked iteratively, so deep graphs are not limited by the recursion limit; every node is emitted
+    once however many nodes share it, after all of its arguments.
+
+    Inputs
+    ------------------------------------
+    outputs: LazyNode or list of LazyNodes (scalars are allowed and become constant outputs)
+    n_inputs: [optional] number of variables (default: the n_inputs of the outputs, 1 for constant expressions)
+    optimize: [optional] run bad_package.optimize.optimize() on the result (default True)
+
+    Outputs
+    ------------------------------------
+    Tape with one output per requested node
+
+    Raises
+    ------------------------------------
+    TypeError if an output is not a LazyNode or scalar
+    ValueError if the outputs belong to graphs with different numbers of variables
+
+    Example
+    ------------------------------------
+    x, y = variables(2)
+    print(compile_graph(sin(x) * y))
+    >>> %0 = input() [0.0]
+        %1 = input() [1.0]
+        %2 = sin(%0)
+        %3 = mul(%2, %1)
+        return %3
+    '''
+    outputs = _outputs(outputs)
+    if n_inputs is None:
+        n_inputs = _n_inputs(outputs) or 1
+    tape = Tape(n_inputs, n_inputs == 1)
+    index = {}
+    for output in outputs:
+        stack = [output]
+        while stack:
+            node = stack[-1]
+            if id(node) in index:
+                stack.pop()
+                continue
+            pending = [a for a in node.args if id(a) not in index]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if node.op == 'input':
+                if node.param >= n_inputs:
+                    raise ValueError(f'Graph uses variable {node.param} but only {n_inputs} are evaluated')
+                index[id(node)] = node.param
+            elif node.op == 'const':
+                index[id(node)] = tape.constant(node.param)
+            else:
+                index[id(node)] = tape._append(node.op, tuple(index[id(a)] for a in node.args), node.param)
+        tape.outputs.append(index[id(output)])
+    return optimize_tape(tape) if optimize else tape
+
+def _outputs(outputs):
+    outputs = list(outputs) if isinstance(outputs, (list, tuple, np.ndarray)) else [outputs]
+    nodes = [_operand(o) for o in outputs]
+    if any(node is None for node in nodes):
+        raise TypeError('Outputs must be LazyNodes, integers, or floats')
+    return nodes
+
+def _n_inputs(outputs):
+    counts = {o.n_inputs for o in outputs if o.n_inputs}
+    if len(counts) > 1:
+        raise ValueError('Cannot evaluate LazyNodes from different variables() calls together')
+    return counts.pop() if counts else 0
+
+def evaluate(outputs, var_list, order=0, mode='auto', dtype=np.float64, domain_policy='raise', optimize=True):
+    '''
+    Explanation
+    ------------------------------------
+    Evaluate the requested nodes of a lazy graph at one or a batch of points.
+    The graph is compiled into a Tape on the first call for a set of outputs; later calls with the same outputs
+    only replay it.
+
+    Inputs
+    ------------------------------------
+    outputs: LazyNode or list of LazyNodes
+    var_list: a single point (int, float, or 1-D array with one coordinate per variable) or a batch of points
+              (array of shape (N, # variables))
+    order: [optional] 0 for values only (default), 1 for values and the Jacobian
+    mode: [optional] 'forward', 'reverse' or 'auto', used when order=1 (see Tape.jacobian())
+    dtype: [optional] floating point type of the points and all intermediate values (default float64)
+    domain_policy: [optional] 'raise' (default), 'nan' or 'clip', see Tape.evaluate()
+    optimize: [optional] fold constants and merge common subexpressions before evaluating (default True)
+
+    Outputs
+    ------------------------------------
+    order=0: values, as Tape.evaluate()
+    order=1: (values, jacobian), as Tape.jacobian()
+    plus valid as last element when domain_policy is 'nan' or 'clip'
+
+    Raises
+    ------------------------------------
+    ValueError if order is not 0 or 1, mode or domain_policy is unknown, or the points have the wrong shape
+    ArithmeticError if domain_policy is 'raise' and a point leaves the domain of an elementary function in the graph
+
+    Example
+    ------------------------------------
+    x, y = variables(2)
+    u = x * y
+    evaluate([u + 1, exp(u)], [[1.0, 2.0], [0.0, 3.0]], order=1, mode='reverse')
+    '''
+    if order not in (0, 1):
+        raise ValueError(f'order must be 0 (values) or 1 (values and Jacobian), not {order!r}')
+    outputs = _outputs(outputs)
+    n_inputs = _n_inputs(outputs) or (np.shape(var_list)[-1] if np.ndim(var_list) else 1)
+
+    # Constant outputs are wrapped into a new node on every call, so they are identified by value
+    nodes = [o for o in outputs if o.op != 'const']
+    if not nodes:
+        # Nothing outlives the call to hold a cached tape
+        tape = compile_graph(outputs, n_inputs, optimize)
+    else:
+        root = nodes[0]
+        if root._tapes is None:
+            root._tapes = {}
+        # The entry keeps the other output nodes alive, so their ids cannot be reused while it exists
+        # (the root is left out, which would make the entry a reference cycle)
+        key = (tuple(('const', o.param) if o.op == 'const' else id(o) for o in outputs), n_inputs, optimize)
+        if key not in root._tapes:
+            root._tapes[key] = (nodes[1:], compile_graph(outputs, n_inputs, optimize))
+        tape = root._tapes[key][1]
+
+    if order == 0:
+        return tape.evaluate(var_list, dtype=dtype, domain_policy=domain_policy)
+    return tape.jacobian(var_list, mode=mode, dtype=dtype, domain_policy=domain_policy)
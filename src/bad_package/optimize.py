@@ -0,0 +1,181 @@
+"""
+Explanation
+------------------------------------
+Optimization passes over recorded Tapes. Every pass returns a new, equivalent Tape and leaves its argument untouched.
+
+Items
+------------------------------------
+fold_constants(tape):
+    Evaluates nodes whose arguments are all constants and removes exact identities (x + 0, x * 1, x / 1, x ** 1)
+
+eliminate_common_subexpressions(tape):
+    Merges nodes with the same operation, arguments and parameter (e.g. repeated x[0]**2 terms)
+
+eliminate_dead_code(tape):
+    Drops nodes that no output depends on
+
+optimize(tape):
+    Runs all of the above in order
+"""
+import numpy as np
+from bad_package import kernels
+from bad_package.tape import Tape, _BINARY
+
+# Operations whose result does not depend on the order of their arguments
+_COMMUTATIVE = ('add', 'mul')
+
+# Right-hand constants that leave the left argument unchanged: x + 0, x - 0, x * 1, x / 1, x ** 1
+_RIGHT_IDENTITY = {'add': 0.0, 'sub': 0.0, 'mul': 1.0, 'div': 1.0, 'pow': 1.0}
+# Left-hand constants that leave the right argument unchanged: 0 + x, 1 * x
+_LEFT_IDENTITY = {'add': 0.0, 'mul': 1.0}
+
+def _copy_inputs(tape):
+    return Tape(tape.n_inputs, tape.scalar_input), list(range(tape.n_inputs))
+
+def _fold(op, args, param, constants):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper computing the value of an operation whose arguments are all constants
+
+    Inputs
+    ------------------------------------
+    op: (str) opcode
+    args: tuple of argument node indices (all keys of constants)
+    param: node parameter
+    constants: dict of node index -> constant value
+
+    Outputs
+    ------------------------------------
+    float, or None when the operation must stay on the tape (outside its domain, so replay keeps raising)
+    '''
+    values = [np.float64(constants[a]) for a in args]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if op in _BINARY:
+            return float(_BINARY[op][1](*values))
+        value, valid = kernels.value(op, values[0], param)
+        return float(value) if valid else None
+
+def fold_constants(tape):
+    '''
+    Explanation
+    ------------------------------------
+    Replace constant-only subgraphs by a single constant and drop exact algebraic identities
+
+    Inputs
+    ------------------------------------
+    tape: Tape object
+
+    Outputs
+    ------------------------------------
+    New Tape object. Constants that became unused are left for eliminate_dead_code() to remove.
+    '''
+    result, remap = _copy_inputs(tape)
+    constants = {}
+    for op, args, param in tape.nodes[tape.n_inputs:]:
+        args = tuple(remap[a] for a in args)
+        folded = None
+        if op != 'const' and all(a in constants for a in args):
+            folded = _fold(op, args, param, constants)
+
+        if op == 'const':
+            index = result.constant(param)
+            constants[index] = param
+        elif folded is not None:
+            index = result.constant(folded)
+            constants[index] = folded
+        elif op in _RIGHT_IDENTITY and constants.get(args[1]) == _RIGHT_IDENTITY[op]:
+            index = args[0]
+        elif op in _LEFT_IDENTITY and constants.get(args[0]) == _LEFT_IDENTITY[op]:
+            index = args[1]
+        else:
+            index = result._append(op, args, param)
+        remap.append(index)
+    result.outputs = [remap[o] for o in tape.outputs]
+    return result
+
+def eliminate_common_subexpressions(tape):
+    '''
+    Explanation
+    ------------------------------------
+    Merge every node into the first earlier node with the same operation, (remapped) arguments and parameter.
+    Arguments of commutative operations are compared as unordered pairs, so x*y and y*x are merged too.
+
+    Inputs
+    ------------------------------------
+    tape: Tape object
+
+    Outputs
+    ------------------------------------
+    New Tape object
+    '''
+    result, remap = _copy_inputs(tape)
+    seen = {}
+    for op, args, param in tape.nodes[tape.n_inputs:]:
+        args = tuple(remap[a] for a in args)
+        # repr() keeps 0.0 and -0.0 apart and round-trips every float exactly
+        key = (op, tuple(sorted(args)) if op in _COMMUTATIVE else args, repr(param))
+        if key not in seen:
+            seen[key] = result._append(op, args, param)
+        remap.append(seen[key])
+    result.outputs = [remap[o] for o in tape.outputs]
+    return result
+
+def eliminate_dead_code(tape):
+    '''
+    Explanation
+    ------------------------------------
+    Remove nodes that none of the outputs depend on. Input nodes are always kept.
+
+    Inputs
+    ------------------------------------
+    tape: Tape object
+
+    Outputs
+    ------------------------------------
+    New Tape object
+    '''
+    live = [False] * len(tape.nodes)
+    for o in tape.outputs:
+        live[o] = True
+    for i in range(len(tape.nodes) - 1, tape.n_inputs - 1, -1):
+        if live[i]:
+            for a in tape.nodes[i][1]:
+                live[a] = True
+
+    result, remap = _copy_inputs(tape)
+    remap += [None] * (len(tape.nodes) - tape.n_inputs)
+    for i in range(tape.n_inputs, len(tape.nodes)):
+        if live[i]:
+            op, args, param = tape.nodes[i]
+            remap[i] = result._append(op, tuple(remap[a] for a in args), param)
+    result.outputs = [remap[o] for o in tape.outputs]
+    return result
+
+def optimize(tape):
+    '''
+    Explanation
+    ------------------------------------
+    Run constant folding, common subexpression elimination and dead code elimination.
+    Folding runs again after merging, since merged constants can expose new constant-only nodes.
+
+    Inputs
+    ------------------------------------
+    tape: Tape object
+
+    Outputs
+    ------------------------------------
+    New, equivalent Tape object with at most as many nodes
+
+    Example
+    ------------------------------------
+    def f(x):
+        return x[0]**2 * x[1] + x[0]**2 * 3
+    tape = trace(f, [1.0, 2.0])
+    len(tape), len(optimize(tape))
+    >>> (10, 8)
+    '''
+    tape = fold_constants(tape)
+    tape = eliminate_common_subexpressions(tape)
+    tape = fold_constants(tape)
+    return eliminate_dead_code(tape)
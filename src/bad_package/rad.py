@@ -1,10 +1,15 @@
 # Imports
+import contextlib
+import math
+import threading
 import numpy as np
+from bad_package.fad import _SCALARS, _as_scalar
 
 # Reverse Class
 class ReverseMode():
     
-    _supported_scalars = (int, float)
+    _supported_scalars = _SCALARS
+    __slots__ = ('real', 'child', 'gradient')
 
     def __init__(self, real):
         '''
@@ -51,13 +56,15 @@ class ReverseMode():
         Notes
         ------------------------------------
         At this stage, ReverseMode only supports scalar functions.
+        NumPy integer and floating point scalars are accepted and stored as Python ints and floats.
         '''
-        if isinstance(real, self._supported_scalars):
-            self.real = real
-            self.child = []
-            self.gradient = None
-        else:
-            raise TypeError('ReverseMode may only be initialized as integers or floats')
+        if type(real) is not float and type(real) is not int:
+            real = _as_scalar(real)
+            if real is None:
+                raise TypeError('ReverseMode may only be initialized as integers or floats')
+        self.real = real
+        self.child = _SINK if _disabled and getattr(_state, 'depth', 0) else []
+        self.gradient = None
 
     def __repr__(self):
         '''
@@ -109,11 +116,32 @@ class ReverseMode():
         Notes
         ------------------------------------
         Do we have to assign gradient to 1 before calling this in order for it to work? 
-        Uses sum() for situations when self has more than one child
+        Sums over every child for situations when self has more than one child.
+        Marking and accumulation happen in one pass: a child whose adjoint is 0 (a branch that never reaches a node
+        with an assigned gradient, e.g. a dead intermediate result or an unrelated earlier output) is visited once
+        and then skipped, without any multiplication. Finished children are read directly, without a call.
+        Nodes with at least _FAN_IN children (a parameter shared by many terms of a large sum) add up their
+        terms with a correctly rounded sum, see _fan_in_sum().
         '''
-        if self.gradient is None:
-            self.gradient = sum(dvj_dvi * df_dvj.grad() for dvj_dvi, df_dvj in self.child)
-        return self.gradient
+        gradient = self.gradient
+        if gradient is None:
+            child = self.child
+            if len(child) >= _FAN_IN:
+                gradient = _fan_in_sum(child)
+            else:
+                gradient = 0
+                for dvj_dvi, df_dvj in child:
+                    adjoint = df_dvj.gradient
+                    if adjoint is None:
+                        adjoint = df_dvj.grad()
+                    if adjoint:
+                        gradient += dvj_dvi * adjoint
+            self.gradient = gradient
+        return gradient
+
+    # Operators below dispatch on exact types first (ReverseMode, float, int) and only fall back to
+    # _as_scalar() for other numbers. Unsupported operands return NotImplemented, so Python tries the
+    # reflected operator of the other operand and raises TypeError when that is not supported either.
 
     def __add__(self, other):
         '''
@@ -145,15 +173,18 @@ class ReverseMode():
         >>> print(x.real)
         5
         '''
-        if not isinstance(other, (*self._supported_scalars, ReverseMode)):
-            raise TypeError("Type not supported: must be int or float")
-        if isinstance(other, self._supported_scalars):
-            f = ReverseMode(self.real + other)
-            self.child.append((1.0, f))
-        else:
-            f = ReverseMode(self.real + other.real)
+        cls = type(other)
+        if cls is ReverseMode:
+            f = _node(self.real + other.real)
             other.child.append((1.0, f))
             self.child.append((1.0, f))
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(self.real + other)
+        self.child.append((1.0, f))
         return f
 
     def __radd__(self, other):
@@ -218,15 +249,18 @@ class ReverseMode():
         >>> print(x.real)
         0
         '''
-        if not isinstance(other, (*self._supported_scalars, ReverseMode)):
-            raise TypeError("Type not supported: must be int or float")
-        if isinstance(other, self._supported_scalars):
-            f = ReverseMode(self.real - other)
-            self.child.append((1.0, f))
-        else:
-            f = ReverseMode(self.real - other.real)
+        cls = type(other)
+        if cls is ReverseMode:
+            f = _node(self.real - other.real)
             other.child.append((-1.0, f))
             self.child.append((1.0, f))
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(self.real - other)
+        self.child.append((1.0, f))
         return f
 
     def __rsub__(self, other):
@@ -259,16 +293,18 @@ class ReverseMode():
         >>> print(x.real)
         0
         '''
-        if not isinstance(other, (*self._supported_scalars, ReverseMode)):
-            raise TypeError("Type not supported: must be int or float")
-            
-        if isinstance(other, self._supported_scalars):
-            f = ReverseMode(other - self.real)
-            self.child.append((-1.0, f))
-        else:
-            f = ReverseMode(-self.real + other.real)
+        cls = type(other)
+        if cls is ReverseMode:
+            f = _node(-self.real + other.real)
             other.child.append((1.0, f))
             self.child.append((-1.0, f))
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(other - self.real)
+        self.child.append((-1.0, f))
         return f
     
     def __mul__(self, other):
@@ -301,22 +337,18 @@ class ReverseMode():
         >>> print(x.real); print(x.dual)
         6
         '''
-        if not isinstance(other, (*self._supported_scalars, ReverseMode)):
-            raise TypeError('Type not supported: must be int or float')
-        if isinstance(other, self._supported_scalars):
-            f = ReverseMode(self.real * other)
-            self.child.append((other, f))
-        else:
-            f = ReverseMode(self.real * other.real)
-            f.gradient = 1.0
-            # x = self.grad()
-            # y = other.grad()
-            self.gradient = 1
-            other.gradient = 1
+        cls = type(other)
+        if cls is ReverseMode:
+            f = _node(self.real * other.real)
             self.child.append((other.real, f))
-            self.gradient = None
             other.child.append((self.real, f))
-            other.gradient = None
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(self.real * other)
+        self.child.append((other, f))
         return f
 
     def __rmul__(self, other):
@@ -385,15 +417,18 @@ class ReverseMode():
         ------------------------------------
         Only truediv is implemented here (as opposed to truediv and floordiv). Therefore, using the '/' operator will return a floating-point approximation, not the truncated down result of '//'
         '''
-        if not isinstance(other, (*self._supported_scalars, ReverseMode)):
-            raise TypeError('Type not supported: must be int or float')
-        if isinstance(other, self._supported_scalars):
-            f = ReverseMode(self.real / other)
-            self.child.append((1.0 / other, f))
-        else:
-            f = ReverseMode(self.real / other.real)
+        cls = type(other)
+        if cls is ReverseMode:
+            f = _node(self.real / other.real)
             other.child.append((-self.real / (other.real)**2, f))
             self.child.append((1.0 / other.real, f))
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(self.real / other)
+        self.child.append((1.0 / other, f))
         return f
 
     def __rtruediv__(self, other):
@@ -430,8 +465,15 @@ class ReverseMode():
         ------------------------------------
         Only rtruediv is implemented here (as opposed to rtruediv and rfloordiv). Therefore, using the '/' operator will return a floating-point approximation, not the truncated down result of '//'
         '''
-        # Other type-checks handled in __truediv__
-        f = ReverseMode(other / self.real)
+        cls = type(other)
+        if cls is ReverseMode:
+            f = other.__truediv__(self)
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(other / self.real)
         self.child.append((other * (-self.real ** (-2)), f))
         return f
 
@@ -459,8 +501,8 @@ class ReverseMode():
         -5
         '''
         # No type check needed, can only ever be enacted on a ReverseMode object
-        f = ReverseMode(-self.real)
-        self.child.append((-1, f))
+        f = _node(-self.real)
+        self.child.append((-1.0, f))
         return f
 
     def __pow__(self, other):
@@ -493,15 +535,19 @@ class ReverseMode():
         >>> print(x.real)
         25
         '''
-        if not isinstance(other, (*self._supported_scalars, ReverseMode)):
-            raise TypeError('Type not supported: must be int or float')
-        if isinstance(other, self._supported_scalars):
-            f = ReverseMode(self.real ** other)
-            self.child.append((other * (self.real ** (other - 1.0)), f))
-        else:
-            f = ReverseMode(self.real ** other.real)
-            other.child.append((self.real ** other.real * np.log(self.real), f))
+        cls = type(other)
+        if cls is ReverseMode:
+            value = self.real ** other.real
+            f = _node(value)
+            other.child.append((value * np.log(self.real), f))
             self.child.append((other.real * self.real ** (other.real - 1.0), f))
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        f = _node(self.real ** other)
+        self.child.append((other * (self.real ** (other - 1.0)), f))
         return f
 
     def __rpow__(self, other):
@@ -534,7 +580,97 @@ class ReverseMode():
         >>> print(x.real)
         25
         '''
-        # Other type-error cases handled in __pow__
-        f = ReverseMode(other ** self.real)
-        self.child.append(((other ** self.real) * np.log(other) , f))
-        return f
\ No newline at end of file
+        cls = type(other)
+        if cls is ReverseMode:
+            f = other.__pow__(self)
+            return f
+        if cls is not float and cls is not int:
+            other = _as_scalar(other)
+            if other is None:
+                return NotImplemented
+        value = other ** self.real
+        f = _node(value)
+        self.child.append((value * np.log(other), f))
+        return f
+
+_new = object.__new__
+
+class _Sink(list):
+    # Shared child list of the nodes created under no_grad(): edges appended to it are dropped
+    __slots__ = ()
+
+    def append(self, edge):
+        pass
+
+_SINK = _Sink()
+# Per-thread no_grad() depth, plus the number of threads inside no_grad() so the recording path only
+# looks at the thread-local state while some thread is actually inside a no_grad() block
+_state = threading.local()
+_disabled = 0
+_lock = threading.Lock()
+
+def _node(real):
+    # Operator results skip the type checks of __init__: real is already a number
+    node = _new(ReverseMode)
+    node.real = real
+    node.child = _SINK if _disabled and getattr(_state, 'depth', 0) else []
+    node.gradient = None
+    return node
+
+# Child count from which grad() sums the terms of a node with math.fsum() instead of left to right
+_FAN_IN = 1024
+
+def _fan_in_sum(child):
+    # Adjoint of a high fan-in node: the error of a left to right sum grows with the number of terms,
+    # fsum() is correctly rounded. Collecting the terms costs about as much as adding them up directly.
+    terms = [dvj_dvi * adjoint for dvj_dvi, df_dvj in child
+             if (adjoint := df_dvj.gradient if df_dvj.gradient is not None else df_dvj.grad())]
+    try:
+        return math.fsum(terms)
+    except (OverflowError, ValueError):
+        # fsum() raises on overflowing partial sums and on inf - inf, where plain addition gives inf or nan
+        return sum(terms)
+
+def is_grad_enabled():
+    '''
+    Explanation
+    ------------------------------------
+    False inside a no_grad() block of the current thread, True otherwise
+    '''
+    return not getattr(_state, 'depth', 0)
+
+@contextlib.contextmanager
+def no_grad():
+    '''
+    Explanation
+    ------------------------------------
+    Evaluate values only for the body of the with statement (nestable, and local to the current thread).
+    ReverseMode objects created inside do not record the operations applied to them, and AutoDiff and ReverseAD
+    run the user function on plain floats and only compute get_primal() (as with values_only=True).
+
+    Notes
+    ------------------------------------
+    Nodes created before the block still record their direct uses inside it; those edges lead to nodes whose
+    gradient is 0, so gradients computed afterwards are unaffected.
+
+    Example
+    ------------------------------------
+    with no_grad():
+        AutoDiff(f, x).get_primal()
+        z = ReverseMode(2.0) * 3
+    z.child
+    >>> []
+    '''
+    global _disabled
+    depth = getattr(_state, 'depth', 0)
+    if depth == 0:
+        with _lock:
+            _disabled += 1
+    _state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.depth = depth
+        if depth == 0:
+            with _lock:
+                _disabled -= 1
@@ -0,0 +1,343 @@
+"""
+Explanation
+------------------------------------
+N-ary reductions over lists of values: one graph node with n arguments instead of a chain of n binary operations
+
+Items
+------------------------------------
+sum(xs), prod(xs), mean(xs):
+    Sum, product and mean of the entries of xs
+
+dot(xs, ys):
+    Inner product of two equally long lists
+
+logsumexp(xs):
+    log(sum(exp(x) for x in xs)), computed as max(xs) + log(sum(exp(x - max(xs)))) so large entries do not overflow
+
+softmax(xs):
+    List of exp(x_k) / sum(exp(x) for x in xs), computed as exp(x_k - logsumexp(xs))
+
+Notes
+------------------------------------
+xs may mix plain numbers with either DualNumbers or ReverseModes. The value and all n local partial derivatives are
+computed with NumPy in O(n), then a ReverseMode result gets one edge from every argument and a DualNumber result
+the sum of the partials times the tangents. A reverse mode graph built from sum(xs) is therefore one level deep
+instead of n levels, which keeps grad() far away from the recursion limit for large sums.
+Sums are correctly rounded (math.fsum). TapeNodes, ArenaNodes and LazyNodes record binary operations only; for them
+the reductions build a balanced tree of those, log2(n) levels deep.
+sum shadows the builtin of the same name when imported with *; it also accepts lists of plain numbers.
+"""
+import math
+import operator
+import numpy as np
+from bad_package import elementary_functions as ef
+from bad_package.elementary_functions import _RECORDING
+from bad_package.fad import DualNumber, _as_scalar, _dual
+from bad_package.rad import ReverseMode, _node
+from bad_package.sparse import sum_tangents
+
+__all__ = ['sum', 'prod', 'mean', 'dot', 'logsumexp', 'softmax']
+
+def _operands(xs, fun):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper validating the entries of a reduction and finding the mode of the result
+
+    Inputs
+    ------------------------------------
+    xs: list, tuple, or ndarray of values
+    fun: (str) the reduction calling this one, for error messages
+
+    Outputs
+    ------------------------------------
+    (items, mode): items is a list with plain numbers converted to floats; mode is float, DualNumber, ReverseMode,
+    or 'recording' (TapeNodes, ArenaNodes or LazyNodes)
+
+    Raises
+    ------------------------------------
+    TypeError if xs is not a list, tuple or ndarray, an entry is not a number, DualNumber, ReverseMode or recording
+    node, or DualNumbers and ReverseModes are mixed
+    '''
+    if isinstance(xs, np.ndarray) and xs.dtype.kind in 'biuf':
+        return xs.astype(float).ravel().tolist(), float
+    if not isinstance(xs, (list, tuple, np.ndarray)):
+        raise TypeError(f'{fun} -- expects a list, tuple, or ndarray of values, not {type(xs).__name__}')
+    items = list(xs)
+    mode = float
+    for i, x in enumerate(items):
+        cls = type(x)
+        if cls is float:
+            continue
+        if cls is DualNumber or cls is ReverseMode or isinstance(x, (DualNumber, ReverseMode)):
+            kind = DualNumber if isinstance(x, DualNumber) else ReverseMode
+        elif isinstance(x, _RECORDING):
+            kind = 'recording'
+        else:
+            scalar = _as_scalar(x)
+            if scalar is None:
+                raise TypeError(f'{fun} -- reductions take ints, floats, DualNumbers, ReverseModes, TapeNodes, '
+                                f'ArenaNodes, or LazyNodes, not {cls.__name__}')
+            items[i] = float(scalar)
+            continue
+        if mode is not float and mode is not kind:
+            raise TypeError(f'{fun} -- cannot mix DualNumbers, ReverseModes and recording nodes')
+        mode = kind
+    return items, mode
+
+def _reals(items):
+    # Values of the entries, as a float ndarray
+    return np.array([x if type(x) is float else x.real for x in items], dtype=float)
+
+def _result(items, mode, value, partials):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper turning the value and the local partial derivatives of a reduction into its result
+
+    Inputs
+    ------------------------------------
+    items: entries returned by _operands()
+    mode: float, DualNumber, or ReverseMode
+    value: (float) value of the reduction
+    partials: ndarray with the partial derivative with respect to every entry
+
+    Outputs
+    ------------------------------------
+    float, DualNumber(value, sum of partial * tangent), or ReverseMode(value) with one edge from every
+    non-constant entry
+    '''
+    value = float(value)
+    if mode is float:
+        return value
+    partials = partials.tolist()
+    if mode is DualNumber:
+        # Scalar tangents are summed with math.fsum, vector tangents (sparse.SparseTangent, ndarray) in place
+        return _dual(value, sum_tangents([p * x.dual for p, x in zip(partials, items) if type(x) is not float]))
+    f = _node(value)
+    for p, x in zip(partials, items):
+        if type(x) is not float:
+            x.child.append((p, f))
+    return f
+
+def _tree(items, op):
+    # Balanced tree of binary operations, for node types that only record binary operations
+    while len(items) > 1:
+        paired = [op(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+        if len(items) % 2:
+            paired.append(items[-1])
+        items = paired
+    return items[0]
+
+def sum(xs):
+    '''
+    Explanation
+    ------------------------------------
+    Sum of the entries of xs as a single node (correctly rounded)
+
+    Inputs
+    ------------------------------------
+    xs: list, tuple, or ndarray of ints, floats, DualNumbers, ReverseModes, TapeNodes, ArenaNodes, or LazyNodes
+
+    Outputs
+    ------------------------------------
+    float, DualNumber, ReverseMode, or recording node (0.0 for an empty xs)
+
+    Raises
+    ------------------------------------
+    TypeError: invalid xs, see _operands()
+
+    Example
+    ------------------------------------
+    x = [ReverseMode(float(i)) for i in range(10000)]
+    z = sum([xi * xi for xi in x])
+    z.gradient = 1.0
+    x[3].grad()
+    >>> 6.0
+    '''
+    items, mode = _operands(xs, 'sum()')
+    if mode == 'recording':
+        return _tree(items, operator.add)
+    if mode is float:
+        return math.fsum(items)
+    return _result(items, mode, math.fsum(_reals(items).tolist()), np.ones(len(items)))
+
+def prod(xs):
+    '''
+    Explanation
+    ------------------------------------
+    Product of the entries of xs as a single node.
+    The partial derivative with respect to x_i is the product of all other entries (prefix times suffix products),
+    so zero entries need no special treatment.
+
+    Inputs
+    ------------------------------------
+    xs: list, tuple, or ndarray of ints, floats, DualNumbers, ReverseModes, TapeNodes, ArenaNodes, or LazyNodes
+
+    Outputs
+    ------------------------------------
+    float, DualNumber, ReverseMode, or recording node (1.0 for an empty xs)
+
+    Raises
+    ------------------------------------
+    TypeError: invalid xs, see _operands()
+    '''
+    items, mode = _operands(xs, 'prod()')
+    if mode == 'recording':
+        return _tree(items, operator.mul)
+    if not items:
+        return 1.0
+    reals = _reals(items)
+    if mode is float:
+        return math.prod(reals.tolist())
+    prefix = np.concatenate(([1.0], np.cumprod(reals[:-1])))
+    suffix = np.concatenate((np.cumprod(reals[:0:-1])[::-1], [1.0]))
+    return _result(items, mode, math.prod(reals.tolist()), prefix * suffix)
+
+def mean(xs):
+    '''
+    Explanation
+    ------------------------------------
+    Arithmetic mean of the entries of xs as a single node
+
+    Inputs
+    ------------------------------------
+    xs: non-empty list, tuple, or ndarray of ints, floats, DualNumbers, ReverseModes, TapeNodes, ArenaNodes, or LazyNodes
+
+    Outputs
+    ------------------------------------
+    float, DualNumber, ReverseMode, or recording node
+
+    Raises
+    ------------------------------------
+    TypeError: invalid xs, see _operands()
+    ValueError: xs is empty
+    '''
+    items, mode = _operands(xs, 'mean()')
+    if not items:
+        raise ValueError('mean() -- needs at least one value')
+    n = len(items)
+    if mode == 'recording':
+        return _tree(items, operator.add) / n
+    return _result(items, mode, math.fsum(_reals(items).tolist()) / n, np.full(n, 1.0 / n))
+
+def dot(xs, ys):
+    '''
+    Explanation
+    ------------------------------------
+    Inner product sum(x * y for x, y in zip(xs, ys)) as a single node
+
+    Inputs
+    ------------------------------------
+    xs, ys: equally long lists, tuples, or ndarrays of ints, floats, DualNumbers, ReverseModes, TapeNodes,
+            ArenaNodes, or LazyNodes
+
+    Outputs
+    ------------------------------------
+    float, DualNumber, ReverseMode, or recording node (0.0 for empty lists)
+
+    Raises
+    ------------------------------------
+    TypeError: invalid xs or ys, see _operands()
+    ValueError: xs and ys have different lengths
+
+    Example
+    ------------------------------------
+    w = [DualNumber(1.0, 1), DualNumber(2.0, 0)]
+    dot(w, [3.0, 4.0]).dual
+    >>> 3.0
+    '''
+    x_items, x_mode = _operands(xs, 'dot()')
+    y_items, y_mode = _operands(ys, 'dot()')
+    if len(x_items) != len(y_items):
+        raise ValueError(f'dot() -- lengths differ: {len(x_items)} and {len(y_items)}')
+    # Classify both lists together so mixing modes between them raises as well
+    items, mode = _operands(x_items + y_items, 'dot()') if x_mode is not y_mode else (x_items + y_items, x_mode)
+    if mode == 'recording':
+        return _tree([x * y for x, y in zip(x_items, y_items)], operator.add) if x_items else 0.0
+    x_reals, y_reals = _reals(x_items), _reals(y_items)
+    value = math.fsum((x_reals * y_reals).tolist())
+    if mode is float:
+        return value
+    return _result(items, mode, value, np.concatenate((y_reals, x_reals)))
+
+def _shift(items):
+    # Constant subtracted before exponentiating: the largest value, or 0.0 when no value is known yet (LazyNodes)
+    values = [x if type(x) is float else getattr(x, 'real', None) for x in items]
+    if any(v is None for v in values):
+        return 0.0
+    shift = float(np.max(values))
+    return shift if math.isfinite(shift) else 0.0
+
+def logsumexp(xs):
+    '''
+    Explanation
+    ------------------------------------
+    log(sum(exp(x) for x in xs)) as a single node, shifted by the largest entry so that nothing overflows.
+    Its partial derivatives are softmax(xs).
+
+    Inputs
+    ------------------------------------
+    xs: non-empty list, tuple, or ndarray of ints, floats, DualNumbers, ReverseModes, TapeNodes, ArenaNodes, or LazyNodes
+
+    Outputs
+    ------------------------------------
+    float, DualNumber, ReverseMode, or recording node (-inf with zero partials when every entry is -inf)
+
+    Raises
+    ------------------------------------
+    TypeError: invalid xs, see _operands()
+    ValueError: xs is empty
+
+    Example
+    ------------------------------------
+    logsumexp([1000.0, 1000.0])
+    >>> 1000.6931471805599
+    '''
+    items, mode = _operands(xs, 'logsumexp()')
+    if not items:
+        raise ValueError('logsumexp() -- needs at least one value')
+    shift = _shift(items)
+    if mode == 'recording':
+        # The shift is a constant of the recording; it is exact for any value and keeps the traced point stable
+        return shift + ef.ln(_tree([ef.exp(x - shift) for x in items], operator.add))
+    scaled = np.exp(_reals(items) - shift)
+    total = math.fsum(scaled.tolist())
+    if total == 0.0:
+        # Every entry is -inf: the sum of the exponentials is exactly 0 and no entry changes it
+        return _result(items, mode, -math.inf, np.zeros(len(items)))
+    return _result(items, mode, shift + math.log(total), scaled / total)
+
+def softmax(xs):
+    '''
+    Explanation
+    ------------------------------------
+    Softmax of xs, computed as exp(x_k - logsumexp(xs)): stable for large entries, and in reverse mode 4n edges in
+    total (n into the logsumexp node, then a subtraction and an exp per output) instead of n**2
+
+    Inputs
+    ------------------------------------
+    xs: non-empty list, tuple, or ndarray of ints, floats, DualNumbers, ReverseModes, TapeNodes, ArenaNodes, or LazyNodes
+
+    Outputs
+    ------------------------------------
+    list with one float, DualNumber, ReverseMode, or recording node per entry
+
+    Raises
+    ------------------------------------
+    TypeError: invalid xs, see _operands()
+    ValueError: xs is empty
+
+    Example
+    ------------------------------------
+    softmax([1.0, 2.0, 3.0])
+    >>> [0.09003057317038046, 0.24472847105479764, 0.6652409557748218]
+    '''
+    items, mode = _operands(xs, 'softmax()')
+    if not items:
+        raise ValueError('softmax() -- needs at least one value')
+    if mode is float:
+        scaled = np.exp(np.array(items) - max(items))
+        return (scaled / math.fsum(scaled.tolist())).tolist()
+    total = logsumexp(items)
+    return [ef.exp(x - total) for x in items]
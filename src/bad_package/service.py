@@ -0,0 +1,306 @@
+"""
+Explanation
+------------------------------------
+asyncio facade for answering many small derivative queries from an event loop (e.g. a web service)
+
+Items
+------------------------------------
+DifferentiationService:
+    Awaitable evaluate()/jacobian() queries. Each function is traced once; concurrent queries for the same
+    function are coalesced into one batched Tape replay (micro-batching), which runs on a thread or process
+    pool so the event loop is never blocked by the CPU-bound work.
+
+Notes
+------------------------------------
+A batch is sent to the pool when it holds max_batch points or max_latency seconds after its first query
+arrived, whichever comes first. max_latency therefore bounds the extra latency a query can see from waiting
+for others; 0 still coalesces the queries that arrive in the same iteration of the event loop.
+Tapes are kept per function object, in a least recently used store of max_tapes entries. Reuse the same
+function objects across queries: a fresh lambda or closure per request is traced again every time and
+never shares a batch with other queries.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import numpy as np
+from bad_package.tape import trace
+
+# Domain policy of both tracing and replay: a point outside the domain fails its own query, not the tape or the batch
+_DOMAIN_POLICY = 'nan'
+
+def _replay(tape, points, jacobian, mode, dtype):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper run on the pool: replay a tape over one coalesced batch.
+    Module level (not a method), so process pools can pickle it together with the Tape.
+
+    Inputs
+    ------------------------------------
+    tape: Tape object
+    points: (N, d) ndarray
+    jacobian: (bool) also compute the Jacobian
+    mode, dtype: see Tape.jacobian()
+
+    Outputs
+    ------------------------------------
+    (values, jacobian or None, valid), all with one row per point
+    '''
+    # domain_policy='nan' keeps one bad point from failing every query of the batch; its query fails on its own
+    if jacobian:
+        return tape.jacobian(points, mode=mode, dtype=dtype, domain_policy=_DOMAIN_POLICY)
+    values, valid = tape.evaluate(points, dtype=dtype, domain_policy=_DOMAIN_POLICY)
+    return values, None, valid
+
+class DifferentiationService():
+    '''
+    Explanation
+    ------------------------------------
+    Asynchronous, micro-batching front end to traced derivative programs
+
+    Attributes
+    ------------------------------------
+    executor:
+        concurrent.futures.Executor the batches run on
+    max_batch:
+        Integer, largest number of points replayed together
+    max_latency:
+        Float, seconds a query may wait for others before its batch is sent anyway
+    mode, dtype:
+        Replay options handed to Tape.jacobian()
+    cache:
+        Optional TapeCache used to trace functions (None traces in memory)
+    max_tapes:
+        Integer, number of traced Tapes kept
+    tapes:
+        OrderedDict of (function(s), input shape) -> Tape, least recently used first
+
+    Methods
+    ------------------------------------
+    __init__(self, executor='thread', max_workers=None, max_batch=1024, max_latency=0.002, mode='auto', dtype=np.float64, cache=None, max_tapes=128)
+        Instantiate DifferentiationService object
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    evaluate(self, f, var_list)
+        Coroutine returning the values of f at var_list
+    jacobian(self, f, var_list)
+        Coroutine returning (values, jacobian) of f at var_list
+    close(self)
+        Coroutine sending the pending batches, waiting for them and shutting down an owned pool
+
+    Example
+    ------------------------------------
+    async def handler(request):
+        values, jacobian = await service.jacobian(f, request.point)
+        return jacobian.tolist()
+
+    async with DifferentiationService('process', max_latency=0.005) as service:
+        await asyncio.gather(*(handler(r) for r in requests))
+    '''
+
+    def __init__(self, executor='thread', max_workers=None, max_batch=1024, max_latency=0.002,
+                 mode='auto', dtype=np.float64, cache=None, max_tapes=128):
+        '''
+        Explanation
+        ------------------------------------
+        Constructor for the DifferentiationService class, creating the pool unless one is given
+
+        Inputs
+        ------------------------------------
+        executor: [optional] 'thread' (default), 'process', or a concurrent.futures.Executor owned by the caller
+        max_workers: [optional] size of the pool created for 'thread' or 'process'
+        max_batch: [optional] (int) largest number of points replayed together (default 1024)
+        max_latency: [optional] (float) seconds to wait for more queries before sending a batch (default 0.002)
+        mode: [optional] 'forward', 'reverse' or 'auto', see Tape.jacobian()
+        dtype: [optional] floating point type of the replay, see Tape.jacobian()
+        cache: [optional] TapeCache to trace through, so restarted services skip retracing
+        max_tapes: [optional] (int) number of traced Tapes kept in memory, the least recently used one is dropped
+                   first (default 128)
+
+        Raises
+        ------------------------------------
+        ValueError if executor is an unknown string, max_batch or max_tapes is not a positive integer,
+                   or max_latency is negative
+        '''
+        if executor == 'thread':
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+            self._owns_executor = True
+        elif executor == 'process':
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+            self._owns_executor = True
+        elif isinstance(executor, concurrent.futures.Executor):
+            self._owns_executor = False
+        else:
+            raise ValueError(f"executor must be 'thread', 'process' or a concurrent.futures.Executor, not {executor!r}")
+        if not isinstance(max_batch, int) or max_batch < 1:
+            raise ValueError(f'max_batch must be a positive integer, not {max_batch!r}')
+        if max_latency < 0:
+            raise ValueError(f'max_latency must be non-negative, not {max_latency!r}')
+        if not isinstance(max_tapes, int) or max_tapes < 1:
+            raise ValueError(f'max_tapes must be a positive integer, not {max_tapes!r}')
+
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.mode = mode
+        self.dtype = dtype
+        self.cache = cache
+        self.max_tapes = max_tapes
+        self.tapes = collections.OrderedDict()
+        # (key, wants jacobian) -> list of (point, future) waiting to be sent, and the timer that will send them
+        self._pending = {}
+        self._timers = {}
+        self._running = set()
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of DifferentiationService instantiation with batching knobs and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return (f'DifferentiationService(max_batch={self.max_batch}, max_latency={self.max_latency}, '
+                f'id: {id(self)})')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _tape(self, f, var_list):
+        '''
+        Explanation
+        ------------------------------------
+        Private helper returning the Tape of f for points shaped like var_list, tracing it on first use.
+        Tracing runs once per function in the event loop thread; it is short compared to serving the queries.
+        It uses the replay's domain policy, so a first query outside the domain still yields the tape (and fails
+        on its own when replayed).
+
+        Outputs
+        ------------------------------------
+        (key, tape)
+        '''
+        functions = tuple(f) if isinstance(f, (list, np.ndarray)) else f
+        key = (functions, 'scalar' if isinstance(var_list, (int, float)) else np.shape(var_list))
+        tape = self.tapes.get(key)
+        if tape is None:
+            if self.cache is None:
+                tape = trace(f, var_list, _DOMAIN_POLICY)
+            else:
+                tape = self.cache.trace(f, var_list, _DOMAIN_POLICY)
+            self.tapes[key] = tape
+            # Batches already pending keep their own reference to an evicted tape
+            while len(self.tapes) > self.max_tapes:
+                self.tapes.popitem(last=False)
+        else:
+            self.tapes.move_to_end(key)
+        return key, tape
+
+    def _submit(self, f, var_list, jacobian):
+        key, tape = self._tape(f, var_list)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch_key = (key, jacobian)
+        batch = self._pending.setdefault(batch_key, [])
+        batch.append((np.asarray(var_list, dtype=float).ravel(), future))
+        if len(batch) >= self.max_batch:
+            self._flush(batch_key, tape)
+        elif batch_key not in self._timers:
+            self._timers[batch_key] = loop.call_later(self.max_latency, self._flush, batch_key, tape)
+        return future
+
+    def _flush(self, batch_key, tape):
+        # Move the pending queries of batch_key into one replay on the pool
+        timer = self._timers.pop(batch_key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(batch_key, [])
+        batch = [(point, future) for point, future in batch if not future.cancelled()]
+        if batch:
+            task = asyncio.ensure_future(self._run(tape, batch, batch_key[1]))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, tape, batch, jacobian):
+        points = np.stack([point for point, future in batch])
+        loop = asyncio.get_running_loop()
+        try:
+            values, jacobians, valid = await loop.run_in_executor(
+                self.executor, _replay, tape, points, jacobian, self.mode, self.dtype)
+        except Exception as error:
+            for point, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for i, (point, future) in enumerate(batch):
+            if future.done():
+                continue
+            if not valid[i]:
+                future.set_exception(ArithmeticError(
+                    f'{point} lies outside the domain of an elementary function used by the traced function'))
+            elif jacobian:
+                future.set_result((values[i], jacobians[i]))
+            else:
+                future.set_result(values[i])
+
+    async def evaluate(self, f, var_list):
+        '''
+        Explanation
+        ------------------------------------
+        Values of f at var_list, computed in a batch with concurrent queries for the same function
+
+        Inputs
+        ------------------------------------
+        f: single function, or list/ndarray of functions (same conventions as AutoDiff)
+        var_list: int, float, list, or ndarray point
+
+        Outputs
+        ------------------------------------
+        ndarray of shape (# functions,)
+
+        Raises
+        ------------------------------------
+        TypeError if f or var_list have the wrong type, see trace()
+        ArithmeticError if var_list leaves the domain of an elementary function used by f
+        '''
+        return await self._submit(f, var_list, False)
+
+    async def jacobian(self, f, var_list):
+        '''
+        Explanation
+        ------------------------------------
+        Values and Jacobian of f at var_list, computed in a batch with concurrent queries for the same function
+
+        Inputs
+        ------------------------------------
+        f: single function, or list/ndarray of functions (same conventions as AutoDiff)
+        var_list: int, float, list, or ndarray point
+
+        Outputs
+        ------------------------------------
+        (values, jacobian): ndarrays of shape (# functions,) and (# functions, # variables)
+
+        Raises
+        ------------------------------------
+        TypeError if f or var_list have the wrong type, see trace()
+        ArithmeticError if var_list leaves the domain of an elementary function used by f
+        '''
+        return await self._submit(f, var_list, True)
+
+    async def close(self):
+        '''
+        Explanation
+        ------------------------------------
+        Send every pending batch without waiting for its latency timer, wait for all batches to finish,
+        then shut down the pool if the service created it
+        '''
+        for batch_key in list(self._pending):
+            self._flush(batch_key, self.tapes[batch_key[0]])
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown()
@@ -0,0 +1,244 @@
+"""
+Explanation
+------------------------------------
+Sparse tangent vectors for vector mode forward differentiation: the dual part of a DualNumber holds the derivatives
+with respect to all (selected) variables at once, storing only the nonzero ones
+
+Items
+------------------------------------
+SparseTangent:
+    Tangent vector of length size as a {variable index: derivative} dict. Sums that grow past max_nnz entries
+    return a dense ndarray instead, which all operations accept as well.
+
+unit_tangents(size, max_nnz=None):
+    The seeds of vector mode: one SparseTangent per variable, with a single 1.0 at its own index
+
+sum_tangents(terms):
+    Sum of a list of tangents, accumulated in place (used by the reductions)
+
+Notes
+------------------------------------
+Every operation of DualNumber and every elementary function only adds tangents and multiplies or divides them by
+scalars, so SparseTangent implements just those. In a locally coupled function most intermediate values depend on
+a few variables, and an operation costs O(nnz) instead of the O(d) of a dense tangent.
+"""
+import builtins
+import math
+import numpy as np
+
+def default_max_nnz(size):
+    '''
+    Explanation
+    ------------------------------------
+    Default number of nonzeros above which a sum of SparseTangents is stored densely.
+    A dict entry costs about as much as 50 elements of a NumPy operation; timings hardly depend on the exact value
+    (benchmarks/bench_sparse_tangents.py).
+
+    Inputs
+    ------------------------------------
+    size: (int) length of the tangent vectors
+
+    Outputs
+    ------------------------------------
+    int
+    '''
+    return max(16, size // 64)
+
+class SparseTangent():
+    '''
+    Explanation
+    ------------------------------------
+    Immutable sparse tangent vector (derivatives with respect to size variables)
+
+    Attributes
+    ------------------------------------
+    entries:
+        Dict variable index -> derivative, without the zero entries
+    size:
+        Length of the vector
+    max_nnz:
+        Number of entries above which sums are returned as dense ndarrays
+
+    Methods
+    ------------------------------------
+    __init__(self, entries, size, max_nnz=None)
+        Instantiate SparseTangent object
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __len__(self)
+        Length of the vector (size)
+    todense(self)
+        ndarray of shape (size,)
+
+    Mathematical dunder methods: Add and subtract (SparseTangent, ndarray, or 0), multiply and divide by a scalar, negation
+
+    Example
+    ------------------------------------
+    x = [DualNumber(v, t) for v, t in zip([1.0, 2.0, 3.0], unit_tangents(3))]   # or _dual(v, t)
+    y = x[0] * x[1]
+    y.dual.entries
+    >>> {0: 2.0, 1: 1.0}
+    '''
+
+    __slots__ = ('entries', 'size', 'max_nnz')
+    # NumPy hands mixed operations (ndarray + SparseTangent) to the reflected methods below
+    __array_ufunc__ = None
+
+    def __init__(self, entries, size, max_nnz=None):
+        self.entries = entries
+        self.size = size
+        self.max_nnz = default_max_nnz(size) if max_nnz is None else max_nnz
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of SparseTangent instantiation with entries, size, and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'SparseTangent({self.entries}, size: {self.size}, id: {id(self)})'
+
+    def __len__(self):
+        return self.size
+
+    def todense(self):
+        '''
+        Explanation
+        ------------------------------------
+        Dense copy of the vector
+
+        Outputs
+        ------------------------------------
+        float ndarray of shape (size,)
+        '''
+        dense = np.zeros(self.size)
+        if self.entries:
+            dense[list(self.entries)] = list(self.entries.values())
+        return dense
+
+    def _sum(self, entries):
+        # Result of an addition: sparse while small, dense past max_nnz
+        if len(entries) > self.max_nnz:
+            dense = np.zeros(self.size)
+            dense[list(entries)] = list(entries.values())
+            return dense
+        return _sparse(entries, self.size, self.max_nnz)
+
+    def __add__(self, other):
+        if type(other) is SparseTangent:
+            a, b = self.entries, other.entries
+            if len(a) < len(b):
+                a, b = b, a
+            entries = a.copy()
+            get = entries.get
+            for k, v in b.items():
+                entries[k] = get(k, 0.0) + v
+            return self._sum(entries)
+        if isinstance(other, np.ndarray):
+            dense = other.astype(float, copy=True)
+            if self.entries:
+                dense[list(self.entries)] += list(self.entries.values())
+            return dense
+        # 0 is the start value of sum() and the tangent of constants
+        if isinstance(other, (int, float)) and other == 0:
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _sparse({k: -v for k, v in self.entries.items()}, self.size, self.max_nnz)
+
+    def __sub__(self, other):
+        if type(other) is SparseTangent or isinstance(other, np.ndarray):
+            return self.__add__(-other)
+        if isinstance(other, (int, float)) and other == 0:
+            return self
+        return NotImplemented
+
+    def __rsub__(self, other):
+        return (-self).__add__(other)
+
+    def __mul__(self, other):
+        cls = type(other)
+        if cls is not float and cls is not int and not isinstance(other, (int, float)):
+            return NotImplemented
+        # Scaling keeps the number of entries, so the result stays sparse
+        entries = {k: v * other for k, v in self.entries.items()} if other else {}
+        return _sparse(entries, self.size, self.max_nnz)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        cls = type(other)
+        if cls is not float and cls is not int and not isinstance(other, (int, float)):
+            return NotImplemented
+        return _sparse({k: v / other for k, v in self.entries.items()}, self.size, self.max_nnz)
+
+_new = object.__new__
+
+def _sparse(entries, size, max_nnz):
+    # Operation results skip default_max_nnz() in __init__
+    tangent = _new(SparseTangent)
+    tangent.entries = entries
+    tangent.size = size
+    tangent.max_nnz = max_nnz
+    return tangent
+
+def unit_tangents(size, max_nnz=None):
+    '''
+    Explanation
+    ------------------------------------
+    Seed tangents of vector mode
+
+    Inputs
+    ------------------------------------
+    size: (int) number of variables
+    max_nnz: [optional] see SparseTangent (default default_max_nnz(size))
+
+    Outputs
+    ------------------------------------
+    list of size SparseTangents, the k-th one with a single 1.0 at index k
+    '''
+    return [SparseTangent({k: 1.0}, size, max_nnz) for k in range(size)]
+
+def sum_tangents(terms):
+    '''
+    Explanation
+    ------------------------------------
+    Sum of many tangents at once, as used by the n-ary reductions.
+    Adding them pairwise copies the running total every time it is dense; this accumulates in place instead,
+    in O(d + total nnz).
+
+    Inputs
+    ------------------------------------
+    terms: list of floats, SparseTangents, or ndarrays (not mixing floats with vectors, except 0)
+
+    Outputs
+    ------------------------------------
+    float (correctly rounded, math.fsum) for scalar terms, otherwise SparseTangent or ndarray
+    '''
+    vectors = [t for t in terms if not isinstance(t, (int, float))]
+    if not vectors:
+        return math.fsum(terms)
+    first = vectors[0]
+    if all(type(t) is SparseTangent for t in vectors) and \
+            builtins.sum(len(t.entries) for t in vectors) <= first.max_nnz:
+        entries = {}
+        get = entries.get
+        for t in vectors:
+            for k, v in t.entries.items():
+                entries[k] = get(k, 0.0) + v
+        return _sparse(entries, first.size, first.max_nnz)
+    total = np.zeros(len(first))
+    for t in vectors:
+        if type(t) is SparseTangent:
+            if t.entries:
+                # Indices within one tangent are distinct, so fancy indexing adds every entry
+                total[list(t.entries)] += list(t.entries.values())
+        else:
+            total += t
+    return total
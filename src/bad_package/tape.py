@@ -0,0 +1,740 @@
+"""
+Explanation
+------------------------------------
+Tracing support: records the operations a user function performs into a flat, replayable tape
+
+Items
+------------------------------------
+Tape:
+    Linear program of recorded operations.
+    Can be replayed at new points (a single point or a batch of points) to compute function values and Jacobians
+    without calling the user function again, and can be saved to / loaded from a compact .npz file.
+
+TapeNode:
+    Value object handed to the user function while tracing.
+    Records every overloaded operator and elementary function applied to it on its Tape.
+
+trace(f, var_list):
+    Traces the user function(s) f at var_list and returns the resulting Tape.
+
+Notes
+------------------------------------
+A tape records the path the user function took at the traced point. Functions whose sequence of operations
+depends on the input values (if/else on x.real, loops with data-dependent length) must be retraced when that path changes.
+"""
+import operator
+import numpy as np
+from bad_package import kernels
+
+# Opcodes understood by the tape. The position of an opcode in this tuple is what gets written to disk,
+# so new opcodes must only ever be appended
+_OPCODES = ('input', 'const', 'add', 'sub', 'mul', 'div', 'pow', 'neg',
+            'exp', 'ln', 'logBase', 'sin', 'cos', 'tan', 'csc', 'sec', 'cot', 'sinh', 'cosh', 'tanh',
+            'arcsin', 'arccos', 'arctan', 'arcsinh', 'arccosh', 'arctanh', 'sqrt')
+_OPCODE_INDEX = {op: i for i, op in enumerate(_OPCODES)}
+
+# Binary operations: (python operator used while tracing, numpy kernel used on replay, local partials)
+# Local partials receive both arguments, the result, and which of the two partials are actually needed
+_BINARY = {
+    'add': (operator.add, np.add, lambda a, b, v, need: (1.0, 1.0)),
+    'sub': (operator.sub, np.subtract, lambda a, b, v, need: (1.0, -1.0)),
+    'mul': (operator.mul, np.multiply, lambda a, b, v, need: (b, a)),
+    'div': (operator.truediv, np.divide, lambda a, b, v, need: (1.0 / b, -v / b)),
+    'pow': (operator.pow, np.power, lambda a, b, v, need: (b * a ** (b - 1.0) if need[0] else None,
+                                                            v * np.log(a) if need[1] else None)),
+}
+
+# Default number of points replayed at a time: large enough that the per-node Python overhead is amortized,
+# small enough that the temporaries of one node stay in cache until the next nodes use them
+_CHUNK = 16384
+
+def _blocks(n_points, chunk):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper splitting a batch of n_points points into slices of at most chunk points
+
+    Inputs
+    ------------------------------------
+    n_points: (int) batch size
+    chunk: (int) maximum slice length, or None for a single slice
+
+    Outputs
+    ------------------------------------
+    list of slice objects (one empty slice for an empty batch)
+
+    Raises
+    ------------------------------------
+    ValueError if chunk is not a positive integer or None
+    '''
+    if chunk is None:
+        return [slice(0, n_points)]
+    if not isinstance(chunk, (int, np.integer)) or chunk < 1:
+        raise ValueError(f'chunk must be a positive integer or None, not {chunk!r}')
+    return [slice(start, start + chunk) for start in range(0, n_points, chunk)] or [slice(0, 0)]
+
+def _float_dtype(dtype):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper validating a dtype argument of the replay methods
+
+    Inputs
+    ------------------------------------
+    dtype: anything np.dtype() accepts
+
+    Outputs
+    ------------------------------------
+    np.dtype object
+
+    Raises
+    ------------------------------------
+    TypeError if dtype is not a floating point type
+    '''
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise TypeError(f'dtype must be a floating point type such as np.float32 or np.float64, not {dtype}')
+    return dtype
+
+
+class TapeNode():
+    '''
+    Explanation
+    ------------------------------------
+    Value object passed to a user function while it is being traced.
+    Every overloaded operator and elementary function applied to a TapeNode is appended to its Tape,
+    and returns a new TapeNode referring to the recorded result.
+
+    Attributes
+    ------------------------------------
+    tape:
+        Tape the node records onto
+    index:
+        Position of the node on the tape
+    real:
+        Value of the node at the traced point (float), so user code and domain checks see real numbers
+
+    Methods
+    ------------------------------------
+    __init__(self, tape, index, real)
+        Instantiate TapeNode object (done by Tape, not the user)
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __str__(self)
+        Pretty print of the node value and tape position
+
+    Mathematical dunder methods: Add, subtract, multiply, divide, power, negation
+
+    Reverse mathematical dunder methods: Add, subtract, multiply, divide, and power
+    '''
+
+    _supported_scalars = (int, float)
+
+    __slots__ = ('tape', 'index', 'real')
+
+    def __init__(self, tape, index, real):
+        self.tape = tape
+        self.index = index
+        self.real = real
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of TapeNode instantiation with value, tape position, and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'TapeNode({self.real}, index: {self.index}, id: {id(self)})'
+
+    def __str__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Pretty print of TapeNode instantiation
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'real: {self.real}, tape index: {self.index}'
+
+    def _validate(self, other):
+        if not isinstance(other, (*self._supported_scalars, TapeNode)):
+            raise TypeError('Type not supported: must be int or float')
+        if isinstance(other, TapeNode) and other.tape is not self.tape:
+            raise ValueError('Cannot combine TapeNodes recorded on different tapes')
+
+    def __add__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('add', self, other)
+
+    def __radd__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('add', other, self)
+
+    def __sub__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('sub', self, other)
+
+    def __rsub__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('sub', other, self)
+
+    def __mul__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('mul', self, other)
+
+    def __rmul__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('mul', other, self)
+
+    def __truediv__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('div', self, other)
+
+    def __rtruediv__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('div', other, self)
+
+    def __pow__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('pow', self, other)
+
+    def __rpow__(self, other):
+        self._validate(other)
+        return self.tape._record_binary('pow', other, self)
+
+    def __neg__(self):
+        return self.tape._record_unary('neg', self)
+
+    def _apply(self, op, param=None):
+        '''
+        Explanation
+        ------------------------------------
+        Hook used by the elementary functions to record themselves on the tape
+
+        Inputs
+        ------------------------------------
+        op: (str) name of the elementary function
+        param: [optional] extra scalar parameter of the function (the base of logBase)
+
+        Outputs
+        ------------------------------------
+        TapeNode referring to the recorded result
+        '''
+        return self.tape._record_unary(op, self, param)
+
+
+class Tape():
+    '''
+    Explanation
+    ------------------------------------
+    Flat, replayable record of the operations performed by one or more user functions.
+    Node i of the tape is the triple (opcode, argument node indices, parameter); inputs and constants are nodes too.
+    The tape only refers to earlier nodes, so replaying it front to back is a valid evaluation order.
+
+    Attributes
+    ------------------------------------
+    n_inputs:
+        Number of input variables (dimensionality d)
+    scalar_input:
+        Boolean, True when the user functions take a single value rather than a list of values
+    nodes:
+        List of (opcode, args, param) triples
+    outputs:
+        List of node indices, one per traced user function (m of them)
+
+    Methods
+    ------------------------------------
+    __init__(self, n_inputs, scalar_input=False)
+        Instantiate an empty Tape with n_inputs input nodes
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __str__(self)
+        Pretty print of the recorded program
+    __len__(self)
+        Number of nodes on the tape
+    constant(self, value)
+        Record a constant node
+    evaluate(self, var_list)
+        Replay the tape and return function values
+    jacobian(self, var_list, mode='auto')
+        Replay the tape and return function values and the Jacobian
+    save(self, path)
+        Write the tape to a compressed .npz file
+    load(cls, path)
+        Read a tape written by save()
+
+    Example
+    ------------------------------------
+    def f(x):
+        return x[0]**2 + 3*x[1] + 5
+    tape = trace(f, np.array([1, 2]))
+    values, jacobian = tape.jacobian(np.array([[1, 2], [3, 4]]))
+    print(jacobian)
+    >>> [[[2. 3.]]
+         [[6. 3.]]]
+    '''
+
+    def __init__(self, n_inputs, scalar_input=False):
+        self.n_inputs = n_inputs
+        self.scalar_input = scalar_input
+        self.nodes = [('input', (), float(i)) for i in range(n_inputs)]
+        self.outputs = []
+        # Domain policy of the values computed while recording, see trace()
+        self._trace_policy = 'raise'
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of Tape instantiation with size information and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'Tape(n_inputs: {self.n_inputs}, nodes: {len(self.nodes)}, outputs: {self.outputs}, id: {id(self)})'
+
+    def __str__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Pretty print of the recorded program, one node per line
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        lines = []
+        for i, (op, args, param) in enumerate(self.nodes):
+            arg_str = ', '.join(f'%{a}' for a in args)
+            param_str = '' if param is None else f' [{param}]'
+            lines.append(f'%{i} = {op}({arg_str}){param_str}')
+        lines.append('return ' + ', '.join(f'%{o}' for o in self.outputs))
+        return '\n'.join(lines)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _append(self, op, args, param=None):
+        self.nodes.append((op, tuple(args), param))
+        return len(self.nodes) - 1
+
+    def constant(self, value):
+        '''
+        Explanation
+        ------------------------------------
+        Record a constant node and return its index
+
+        Inputs
+        ------------------------------------
+        value: int or float
+        '''
+        return self._append('const', (), float(value))
+
+    def _as_node(self, value):
+        if isinstance(value, TapeNode):
+            return value
+        return TapeNode(self, self.constant(value), float(value))
+
+    def _record_binary(self, op, a, b):
+        a, b = self._as_node(a), self._as_node(b)
+        if self._trace_policy == 'raise':
+            real = _BINARY[op][0](a.real, b.real)
+        else:
+            # Division by zero and negative bases give inf/NaN instead of raising
+            with np.errstate(all='ignore'):
+                real = float(_BINARY[op][1](np.float64(a.real), np.float64(b.real)))
+        return TapeNode(self, self._append(op, (a.index, b.index)), real)
+
+    def _record_unary(self, op, x, param=None):
+        real = float(kernels.value(op, x.real, param, domain_policy=self._trace_policy)[0])
+        return TapeNode(self, self._append(op, (x.index,), param), real)
+
+    def _active(self):
+        # A node is active when it depends on at least one input, i.e. its tangent/adjoint can be non-zero
+        active = [False] * len(self.nodes)
+        for i, (op, args, param) in enumerate(self.nodes):
+            active[i] = op == 'input' or any(active[a] for a in args)
+        return active
+
+    def _prepare(self, var_list, dtype=np.float64):
+        # Returns a (N, d) array of points stored as dtype and whether a single point was passed
+        points = np.asarray(var_list, dtype=dtype)
+        single = points.ndim == 0 or (points.ndim == 1 and (not self.scalar_input or points.size == 1))
+        if single:
+            points = points.reshape(1, -1)
+        elif points.ndim == 1:
+            # A 1-D array of points for a function of a single variable
+            points = points.reshape(-1, 1)
+        if points.ndim != 2 or points.shape[1] != self.n_inputs:
+            raise ValueError(f'Expected points with {self.n_inputs} coordinate(s), got array of shape {np.shape(var_list)}')
+        return points, single
+
+    def _run(self, points, active=None, domain_policy='raise'):
+        '''
+        Explanation
+        ------------------------------------
+        Private helper replaying the tape front to back over a batch of points
+
+        Inputs
+        ------------------------------------
+        points: (N, d) ndarray of points
+        active: [optional] activity flags from _active(); local partials are only computed when given
+        domain_policy: [optional] 'raise', 'nan' or 'clip', handed to the elementary function kernels
+
+        Outputs
+        ------------------------------------
+        (values, partials, valid)
+            values: list with the value of every node (ndarray, or scalar for constants)
+            partials: list with a tuple of local partials per active node (None entries when not needed), or None
+            valid: boolean (N,) ndarray, False for points where some elementary function left its domain
+        '''
+        # Constants are stored in the dtype of the points so they never upcast float32 work to float64
+        scalar = points.dtype.type
+        values = [None] * len(self.nodes)
+        partials = None if active is None else [None] * len(self.nodes)
+        valid = np.ones(len(points), dtype=bool)
+        # Values of sin/cos/sinh/cosh at each argument node, including those computed as a partner's derivative
+        paired = {}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for i, (op, args, param) in enumerate(self.nodes):
+                if op == 'input':
+                    values[i] = points[:, int(param)]
+                elif op == 'const':
+                    values[i] = scalar(param)
+                elif op in kernels.PAIRS:
+                    # Defined everywhere, so no domain mask; sin(x) and cos(x) cost two evaluations in total,
+                    # whether the program uses one or both of them and whether or not they are differentiated
+                    partner, sign = kernels.PAIRS[op]
+                    values[i] = self._paired(op, args[0], values, paired)
+                    if partials is not None and active[i]:
+                        derivative = self._paired(partner, args[0], values, paired)
+                        partials[i] = (derivative if sign > 0 else -derivative,)
+                elif op in _BINARY:
+                    a, b = values[args[0]], values[args[1]]
+                    values[i] = _BINARY[op][1](a, b)
+                    if partials is not None and active[i]:
+                        need = (active[args[0]], active[args[1]])
+                        local = _BINARY[op][2](a, b, values[i], need)
+                        partials[i] = tuple(p if n else None for p, n in zip(local, need))
+                elif partials is not None and active[i]:
+                    # Value and derivative come from one kernel call, so no transcendental is evaluated twice
+                    values[i], derivative, node_valid = kernels.value_and_derivative(op, values[args[0]], param, domain_policy)
+                    partials[i] = (derivative,)
+                    valid &= node_valid
+                else:
+                    values[i], node_valid = kernels.value(op, values[args[0]], param, domain_policy)
+                    valid &= node_valid
+        return values, partials, valid
+
+    @staticmethod
+    def _paired(op, arg, values, paired):
+        # Value of op (a key of kernels.PAIRS) at node arg, evaluated at most once per replay
+        key = (op, arg)
+        if key not in paired:
+            paired[key] = kernels.KERNELS[op][0](values[arg], None)
+        return paired[key]
+
+    def _outputs(self, values, n_points):
+        dtype = np.result_type(*(values[o] for o in self.outputs)) if self.outputs else float
+        return np.stack([np.broadcast_to(values[o], (n_points,)) for o in self.outputs], axis=1).astype(dtype)
+
+    def evaluate(self, var_list, dtype=np.float64, domain_policy='raise', chunk=_CHUNK):
+        '''
+        Explanation
+        ------------------------------------
+        Replay the tape at one or more points and return the values of every traced function
+
+        Inputs
+        ------------------------------------
+        var_list: a single point (int, float, or 1-D array of length n_inputs) or a batch of points (array of shape (N, n_inputs))
+        dtype: [optional] floating point type the points and all intermediate values are stored in (default float64)
+        domain_policy: [optional] what to do with points outside the domain of a recorded elementary function:
+                       'raise' (default), 'nan' or 'clip' (see bad_package.kernels)
+        chunk: [optional] number of points replayed at a time (default 16384), see jacobian(); None replays the whole batch at once
+
+        Outputs
+        ------------------------------------
+        values: ndarray of shape (# functions,) for a single point, (N, # functions) for a batch
+        (values, valid) when domain_policy is 'nan' or 'clip'
+            valid: boolean per point (bool, or ndarray of shape (N,)), False where a domain was left
+
+        Raises
+        ------------------------------------
+        TypeError if dtype is not a floating point type
+        ValueError if the points do not have n_inputs coordinates, domain_policy is unknown or chunk is not a positive integer
+        ArithmeticError if domain_policy is 'raise' and any point leaves the domain of a recorded elementary function
+        '''
+        points, single = self._prepare(var_list, _float_dtype(dtype))
+        primal = np.empty((len(points), len(self.outputs)), dtype=points.dtype)
+        valid = np.empty(len(points), dtype=bool)
+        for block in _blocks(len(points), chunk):
+            values, partials, valid[block] = self._run(points[block], domain_policy=domain_policy)
+            primal[block] = self._outputs(values, len(valid[block]))
+        if single:
+            primal, valid = primal[0], bool(valid[0])
+        return primal if domain_policy == 'raise' else (primal, valid)
+
+    def jacobian(self, var_list, mode='auto', dtype=np.float64, accumulate_dtype=None, domain_policy='raise', out=None,
+                 chunk=_CHUNK):
+        '''
+        Explanation
+        ------------------------------------
+        Replay the tape at one or more points and return function values and the Jacobian.
+        The local partials of every node are computed once per call and shared by all sweeps.
+
+        Inputs
+        ------------------------------------
+        var_list: a single point or a batch of points, see evaluate()
+        mode: [optional] 'forward' (one sweep per input), 'reverse' (one sweep per output)
+              or 'auto' (whichever needs fewer sweeps)
+        dtype: [optional] floating point type of the points, values and local partials (default float64)
+        accumulate_dtype: [optional] floating point type tangents/adjoints are accumulated in (default: dtype)
+        domain_policy: [optional] 'raise' (default), 'nan' or 'clip', see evaluate()
+        out: [optional] ndarray (or np.memmap) of the Jacobian's shape the result is written into instead of
+             a new array, e.g. a slice of a memory-mapped file
+        chunk: [optional] number of points replayed at a time (default 16384); None replays the whole batch at once
+
+        Outputs
+        ------------------------------------
+        (values, jacobian)
+            values: ndarray of shape (# functions,) or (N, # functions), stored as dtype
+            jacobian: ndarray of shape (# functions, # variables) or (N, # functions, # variables),
+                      stored as accumulate_dtype (out itself when given)
+        (values, jacobian, valid) when domain_policy is 'nan' or 'clip'
+            valid: boolean per point (bool, or ndarray of shape (N,)), False where a domain was left
+
+        Raises
+        ------------------------------------
+        TypeError if dtype or accumulate_dtype is not a floating point type
+        ValueError if mode or domain_policy is unknown, the points have the wrong shape, out has the wrong shape
+        or chunk is not a positive integer
+        ArithmeticError if domain_policy is 'raise' and any point leaves the domain of a recorded elementary function
+
+        Notes
+        ------------------------------------
+        dtype=np.float32 halves the memory traffic of large batches. Every recorded operation then rounds
+        to float32 (unit roundoff u = 2**-24, about 6e-8), so a tape of n nodes has a normwise relative error
+        (max |error| / max |exact|) of roughly n * u * (condition number of the function); for the functions in
+        tests/test_derivs.py this stays below 1e-5. accumulate_dtype=np.float64 removes the additional rounding error
+        of summing many contributions into one adjoint (large fan-in), but not the float32 rounding of values and partials.
+
+        Every node produces a value, a local partial and a tangent/adjoint array per point. Replaying the whole
+        tape on one chunk of points at a time keeps these temporaries small enough to stay in cache between the
+        node that writes them and the nodes that read them, instead of streaming every one of them through main
+        memory. Results do not depend on chunk, all operations are elementwise.
+        '''
+        if mode == 'auto':
+            mode = 'forward' if self.n_inputs <= len(self.outputs) else 'reverse'
+        if mode not in ('forward', 'reverse'):
+            raise ValueError(f"mode must be 'forward', 'reverse' or 'auto', not {mode!r}")
+
+        dtype = _float_dtype(dtype)
+        accumulate_dtype = dtype if accumulate_dtype is None else _float_dtype(accumulate_dtype)
+        # Seeding with a scalar of the accumulation type makes every tangent/adjoint product promote to it
+        seed = accumulate_dtype.type(1.0)
+
+        points, single = self._prepare(var_list, dtype)
+        n_points = len(points)
+        active = self._active()
+
+        shape = (n_points, len(self.outputs), self.n_inputs)
+        if out is None:
+            jacobian = np.zeros(shape, dtype=accumulate_dtype)
+        else:
+            jacobian = out[np.newaxis] if single else out
+            if jacobian.shape != shape:
+                raise ValueError(f'out must have shape {shape[1:] if single else shape}, not {out.shape}')
+            jacobian[...] = 0
+        primal = np.empty((n_points, len(self.outputs)), dtype=dtype)
+        valid = np.empty(n_points, dtype=bool)
+        for block in _blocks(n_points, chunk):
+            values, partials, valid[block] = self._run(points[block], active, domain_policy)
+            primal[block] = self._outputs(values, len(valid[block]))
+            self._sweeps(mode, partials, active, seed, jacobian[block])
+
+        if out is not None:
+            jacobian = out
+        elif single:
+            jacobian = jacobian[0]
+        if single:
+            primal, valid = primal[0], bool(valid[0])
+        if domain_policy == 'raise':
+            return primal, jacobian
+        return primal, jacobian, valid
+
+    def _sweeps(self, mode, partials, active, seed, jacobian):
+        # Fills the (n, # functions, # variables) block jacobian from the local partials of one chunk
+        if mode == 'forward':
+            for k in range(self.n_inputs):
+                tangents = self._forward_sweep(k, partials, active, seed)
+                for j, o in enumerate(self.outputs):
+                    if tangents[o] is not None:
+                        jacobian[:, j, k] = tangents[o]
+        else:
+            for j, o in enumerate(self.outputs):
+                adjoints = self._reverse_sweep(o, partials, active, seed)
+                for k in range(self.n_inputs):
+                    if adjoints[k] is not None:
+                        jacobian[:, j, k] = adjoints[k]
+
+    def _forward_sweep(self, k, partials, active, seed=1.0):
+        # Tangent of every node in the direction of input k; None stands for an exactly-zero tangent
+        tangents = [None] * len(self.nodes)
+        tangents[k] = seed
+        for i in range(self.n_inputs, len(self.nodes)):
+            if not active[i]:
+                continue
+            total = None
+            for a, p in zip(self.nodes[i][1], partials[i]):
+                if p is None or tangents[a] is None:
+                    continue
+                total = p * tangents[a] if total is None else total + p * tangents[a]
+            tangents[i] = total
+        return tangents
+
+    def _reverse_sweep(self, output, partials, active, seed=1.0):
+        # Adjoint of every node for a single output; None stands for an exactly-zero adjoint
+        adjoints = [None] * len(self.nodes)
+        if active[output]:
+            adjoints[output] = seed
+        for i in range(output, self.n_inputs - 1, -1):
+            if adjoints[i] is None or partials[i] is None:
+                continue
+            for a, p in zip(self.nodes[i][1], partials[i]):
+                if p is None:
+                    continue
+                contribution = adjoints[i] * p
+                adjoints[a] = contribution if adjoints[a] is None else adjoints[a] + contribution
+        return adjoints
+
+    def save(self, path):
+        '''
+        Explanation
+        ------------------------------------
+        Write the tape to a compressed .npz file.
+        Opcodes, argument lists (CSR layout), parameters and outputs are stored as plain numeric arrays,
+        so loading never needs pickle. Primitives added with define_primitive() are stored by name (negative opcodes)
+        and must be registered again in the process that loads the tape.
+
+        Inputs
+        ------------------------------------
+        path: file name or writable binary file object
+        '''
+        custom = sorted({op for op, args, param in self.nodes if op not in _OPCODE_INDEX})
+        custom_index = {op: -1 - k for k, op in enumerate(custom)}
+        opcodes = np.array([_OPCODE_INDEX.get(op, custom_index.get(op)) for op, args, param in self.nodes], dtype=np.int16)
+        arg_ptr = np.cumsum([0] + [len(args) for op, args, param in self.nodes]).astype(np.int64)
+        arg_idx = np.array([a for op, args, param in self.nodes for a in args], dtype=np.int64)
+        params = np.array([np.nan if param is None else param for op, args, param in self.nodes], dtype=float)
+        np.savez_compressed(path, opcodes=opcodes, arg_ptr=arg_ptr, arg_idx=arg_idx, params=params,
+                            outputs=np.array(self.outputs, dtype=np.int64), custom=np.array(custom, dtype=str),
+                            meta=np.array([self.n_inputs, int(self.scalar_input)], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Explanation
+        ------------------------------------
+        Read a tape written by save()
+
+        Inputs
+        ------------------------------------
+        path: file name or readable binary file object
+
+        Outputs
+        ------------------------------------
+        Tape object, ready to evaluate
+
+        Raises
+        ------------------------------------
+        ValueError if the tape uses a primitive that is not registered in this process
+        '''
+        with np.load(path, allow_pickle=False) as data:
+            n_inputs, scalar_input = (int(v) for v in data['meta'])
+            tape = cls(n_inputs, bool(scalar_input))
+            opcodes, arg_ptr, arg_idx, params = data['opcodes'], data['arg_ptr'], data['arg_idx'], data['params']
+            # Files written before custom primitives existed have no 'custom' array
+            custom = [str(op) for op in data['custom']] if 'custom' in data.files else []
+            for op in custom:
+                if op not in kernels.KERNELS:
+                    raise ValueError(f'Tape uses primitive {op!r}, which is not registered (see define_primitive())')
+            names = list(_OPCODES) + custom[::-1]
+            tape.nodes = [(names[code], tuple(int(a) for a in arg_idx[arg_ptr[i]:arg_ptr[i + 1]]),
+                           None if np.isnan(params[i]) else float(params[i]))
+                          for i, code in enumerate(opcodes)]
+            tape.outputs = [int(o) for o in data['outputs']]
+        return tape
+
+
+def trace(f, var_list, domain_policy='raise'):
+    '''
+    Explanation
+    ------------------------------------
+    Run the user function(s) once on TapeNodes and return the recorded Tape.
+    Calling conventions match AutoDiff: a single variable is passed to f as one value, several variables as a list.
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions
+    var_list: int, float, list, or ndarray point to trace at
+    domain_policy: [optional] 'raise' (default), 'nan' or 'clip' for the values computed while tracing.
+                   With 'nan' or 'clip' a point outside the domain of an elementary function is still recorded
+                   (its values become NaN), so the domain policy of the replay decides what happens to it.
+
+    Outputs
+    ------------------------------------
+    Tape with one output per function
+
+    Raises
+    ------------------------------------
+    TypeError if f is not callable (a function), list, or ndarray
+    TypeError if var_list is not a list, ndarray, int, or float
+    TypeError if var_list is empty
+    ValueError if domain_policy is unknown
+    ArithmeticError if domain_policy is 'raise' and the point is outside the domain of an elementary function
+
+    Example
+    ------------------------------------
+    def f(x):
+        return sin(x[0]) * x[1]
+    tape = trace(f, [1.0, 2.0])
+    tape.evaluate([0.0, 5.0])
+    >>> array([0.])
+    '''
+    scalar_input = False
+    if isinstance(var_list, (int, float)):
+        scalar_input = True
+        var_list = np.array([var_list])
+    elif isinstance(var_list, (list, np.ndarray)):
+        var_list = np.array(var_list).ravel()
+    else:
+        raise TypeError('Second argument in must be a list or ndarray of integers or float or single integers or floats.')
+    if len(var_list) == 0:
+        raise TypeError('Your variable list must have at least one value!')
+    scalar_input = scalar_input or len(var_list) == 1
+
+    if isinstance(f, (list, np.ndarray)):
+        functions = list(f)
+    elif callable(f):
+        functions = [f]
+    else:
+        raise TypeError('First argument in must be a list of ndarray of functions or a single function.')
+
+    if domain_policy not in ('raise', 'nan', 'clip'):
+        raise ValueError(f"domain_policy must be 'raise', 'nan' or 'clip', not {domain_policy!r}")
+
+    tape = Tape(len(var_list), scalar_input)
+    # Clipping would record values of a different point; outside the domain tracing only needs the operations
+    tape._trace_policy = 'raise' if domain_policy == 'raise' else 'nan'
+    inputs = [TapeNode(tape, i, float(v)) for i, v in enumerate(var_list)]
+    for function in functions:
+        result = function(inputs[0] if scalar_input else inputs)
+        tape.outputs.append(tape._as_node(result).index)
+    tape._trace_policy = 'raise'
+    return tape
@@ -0,0 +1,313 @@
+"""
+Explanation
+------------------------------------
+Gradient checker: compares AutoDiff and ReverseAD against central finite differences and the complex step method
+
+Items
+------------------------------------
+finite_difference(f, var_list):
+    Jacobian by central differences, evaluating f on plain floats
+
+complex_step(f, var_list, h=1e-20):
+    Jacobian by the complex step method, replaying the traced program of f in complex arithmetic
+
+check_gradients(f, points):
+    Runs all four methods at every point and returns a GradientReport with the largest deviation from the
+    complex step reference and the wall time of every method
+
+check_catalogue(n_points=20, seed=0):
+    check_gradients() over every elementary function and overloaded operator, on random points inside their domains
+
+Notes
+------------------------------------
+The complex step Jacobian Im(f(x + ih e_k)) / h has no subtractive cancellation, so with h = 1e-20 it is exact to
+machine precision. It only uses the values of the elementary functions (their NumPy kernels), never the derivative
+rules of DualNumber/ReverseMode, which makes it an independent reference for those rules. Central differences carry
+a truncation and rounding error of roughly eps**(2/3) (about 1e-11 relative) and are reported for comparison.
+"""
+import time
+import numpy as np
+from bad_package import elementary_functions as ef
+from bad_package.interface import AutoDiff, ReverseAD
+from bad_package.kernels import KERNELS
+from bad_package.tape import _BINARY, trace
+
+METHODS = ('AutoDiff', 'ReverseAD', 'finite_difference', 'complex_step')
+
+def _point(var_list):
+    # Flat float array of the coordinates of one point
+    return np.atleast_1d(np.asarray(var_list, dtype=float)).ravel()
+
+def _functions(f):
+    return list(f) if isinstance(f, (list, np.ndarray)) else [f]
+
+def _call(function, x):
+    # Same calling convention as AutoDiff and ReverseAD: one value for a single variable, a list otherwise
+    return function(x[0] if len(x) == 1 else list(x))
+
+def finite_difference(f, var_list, h=None):
+    '''
+    Explanation
+    ------------------------------------
+    Jacobian of f at var_list by central differences (f(x + h e_k) - f(x - h e_k)) / 2h
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions
+    var_list: int, float, list, or ndarray point
+    h: [optional] step; by default eps**(1/3) * max(1, |x_k|) per coordinate, which balances truncation and rounding
+
+    Outputs
+    ------------------------------------
+    ndarray of shape (# functions, # variables)
+    '''
+    x = _point(var_list)
+    functions = _functions(f)
+    steps = np.cbrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(x)) if h is None else np.full(len(x), float(h))
+    jacobian = np.empty((len(functions), len(x)))
+    for k, step in enumerate(steps):
+        forward, backward = x.copy(), x.copy()
+        forward[k] += step
+        backward[k] -= step
+        for j, function in enumerate(functions):
+            jacobian[j, k] = (float(_call(function, forward)) - float(_call(function, backward))) / (2 * step)
+    return jacobian
+
+def _replay_complex(tape, points):
+    '''
+    Explanation
+    ------------------------------------
+    Private helper evaluating a tape over complex points with the value kernels only (no domain masks,
+    which are defined for real numbers)
+
+    Inputs
+    ------------------------------------
+    tape: Tape object
+    points: (N, d) complex ndarray
+
+    Outputs
+    ------------------------------------
+    (N, # functions) complex ndarray
+    '''
+    values = [None] * len(tape.nodes)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for i, (op, args, param) in enumerate(tape.nodes):
+            if op == 'input':
+                values[i] = points[:, int(param)]
+            elif op == 'const':
+                values[i] = param
+            elif op in _BINARY:
+                values[i] = _BINARY[op][1](values[args[0]], values[args[1]])
+            else:
+                values[i] = KERNELS[op][0](values[args[0]], param)
+    return np.stack([np.broadcast_to(values[o], (len(points),)) for o in tape.outputs], axis=1)
+
+def complex_step(f, var_list, h=1e-20, tape=None):
+    '''
+    Explanation
+    ------------------------------------
+    Jacobian of f at var_list by the complex step method, Im(f(x + ih e_k)) / h.
+    f is traced once and all # variables perturbed points are replayed as one complex batch.
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions
+    var_list: int, float, list, or ndarray point
+    h: [optional] imaginary step (default 1e-20, far below any rounding error)
+    tape: [optional] already traced Tape of f
+
+    Outputs
+    ------------------------------------
+    ndarray of shape (# functions, # variables)
+
+    Notes
+    ------------------------------------
+    Every recorded operation must be complex analytic, which holds for all operators and elementary functions of this package.
+    '''
+    x = _point(var_list)
+    if tape is None:
+        tape = trace(f, var_list)
+    points = np.tile(x.astype(complex), (len(x), 1))
+    points[np.arange(len(x)), np.arange(len(x))] += 1j * h
+    return _replay_complex(tape, points).imag.T / h
+
+def _autodiff(f, x):
+    ad = AutoDiff(_functions(f), x)
+    return np.reshape(np.asarray(ad.get_jacobian(), dtype=float), (len(_functions(f)), len(x)))
+
+def _reversead(f, x):
+    rm = ReverseAD(np.array(_functions(f)), x)
+    return np.reshape(np.asarray(rm.get_jacobian(), dtype=float), (len(_functions(f)), len(x)))
+
+class GradientReport():
+    '''
+    Explanation
+    ------------------------------------
+    Result of check_gradients()
+
+    Attributes
+    ------------------------------------
+    max_error:
+        Dict method -> largest absolute deviation from the complex step Jacobian over all points and entries
+    max_relative_error:
+        Dict method -> max_error divided by the largest |complex step Jacobian entry| (at least 1)
+    time:
+        Dict method -> wall time in seconds over all points
+    n_points:
+        Number of points checked
+    rtol:
+        Relative tolerance the AD methods are held to
+
+    Methods
+    ------------------------------------
+    __repr__(self)
+        Easy-to-read object instantiation with memory location
+    __str__(self)
+        Table of errors and timings
+    passed(self)
+        True if AutoDiff and ReverseAD are within rtol of the complex step reference
+    '''
+
+    def __init__(self, max_error, max_relative_error, time, n_points, rtol):
+        self.max_error = max_error
+        self.max_relative_error = max_relative_error
+        self.time = time
+        self.n_points = n_points
+        self.rtol = rtol
+
+    def __repr__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Base print of GradientReport instantiation with outcome and memory location
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        return f'GradientReport(passed: {self.passed()}, n_points: {self.n_points}, id: {id(self)})'
+
+    def __str__(self):
+        '''
+        Explanation
+        ------------------------------------
+        Table with one row per method: max absolute error, max relative error and wall time
+
+        Inputs
+        ------------------------------------
+        None
+        '''
+        rows = [f'{"method":18s} {"max error":>10s} {"rel. error":>10s} {"time [s]":>10s}']
+        for method in METHODS:
+            rows.append(f'{method:18s} {self.max_error[method]:10.2e} {self.max_relative_error[method]:10.2e} '
+                        f'{self.time[method]:10.4f}')
+        return '\n'.join(rows)
+
+    def passed(self):
+        return all(self.max_relative_error[method] <= self.rtol for method in ('AutoDiff', 'ReverseAD'))
+
+def check_gradients(f, points, rtol=1e-10):
+    '''
+    Explanation
+    ------------------------------------
+    Compare AutoDiff, ReverseAD and central differences against the complex step Jacobian at every point
+
+    Inputs
+    ------------------------------------
+    f: single function, or list/ndarray of functions
+    points: ndarray of shape (N,) or (N, # variables), or a list of points
+    rtol: [optional] relative tolerance for AutoDiff and ReverseAD, see GradientReport.passed()
+
+    Outputs
+    ------------------------------------
+    GradientReport
+
+    Example
+    ------------------------------------
+    def f(x):
+        return x[0] / x[1] + sin(x[0] * x[1])
+    report = check_gradients(f, np.random.default_rng(0).uniform(0.5, 2, size=(20, 2)))
+    print(report)
+    report.passed()
+    >>> True
+    '''
+    points = [_point(p) for p in points]
+    tape = trace(f, points[0] if len(points[0]) > 1 else float(points[0][0]))
+    runs = {
+        'AutoDiff': lambda x: _autodiff(f, x),
+        'ReverseAD': lambda x: _reversead(f, x),
+        'finite_difference': lambda x: finite_difference(f, x),
+        'complex_step': lambda x: complex_step(f, x, tape=tape),
+    }
+    jacobians, elapsed = {}, {}
+    for method, run in runs.items():
+        start = time.perf_counter()
+        jacobians[method] = np.array([run(x) for x in points])
+        elapsed[method] = time.perf_counter() - start
+
+    reference = jacobians['complex_step']
+    scale = max(1.0, float(np.max(np.abs(reference))))
+    max_error = {method: float(np.max(np.abs(jacobians[method] - reference))) for method in METHODS}
+    max_relative_error = {method: error / scale for method, error in max_error.items()}
+    return GradientReport(max_error, max_relative_error, elapsed, len(points), rtol)
+
+# Elementary functions and operators checked by check_catalogue(), with an interval inside their domain
+CATALOGUE = {
+    'exp': (ef.exp, (-2.0, 2.0)),
+    'ln': (ef.ln, (0.1, 5.0)),
+    'logBase': (lambda x: ef.logBase(x, 3), (0.1, 5.0)),
+    'sin': (ef.sin, (-3.0, 3.0)),
+    'cos': (ef.cos, (-3.0, 3.0)),
+    'tan': (ef.tan, (-1.2, 1.2)),
+    'csc': (ef.csc, (0.2, 3.0)),
+    'sec': (ef.sec, (-1.2, 1.2)),
+    'cot': (ef.cot, (0.2, 3.0)),
+    'sinh': (ef.sinh, (-2.0, 2.0)),
+    'cosh': (ef.cosh, (-2.0, 2.0)),
+    'tanh': (ef.tanh, (-2.0, 2.0)),
+    'arcsin': (ef.arcsin, (-0.9, 0.9)),
+    'arccos': (ef.arccos, (-0.9, 0.9)),
+    'arctan': (ef.arctan, (-3.0, 3.0)),
+    'arcsinh': (ef.arcsinh, (-3.0, 3.0)),
+    'arccosh': (ef.arccosh, (1.1, 4.0)),
+    'arctanh': (ef.arctanh, (-0.9, 0.9)),
+    'sqrt': (ef.sqrt, (0.1, 5.0)),
+    'add': (lambda x: x[0] + x[1] + 2.5, (0.5, 2.0)),
+    'sub': (lambda x: x[0] - x[1] - 2.5 + (1.5 - x[0]), (0.5, 2.0)),
+    'mul': (lambda x: x[0] * x[1] * 2.5, (0.5, 2.0)),
+    'div': (lambda x: x[0] / x[1] / 2.5 + 1.5 / x[0], (0.5, 2.0)),
+    'pow': (lambda x: x[0] ** x[1] + x[0] ** 2.5 + 1.5 ** x[1], (0.5, 2.0)),
+    'neg': (lambda x: -x[0] * x[1], (0.5, 2.0)),
+}
+
+def check_catalogue(n_points=20, seed=0, rtol=1e-10):
+    '''
+    Explanation
+    ------------------------------------
+    Run check_gradients() for every entry of CATALOGUE: all elementary functions of
+    bad_package.elementary_functions plus the overloaded operators (two-variable entries)
+
+    Inputs
+    ------------------------------------
+    n_points: [optional] (int) random points per entry (default 20)
+    seed: [optional] seed of the random points
+    rtol: [optional] relative tolerance, see check_gradients()
+
+    Outputs
+    ------------------------------------
+    dict of name -> GradientReport
+
+    Example
+    ------------------------------------
+    reports = check_catalogue()
+    [name for name, report in reports.items() if not report.passed()]
+    >>> []
+    '''
+    rng = np.random.default_rng(seed)
+    reports = {}
+    for name, (function, (low, high)) in CATALOGUE.items():
+        # Operator entries index their argument, so they are functions of two variables
+        n_variables = 2 if name in ('add', 'sub', 'mul', 'div', 'pow', 'neg') else 1
+        points = rng.uniform(low, high, size=(n_points, n_variables))
+        reports[name] = check_gradients(function, points, rtol)
+    return reports
@@ -6,6 +6,19 @@ tests=(
     test_derivs.py
     test_interface.py
     test_rad.py
+    test_tape.py
+    test_cache.py
+    test_optimize.py
+    test_kernels.py
+    test_batch.py
+    test_service.py
+    test_arena.py
+    test_gc_control.py
+    test_validation.py
+    test_lazy.py
+    test_custom.py
+    test_reductions.py
+    test_sparse.py
 )
 
 export PYTHONPATH="$(pwd -P)/../src":${PYTHONPATH}
@@ -0,0 +1,77 @@
+# Test code for src/bad_package/arena.py
+import pytest
+import numpy as np
+
+from bad_package.arena import Arena, ArenaNode
+from bad_package.elementary_functions import *
+from bad_package.interface import AutoDiff
+
+class TestArena():
+
+    def test_gradient(self):
+        arena = Arena()
+        x, y = arena.variable(2.0), arena.variable(3)
+        z = x * y + sin(x) - y / x + 2**x
+        gradient = arena.gradient(z, [x, y])
+        assert pytest.approx([3 + np.cos(2) + 3/4 + 4*np.log(2), 2 - 1/2]) == gradient
+
+    def test_matches_forward_mode(self):
+        def f1(x):
+            return x[1]*sin(x[2]) + exp(x[0]*x[1]) / sqrt(x[2])
+        def f2(x):
+            return x[0]**3 - x[0]*x[2] + logBase(x[1], 3) - 2**x[0]
+        def f3(x):
+            return arctan(x[0]) * tanh(x[1]) + cosh(x[2]) / (1 + sec(x[0])) - x[1]**x[0]
+        functions = [f1, f2, f3]
+        x = np.array([0.5, 2.0, 4.0])
+        jacobian = Arena().jacobian(functions, x)
+        for row, expected in zip(jacobian, AutoDiff(functions, x).get_jacobian()):
+            assert pytest.approx(expected) == row
+
+    def test_scalar_and_constant_functions(self):
+        arena = Arena()
+        assert pytest.approx([6.0]) == arena.jacobian(lambda x: x**2 + 1, 3)[0]
+        assert pytest.approx([0.0, 0.0]) == arena.jacobian(lambda x: 5.0, [1.0, 2.0])[0]
+
+    def test_growth_and_reset(self):
+        arena = Arena(capacity=4)
+        x = arena.variable(1.0)
+        total = x
+        for _ in range(100):
+            total = total + x
+        assert len(arena) == 101
+        assert pytest.approx([101.0]) == arena.gradient(total, [x])
+        capacity = len(arena.values)
+        arena.reset()
+        assert len(arena) == 0 and len(arena.values) == capacity
+        with pytest.raises(ValueError):
+            x + 1
+
+    def test_deep_graph(self):
+        # Deeper than the recursion limit ReverseMode.grad() is bound by
+        arena = Arena()
+        x = arena.variable(0.5)
+        y = x
+        for _ in range(5000):
+            y = sin(y)
+        gradient = arena.gradient(y, [x])[0]
+        expected, value = 1.0, 0.5
+        for _ in range(5000):
+            expected *= np.cos(value)
+            value = np.sin(value)
+        assert pytest.approx(expected) == gradient
+
+    def test_errors(self):
+        arena, other = Arena(), Arena()
+        x = arena.variable(-1.0)
+        with pytest.raises(ArithmeticError):
+            sqrt(x)
+        with pytest.raises(ValueError):
+            x + other.variable(1.0)
+        with pytest.raises(TypeError):
+            x + '1'
+        with pytest.raises(TypeError):
+            arena.variable('1')
+        with pytest.raises(TypeError):
+            arena.jacobian('f', [1.0])
+        assert isinstance(x * np.float32(2), ArenaNode)
@@ -0,0 +1,145 @@
+# Test code for src/bad_package/batch.py
+import pytest
+import numpy as np
+
+from bad_package.batch import iter_chunks, iter_jacobians, write_jacobians
+from bad_package.elementary_functions import *
+from bad_package.tape import trace
+
+def func(x):
+    return x[0]**2 + 3*x[1] + sin(x[0]*x[1])
+
+def expected_jacobian(points):
+    x, y = points[:, 0], points[:, 1]
+    return np.stack([2*x + y*np.cos(x*y), 3 + x*np.cos(x*y)], axis=1)
+
+class TestIterChunks():
+
+    def test_array(self):
+        chunks = list(iter_chunks(np.arange(10.0), 4))
+        assert [len(c) for c in chunks] == [4, 4, 2]
+        assert chunks[0].shape == (4, 1)
+
+    def test_generator(self):
+        chunks = list(iter_chunks((np.array([i, i + 1.0]) for i in range(5)), 2))
+        assert [c.shape for c in chunks] == [(2, 2), (2, 2), (1, 2)]
+
+    def test_invalid_chunk(self):
+        with pytest.raises(ValueError):
+            list(iter_chunks(np.arange(3.0), 0))
+        with pytest.raises(ValueError):
+            list(iter_chunks(np.arange(3.0), 2.0))
+        assert [len(c) for c in iter_chunks(np.arange(3.0), np.int64(2))] == [2, 1]
+
+class TestIterJacobians():
+
+    points = np.random.default_rng(0).uniform(-2, 2, size=(1000, 2))
+
+    @pytest.mark.parametrize('prefetch', [False, True])
+    def test_stream_matches_reference(self, prefetch):
+        stream = (point for point in self.points)
+        results = list(iter_jacobians(func, stream, chunk=128, prefetch=prefetch))
+        assert len(results) == 8
+        jacobian = np.concatenate([j for v, j in results])
+        assert jacobian.shape == (1000, 1, 2)
+        assert pytest.approx(expected_jacobian(self.points).ravel()) == jacobian[:, 0].ravel()
+
+    def test_scalar_points(self):
+        results = list(iter_jacobians(lambda x: x**2, range(5), chunk=2))
+        jacobian = np.concatenate([j for v, j in results])
+        assert pytest.approx([0, 2, 4, 6, 8]) == jacobian.ravel()
+
+    def test_given_tape_and_policy(self):
+        tape = trace(lambda x: sqrt(x), 1.0)
+        results = list(iter_jacobians(None, np.array([4.0, -1.0]), tape=tape, domain_policy='nan'))
+        values, jacobian, valid = results[0]
+        assert list(valid) == [True, False]
+
+    @pytest.mark.parametrize('domain_policy', ['nan', 'clip'])
+    def test_first_point_out_of_domain(self, domain_policy):
+        # Tracing at the first point must not raise; the domain policy decides what happens to it
+        values, jacobian, valid = next(iter_jacobians(lambda x: sqrt(x), np.array([[-1.0], [4.0], [9.0]]),
+                                                      domain_policy=domain_policy))
+        assert list(valid) == [False, True, True]
+        assert pytest.approx([2.0, 3.0]) == values[1:, 0]
+        assert pytest.approx([0.25, 1 / 6]) == jacobian[1:, 0, 0]
+        if domain_policy == 'nan':
+            assert np.isnan(values[0, 0])
+        with pytest.raises(ArithmeticError):
+            list(iter_jacobians(lambda x: sqrt(x), np.array([[-1.0], [4.0]])))
+
+    def test_prefetch_propagates_errors(self):
+        def broken():
+            yield np.array([1.0, 2.0])
+            raise IOError('disk gone')
+        with pytest.raises(IOError):
+            list(iter_jacobians(func, broken(), chunk=1, prefetch=True))
+
+    def test_early_close(self):
+        generator = iter_jacobians(func, (point for point in self.points), chunk=10, prefetch=True)
+        next(generator)
+        generator.close()
+
+class TestWriteJacobians():
+
+    points = np.random.default_rng(1).uniform(-2, 2, size=(100, 2))
+
+    def test_into_array(self):
+        jacobian = np.empty((100, 1, 2))
+        values, out, valid = write_jacobians(func, self.points, jacobian, chunk=32)
+        assert out is jacobian and values is None and valid is None
+        assert pytest.approx(expected_jacobian(self.points).ravel()) == jacobian[:, 0].ravel()
+
+    def test_memmap_to_npy(self, tmp_path):
+        points = np.lib.format.open_memmap(tmp_path / 'points.npy', mode='w+', dtype=float, shape=(100, 2))
+        points[:] = self.points
+        path = tmp_path / 'jacobians.npy'
+        write_jacobians(func, points, path, values_out=tmp_path / 'values.npy', chunk=32)
+        assert pytest.approx(expected_jacobian(self.points).ravel()) == np.load(path)[:, 0].ravel()
+        assert np.load(tmp_path / 'values.npy').shape == (100, 1)
+        assert open(str(path) + '.progress').read().split() == ['4', '32']
+
+    def test_resume_after_crash(self, tmp_path):
+        points = np.abs(self.points) + 0.1
+        broken = points.copy()
+        broken[70, 0] = -1.0
+        path = tmp_path / 'jacobians.npy'
+        f = lambda x: sqrt(x[0]) * x[1]
+        with pytest.raises(ArithmeticError):
+            # The broken point leaves the domain of sqrt in chunk 2
+            write_jacobians(f, broken, path, chunk=32)
+        assert open(str(path) + '.progress').read().split() == ['2', '32']
+        np.lib.format.open_memmap(path, mode='r+')[:64] = 7.0
+        write_jacobians(f, points, path, chunk=32)
+        jacobian = np.load(path)
+        # Completed chunks are not recomputed
+        assert (jacobian[:64] == 7.0).all()
+        assert pytest.approx(np.sqrt(points[64:, 0])) == jacobian[64:, 0, 1]
+        with pytest.raises(ValueError):
+            write_jacobians(f, points, path, chunk=16)
+
+    @pytest.mark.parametrize('domain_policy', ['nan', 'clip'])
+    def test_first_row_out_of_domain(self, tmp_path, domain_policy):
+        points = np.abs(self.points) + 0.1
+        points[0, 0] = -1.0
+        path = tmp_path / 'jacobians.npy'
+        f = lambda x: sqrt(x[0]) * x[1]
+        values, jacobian, valid = write_jacobians(f, points, path, values_out=tmp_path / 'values.npy',
+                                                  valid_out=tmp_path / 'valid.npy', chunk=np.int64(32),
+                                                  domain_policy=domain_policy)
+        assert not valid[0] and valid[1:].all()
+        assert pytest.approx(np.sqrt(points[1:, 0])) == jacobian[1:, 0, 1]
+        assert open(str(path) + '.progress').read().split() == ['4', '32']
+        if domain_policy == 'nan':
+            assert np.isnan(values[0, 0])
+
+    def test_policy_and_shape_errors(self):
+        values, jacobian, valid = write_jacobians(lambda x: sqrt(x), np.array([4.0, -1.0]), np.empty((2, 1, 1)),
+                                                  values_out=np.empty((2, 1)), valid_out=np.empty(2, dtype=bool),
+                                                  domain_policy='nan')
+        assert list(valid) == [True, False]
+        assert pytest.approx(0.25) == jacobian[0, 0, 0]
+        with pytest.raises(ValueError):
+            write_jacobians(func, self.points, np.empty((100, 2, 2)))
+        with pytest.raises(TypeError):
+            write_jacobians(func, [[1.0, 2.0]], np.empty((1, 1, 2)))
@@ -0,0 +1,77 @@
+# Test code for src/bad_package/cache.py
+import os
+import subprocess
+import sys
+import pytest
+import numpy as np
+
+from bad_package.cache import TapeCache, cache_key
+from bad_package.elementary_functions import *
+
+def func(x):
+    return x[0]**2 + 3*x[1] + 5
+
+def other(x):
+    return x[0]**2 + 4*x[1] + 5
+
+def nested(x):
+    scale = (lambda v: 2*v) if 'a' in {'a', 'b', 'c'} else None
+    return sum(scale(x[i])**2 for i in range(2)) + sum([x[i] for i in range(2)])
+
+def nested_other(x):
+    scale = (lambda v: 3*v) if 'a' in {'a', 'b', 'c'} else None
+    return sum(scale(x[i])**2 for i in range(2)) + sum([x[i] for i in range(2)])
+
+class TestTapeCache():
+
+    def test_cache_key(self):
+        x = np.array([1.0, 2.0])
+        assert cache_key(func, x) == cache_key(func, x)
+        assert cache_key(func, x) != cache_key(other, x)
+        assert cache_key(func, x) != cache_key(func, np.array([1.0, 2.0, 3.0]))
+        assert cache_key(func, x) != cache_key([func, other], x)
+
+    def test_cache_key_across_processes(self):
+        # Nested code objects (lambdas, generator expressions, comprehensions) and set constants must not
+        # bring memory addresses or the hash seed into the key
+        x = np.array([1.0, 2.0])
+        script = 'import numpy as np, test_cache; print(test_cache.cache_key(test_cache.nested, np.array([1.0, 2.0])))'
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path), PYTHONHASHSEED='12345')
+        output = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=env, capture_output=True, text=True, check=True).stdout
+        assert output.strip() == cache_key(nested, x)
+        # The nested code still enters the key
+        assert cache_key(nested, x) != cache_key(nested_other, x)
+
+    def test_miss_then_hit(self, tmp_path):
+        cache = TapeCache(tmp_path / 'programs')
+        x = np.array([1.0, 2.0])
+        assert cache.load(func, x) is None
+
+        traced = cache.trace(func, x)
+        assert os.path.exists(cache.path(func, x))
+
+        loaded = cache.load(func, x)
+        assert loaded is not None
+        assert loaded.nodes == traced.nodes
+        values, jacobian = cache.trace(func, x).jacobian(np.array([3.0, 4.0]))
+        assert pytest.approx([26]) == values
+        assert pytest.approx([6, 3]) == jacobian[0]
+
+    def test_warm_restart_does_not_retrace(self, tmp_path):
+        calls = []
+        def counted(x):
+            calls.append(1)
+            return sin(x)
+        TapeCache(tmp_path).trace(counted, 1.0)
+        TapeCache(tmp_path).trace(counted, 1.0)
+        assert len(calls) == 1
+
+    def test_stores_optimized_program(self, tmp_path):
+        def repeated(x):
+            return x[0]**2 + x[0]**2
+        x = np.array([1.0, 2.0])
+        optimized = TapeCache(tmp_path / 'optimized').trace(repeated, x)
+        raw = TapeCache(tmp_path / 'raw', optimize=False).trace(repeated, x)
+        assert len(optimized) < len(raw)
+        assert pytest.approx(raw.jacobian(x)[1]) == optimized.jacobian(x)[1]
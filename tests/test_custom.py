@@ -0,0 +1,82 @@
+# Test code for src/bad_package/custom.py
+import pytest
+import numpy as np
+
+from bad_package.custom import CustomPrimitive, custom_jvp, custom_vjp
+from bad_package.elementary_functions import *
+from bad_package.fad import DualNumber
+from bad_package.interface import AutoDiff, ReverseAD
+from bad_package.rad import ReverseMode
+
+def newton_root(a, b):
+    # Root of x**3 + a*x - b by 200 Newton steps; only ever called with floats
+    assert type(a) is float and type(b) is float
+    x = 1.0
+    for _ in range(200):
+        x -= (x**3 + a*x - b) / (3*x**2 + a)
+    return x
+
+def exact_partials(a, b):
+    # Implicit function theorem on g(x, a, b) = x**3 + a*x - b = 0
+    x = newton_root(a, b)
+    return x, -x / (3*x**2 + a), 1 / (3*x**2 + a)
+
+def make_jvp():
+    root = custom_jvp(newton_root)
+    @root.defjvp
+    def root_jvp(primals, tangents):
+        x, da, db = exact_partials(*primals)
+        return x, da * tangents[0] + db * tangents[1]
+    return root
+
+def make_vjp():
+    root = custom_vjp(newton_root)
+    def root_fwd(a, b):
+        x, da, db = exact_partials(a, b)
+        return x, (da, db)
+    def root_bwd(residuals, cotangent):
+        return cotangent * residuals[0], cotangent * residuals[1]
+    root.defvjp(root_fwd, root_bwd)
+    return root
+
+class TestCustom():
+
+    @pytest.mark.parametrize('make', [make_jvp, make_vjp])
+    def test_both_modes(self, make):
+        root = make()
+        assert isinstance(root, CustomPrimitive) and root.__name__ == 'newton_root'
+        def f(x):
+            return root(x[0], x[1]) * sin(x[0]) + 2.0
+        point = np.array([1.5, 4.0])
+        x, da, db = exact_partials(1.5, 4.0)
+        expected = [da * np.sin(1.5) + x * np.cos(1.5), db * np.sin(1.5)]
+        assert pytest.approx(expected) == AutoDiff(f, point).get_jacobian()[0]
+        assert pytest.approx(expected) == ReverseAD(f, point).get_jacobian()[0]
+
+    def test_one_node(self):
+        root = make_vjp()
+        a, b = ReverseMode(1.5), ReverseMode(4.0)
+        z = root(a, b)
+        assert len(a.child) == 1 and len(b.child) == 1 and a.child[0][1] is z
+
+    def test_constant_arguments(self):
+        root = make_jvp()
+        x, da, db = exact_partials(1.5, 4.0)
+        assert root(1.5, 4) == pytest.approx(x)
+        assert pytest.approx(db) == root(1.5, DualNumber(4.0)).dual
+        b = ReverseMode(4.0)
+        z = root(np.float64(1.5), b)
+        z.gradient = 1.0
+        assert pytest.approx(db) == b.grad()
+
+    def test_errors(self):
+        root = custom_jvp(newton_root)
+        with pytest.raises(TypeError):
+            root(DualNumber(1.5), 4.0)
+        root = make_jvp()
+        with pytest.raises(TypeError):
+            root(DualNumber(1.5), ReverseMode(4.0))
+        with pytest.raises(TypeError):
+            root('a', 4.0)
+        with pytest.raises(TypeError):
+            custom_vjp(3.0)
@@ -52,6 +52,10 @@ class TestElementaryFunctions():
             ln(0)
             ln(-1)
 
+        # Defined below 1 as well
+        assert np.log(0.5) == ln(0.5)
+        assert pytest.approx(1/0.5) == ln(DualNumber(0.5)).dual
+
         with pytest.raises(ArithmeticError):
             ln(DualNumber(-1, -1))
             ln(ReverseMode(-1))
@@ -206,6 +210,8 @@ class TestElementaryFunctions():
         x = ReverseMode(4)
         result = cot(x)
         assert 1/tan(4) == result.real
+        result.gradient = 1.0
+        assert pytest.approx(-((1/np.sin(4))**2)) == x.grad()
 
         # General
         with pytest.raises(ArithmeticError):
@@ -381,4 +387,81 @@ class TestElementaryFunctions():
         with pytest.raises(ArithmeticError):
             sqrt(DualNumber(-1))
             sqrt(-1)
-            sqrt(ReverseMode(-0.5))
\ No newline at end of file
+            sqrt(ReverseMode(-0.5))
+
+    def test_numpy_scalars(self):
+        assert pytest.approx(np.sin(1.0)) == sin(np.float32(1.0))
+        assert pytest.approx(np.exp(2.0)) == exp(np.int64(2))
+        with pytest.raises(TypeError):
+            sin(np.bool_(True))
+
+    def test_value_and_derivative_domains(self):
+        # The value of sqrt, arcsin and arccosh exists on the boundary, their derivative does not
+        assert sqrt(0) == 0.0 and arcsin(1.0) == pytest.approx(pi/2) and arccosh(1) == 0.0
+        for f, x in ((sqrt, 0.0), (arcsin, 1.0), (arccosh, 1.0), (arctanh, 1.0)):
+            with pytest.raises(ArithmeticError):
+                f(DualNumber(x))
+            with pytest.raises(ArithmeticError):
+                f(ReverseMode(x))
+
+class TestDefinePrimitive():
+
+    def setup_method(self):
+        from bad_package import kernels
+        self.kernels = kernels
+        self.softplus = define_primitive('test_softplus', lambda x, p: np.logaddexp(0.0, x),
+                                         lambda x, v, p: 1.0 / (1.0 + np.exp(-x)))
+        self.rsqrt = define_primitive('test_rsqrt', lambda x, p: 1.0 / np.sqrt(x),
+                                      lambda x, v, p: -0.5 * v / x, lambda x, p: x > 0)
+
+    def teardown_method(self):
+        for name in ('test_softplus', 'test_rsqrt'):
+            del self.kernels.KERNELS[name]
+
+    def test_every_mode(self):
+        from bad_package.arena import Arena
+        from bad_package.lazy import variables
+        from bad_package.tape import trace
+        assert self.softplus.__name__ == 'test_softplus'
+        assert pytest.approx(np.log(2)) == self.softplus(0)
+        assert pytest.approx(0.5) == self.softplus(DualNumber(0.0)).dual
+        x = ReverseMode(0.0)
+        z = self.softplus(x)
+        z.gradient = 1.0
+        assert pytest.approx(0.5) == x.grad()
+        arena = Arena()
+        node = arena.variable(0.0)
+        assert pytest.approx([0.5]) == arena.gradient(self.softplus(node), [node])
+        values, jacobian = trace(lambda x: self.softplus(x) * x, 0.0).jacobian(np.array([0.0, 1.0]))
+        assert pytest.approx([np.log(2), np.log1p(np.e) + 1 / (1 + np.exp(-1))]) == jacobian[:, 0, 0]
+        (v,) = variables(1)
+        assert pytest.approx(0.5) == self.softplus(v).evaluate(0.0, order=1)[1][0]
+
+    def test_domain(self):
+        from bad_package.tape import trace
+        assert pytest.approx(-0.0625) == self.rsqrt(DualNumber(4.0)).dual
+        with pytest.raises(ArithmeticError):
+            self.rsqrt(-1.0)
+        with pytest.raises(ArithmeticError):
+            self.rsqrt(DualNumber(0.0))
+        values, valid = trace(self.rsqrt, 1.0).evaluate([4.0, -1.0], domain_policy='nan')
+        assert list(valid) == [True, False]
+
+    def test_save_load(self, tmp_path):
+        from bad_package.tape import Tape, trace
+        tape = trace(lambda x: self.rsqrt(x) + sin(x), 1.0)
+        tape.save(tmp_path / 'tape.npz')
+        loaded = Tape.load(tmp_path / 'tape.npz')
+        assert loaded.nodes == tape.nodes
+        del self.kernels.KERNELS['test_rsqrt']
+        try:
+            with pytest.raises(ValueError):
+                Tape.load(tmp_path / 'tape.npz')
+        finally:
+            self.kernels.register('test_rsqrt', lambda x, p: 1.0 / np.sqrt(x), lambda x, v, p: -0.5 * v / x)
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            define_primitive('sin', np.sin, lambda x, v, p: np.cos(x))
+        with pytest.raises(TypeError):
+            define_primitive('test_bad', 1.0, lambda x, v, p: x)
@@ -120,4 +120,25 @@ class TestDualNumber:
         x = DualNumber(2, 1)
         y = 2**x
         assert y.real == 4
-        assert y.dual == np.log(2)*2 ** 2
\ No newline at end of file
+        assert y.dual == np.log(2)*2 ** 2
+
+    def test_rtruediv_dual(self):
+        # Direct call with a DualNumber numerator matches the forward operator
+        y = DualNumber(2, 3).__rtruediv__(DualNumber(10, 7))
+        assert y.real == 5
+        assert pytest.approx(-4.0) == y.dual
+
+    def test_numpy_scalars(self):
+        x = DualNumber(np.float32(2), np.int64(1))
+        assert type(x.real) is float and type(x.dual) is int
+        y = x * np.float32(3) + np.int64(1)
+        assert y.real == 7 and y.dual == 3
+        y = np.float64(2)**x
+        assert pytest.approx(4) == y.real
+        assert pytest.approx(np.log(2)*4) == y.dual
+
+    def test_unsupported_operand_returns_notimplemented(self):
+        assert DualNumber(1, 1).__add__('1') is NotImplemented
+        assert DualNumber(1, 1).__rmul__(None) is NotImplemented
+        with pytest.raises(TypeError):
+            DualNumber(1, 1) * None
@@ -0,0 +1,60 @@
+# Test code for src/bad_package/gc_control.py
+import gc
+import pytest
+import numpy as np
+
+from bad_package.gc_control import gc_paused, get_gc_policy, managed_gc, set_gc_policy
+from bad_package.elementary_functions import *
+from bad_package.interface import ReverseAD
+
+class TestGCControl():
+
+    def test_paused_and_restored(self):
+        assert gc.isenabled()
+        with gc_paused():
+            assert not gc.isenabled()
+            with gc_paused():
+                assert not gc.isenabled()
+            # The inner pause does not re-enable the collector early
+            assert not gc.isenabled()
+        assert gc.isenabled()
+
+    def test_stays_disabled_if_disabled_before(self):
+        gc.disable()
+        try:
+            with gc_paused():
+                pass
+            assert not gc.isenabled()
+        finally:
+            gc.enable()
+
+    def test_restored_on_error(self):
+        with pytest.raises(ArithmeticError):
+            with gc_paused():
+                ln(-1.0)
+        assert gc.isenabled()
+
+    def test_policy(self):
+        assert get_gc_policy() == 'pause'
+        try:
+            set_gc_policy('default')
+            with managed_gc():
+                assert gc.isenabled()
+        finally:
+            set_gc_policy('pause')
+        with managed_gc():
+            assert not gc.isenabled()
+        with pytest.raises(ValueError):
+            set_gc_policy('never')
+
+    def test_reversead_pauses_and_creates_no_cycles(self):
+        states = []
+        def f(x):
+            states.append(gc.isenabled())
+            return sin(x[0]) * x[1] + x[0]**2
+        gc.collect()
+        rm = ReverseAD(f, np.array([1.0, 2.0]))
+        assert states == [False] and gc.isenabled()
+        assert pytest.approx([2*np.cos(1) + 2, np.sin(1)]) == rm.get_jacobian()[0]
+        # The graph is freed by reference counting alone
+        assert gc.collect() == 0
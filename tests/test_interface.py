@@ -6,6 +6,8 @@ from bad_package.elementary_functions import *
 from bad_package.fad import DualNumber
 from bad_package.interface import AutoDiff
 from bad_package.interface import ReverseAD
+from bad_package.interface import grad
+from bad_package.rad import no_grad
 
 class TestADInterface():
 
@@ -217,7 +219,7 @@ class TestADInterface():
         x = np.array([2.5])
         rm = ReverseAD(f, x)
         result = rm.get_jacobian()
-        assert pytest.approx([((-1/sin(2.5)))**2]) == result
+        assert pytest.approx([-(1/sin(2.5))**2]) == result
 
     def test_vector_1arg_sinh_jacobian_RM(self):
         def ef1(x):
@@ -363,7 +365,7 @@ class TestADInterface():
         rm = ReverseAD(func, x)
         result = rm.get_jacobian()
         assert pytest.approx([0, np.sin(4), 2*np.cos(4)]) == result[0]
-        # assert pytest.approx([-1, 0, -1]) == result[1]
+        assert pytest.approx([-1, 0, -1]) == result[1]
         assert pytest.approx([2, 1, 0]) == result[2]
 
     def test_multiple_functions_forward(x):
@@ -380,4 +382,185 @@ class TestADInterface():
         result = rm.get_jacobian()
         assert pytest.approx([0, np.sin(4), 2*np.cos(4)]) == result[0]
         assert pytest.approx([-1, 0, -1]) == result[1]
-        assert pytest.approx([2, 1, 0]) == result[2]
\ No newline at end of file
+        assert pytest.approx([2, 1, 0]) == result[2]
+
+class TestGrad():
+
+    def test_vector(self):
+        def loss(w):
+            return sum((w[i] - i)**2 for i in range(len(w))) + sin(w[0] * w[1])
+        w = np.linspace(-1, 1, 50)
+        gradient = grad(loss)(w)
+        expected = 2 * (w - np.arange(50))
+        expected[0] += np.cos(w[0] * w[1]) * w[1]
+        expected[1] += np.cos(w[0] * w[1]) * w[0]
+        assert gradient.shape == (50,)
+        assert pytest.approx(expected) == gradient
+
+    def test_matches_reversead(self):
+        def f(x):
+            return x[0]**3 - x[0]*x[2] + exp(x[1]) / x[2]
+        x = np.array([1.0, 2.0, 4.0])
+        assert pytest.approx(ReverseAD(f, x).get_jacobian()[0]) == grad(f)(x)
+
+    def test_scalar_and_out(self):
+        g = grad(lambda x: x**3)
+        assert pytest.approx(12.0) == g(2)
+        out = np.empty(2)
+        result = grad(lambda x: x[0] * x[1])([3.0, 4.0], out=out)
+        assert result is out
+        assert pytest.approx([4.0, 3.0]) == out
+        # Repeated calls reuse the arena of the returned function
+        assert pytest.approx([2.0, 1.0]) == grad(lambda x: x[0] * x[1])([1.0, 2.0])
+        assert pytest.approx(27.0) == g(3.0)
+
+    def test_constant_function(self):
+        assert pytest.approx([0.0, 0.0]) == grad(lambda x: 1.0)([1.0, 2.0])
+
+    def test_errors(self):
+        with pytest.raises(TypeError):
+            grad('f')
+        with pytest.raises(TypeError):
+            grad(lambda x: [x[0], x[1]])([1.0, 2.0])
+        with pytest.raises(TypeError):
+            grad(lambda x: x)('1')
+        with pytest.raises(TypeError):
+            grad(lambda x: x)([])
+
+class TestWrt():
+
+    def f(self, x):
+        return x[0]**2 * sin(x[3]) + exp(x[1]) / x[2]
+
+    def g(self, x):
+        return x[1] * x[2]
+
+    def test_subset_matches_full_jacobian(self):
+        x = np.array([1.5, 0.5, 2.0, 0.3])
+        full = np.array(AutoDiff([self.f, self.g], x).get_jacobian())
+        for wrt in ([3, 0], [True, False, False, True], 2, [-1]):
+            columns = np.arange(4)[wrt] if np.asarray(wrt).dtype == bool else np.atleast_1d(wrt)
+            expected = full[:, columns]
+            ad = AutoDiff([self.f, self.g], x, wrt=wrt)
+            rm = ReverseAD(np.array([self.f, self.g]), x, wrt=wrt)
+            assert pytest.approx(AutoDiff([self.f, self.g], x).get_primal()) == ad.get_primal()
+            for row, ad_row, rm_row in zip(expected, ad.get_jacobian(), rm.get_jacobian()):
+                assert pytest.approx(list(row)) == ad_row
+                assert pytest.approx(list(row)) == rm_row
+
+    def test_passive_inputs_are_floats(self):
+        seen = []
+        def f(x):
+            seen.append([type(v).__name__ for v in x])
+            return x[0] * x[1]
+        AutoDiff(f, np.array([1.0, 2.0]), wrt=[1])
+        ReverseAD(f, np.array([1.0, 2.0]), wrt=[1])
+        assert seen[0] == ['float', 'DualNumber'] and seen[-1] == ['float', 'ReverseMode']
+        # One primal pass and one pass per variable in wrt
+        assert len(seen) == 2 + 1
+
+    def test_independent_of_wrt(self):
+        x = np.array([1.5, 0.5, 2.0, 0.3])
+        assert AutoDiff(self.g, x, wrt=[0, 3]).get_jacobian() == [[0.0, 0.0]]
+        assert ReverseAD(self.g, x, wrt=[0, 3]).get_jacobian() == [[0.0, 0.0]]
+
+    def test_invalid_wrt(self):
+        x = np.array([1.0, 2.0])
+        for wrt in ([2], [0, 0], [], [False, False], [True]):
+            with pytest.raises(ValueError):
+                AutoDiff(self.g, x, wrt=wrt)
+            with pytest.raises(ValueError):
+                ReverseAD(self.g, x, wrt=wrt)
+        with pytest.raises(TypeError):
+            AutoDiff(self.g, x, wrt=[0.5])
+
+class TestValuesOnly():
+
+    def f(self, x):
+        return x[0] * exp(x[1]) - sin(x[2])
+
+    def test_values_match(self):
+        x = np.array([1.5, 0.5, 2.0])
+        expected = AutoDiff(self.f, x).get_primal()
+        assert pytest.approx(expected) == AutoDiff(self.f, x, values_only=True).get_primal()
+        assert pytest.approx(expected) == ReverseAD(self.f, x, values_only=True).get_primal()
+        assert pytest.approx(expected) == ReverseAD(self.f, x).get_primal()
+        assert pytest.approx(np.sin(0.3)) == ReverseAD(sin, 0.3, values_only=True).get_primal()
+        assert pytest.approx([np.sin(0.3), np.cos(0.3)]) == ReverseAD(np.array([sin, cos]), 0.3, values_only=True).get_primal()
+
+    def test_single_float_call(self):
+        seen = []
+        def f(x):
+            seen.append([type(v).__name__ for v in x])
+            return x[0] * x[1]
+        AutoDiff(f, np.array([1.0, 2.0]), values_only=True)
+        ReverseAD(f, np.array([1.0, 2.0]), values_only=True)
+        assert seen == [['float', 'float'], ['float', 'float']]
+
+    def test_no_grad(self):
+        with no_grad():
+            ad = AutoDiff(self.f, np.array([1.5, 0.5, 2.0]))
+            rm = ReverseAD(self.f, np.array([1.5, 0.5, 2.0]))
+        assert ad.values_only and rm.values_only
+        with pytest.raises(ValueError):
+            ad.get_jacobian()
+        with pytest.raises(ValueError):
+            rm.get_jacobian()
+        assert not AutoDiff(self.f, np.array([1.5, 0.5, 2.0])).values_only
+
+    def test_invalid(self):
+        with pytest.raises(TypeError):
+            ReverseAD('f', 1.0, values_only=True)
+        with pytest.raises(TypeError):
+            ReverseAD(sin, np.array([]), values_only=True)
+        with pytest.raises(TypeError):
+            ReverseAD(sin, '1', values_only=True)
+
+class TestSeed():
+
+    def f(self, x):
+        return x[0]**2 * sin(x[3]) + exp(x[1]) / x[2] - 2**x[0] + x[2]**x[1]
+
+    def g(self, x):
+        return x[1] * x[2] - sqrt(x[3])
+
+    def test_matches_jacobian_product(self):
+        x = np.array([1.5, 0.5, 2.0, 0.3])
+        seed = np.random.default_rng(0).normal(size=(4, 3))
+        expected = np.array(AutoDiff([self.f, self.g], x).get_jacobian()) @ seed
+        ad = AutoDiff([self.f, self.g], x, seed=seed)
+        assert pytest.approx(AutoDiff([self.f, self.g], x).get_primal()) == ad.get_primal()
+        for row, expected_row in zip(ad.get_jacobian(), expected):
+            assert pytest.approx(list(expected_row)) == row
+        # With wrt, the seed has one row per selected variable
+        expected = np.array(AutoDiff([self.f, self.g], x, wrt=[3, 1]).get_jacobian()) @ seed[:2]
+        ad = AutoDiff([self.f, self.g], x, wrt=[3, 1], seed=seed[:2])
+        for row, expected_row in zip(ad.get_jacobian(), expected):
+            assert pytest.approx(list(expected_row)) == row
+
+    def test_one_pass(self):
+        seen = []
+        def f(x):
+            seen.append([type(v).__name__ for v in x])
+            return self.g(x)
+        seed = np.array([[1.0, 2.0], [0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+        ad = AutoDiff(f, np.array([1.5, 0.5, 2.0, 0.3]), seed=seed)
+        # Gradient [0, 2, 0.5, -0.5/sqrt(0.3)] times the seed
+        assert pytest.approx([0.5, -0.5 / np.sqrt(0.3)]) == ad.get_jacobian()[0]
+        # Variables with a zero seed row are passed as plain floats
+        assert seen == [['DualNumber', 'float', 'DualNumber', 'DualNumber']]
+
+    def test_scalar_and_constant(self):
+        assert AutoDiff(lambda t: t**3, 2.0, seed=[[1.0, 2.0]]).get_jacobian() == [12.0, 24.0]
+        ad = AutoDiff([lambda x: 1.0, self.g], np.array([1.5, 0.5, 2.0, 0.3]), seed=np.zeros((4, 2)))
+        assert ad.get_jacobian() == [[0.0, 0.0], [0.0, 0.0]]
+
+    def test_invalid_seed(self):
+        x = np.array([1.0, 2.0])
+        for seed in (np.ones(2), np.ones((3, 2)), np.ones((2, 2, 1))):
+            with pytest.raises(ValueError):
+                AutoDiff(self.g, x, seed=seed)
+        with pytest.raises(ValueError):
+            AutoDiff(self.g, x, wrt=[1], seed=np.ones((2, 2)))
+        with pytest.raises(ValueError):
+            AutoDiff(self.g, x, seed=np.ones((2, 2)), tangents='sparse')
@@ -0,0 +1,112 @@
+# Test code for src/bad_package/kernels.py
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+
+from bad_package import elementary_functions
+from bad_package.fad import DualNumber
+from bad_package.kernels import KERNELS, PAIRS, value, value_and_derivative
+
+# A point inside the domain of every elementary function
+POINT = 0.4
+
+class TestKernels():
+
+    @pytest.mark.parametrize('name', sorted(set(KERNELS) - {'neg', 'arccosh', 'logBase'}))
+    def test_matches_dual_numbers(self, name):
+        x = np.array([POINT, POINT / 2, POINT / 3])
+        values, derivatives, valid = value_and_derivative(name, x)
+        assert valid.all()
+        for xi, vi, di in zip(x, values, derivatives):
+            expected = getattr(elementary_functions, name)(DualNumber(float(xi)))
+            assert pytest.approx(expected.real) == vi
+            assert pytest.approx(expected.dual) == di
+
+    @pytest.mark.parametrize('name', sorted(PAIRS))
+    def test_pairs(self, name):
+        partner, sign = PAIRS[name]
+        x = np.linspace(-2, 2, 9)
+        np.testing.assert_allclose(value_and_derivative(name, x)[1], sign * value(partner, x)[0], rtol=1e-15)
+
+    def test_special_signatures(self):
+        values, derivatives, valid = value_and_derivative('logBase', np.array([4.0, 8.0]), 2.0)
+        assert pytest.approx([2.0, 3.0]) == values
+        assert pytest.approx([1 / (4 * np.log(2)), 1 / (8 * np.log(2))]) == derivatives
+
+        values, derivatives, valid = value_and_derivative('arccosh', np.array([2.0]))
+        assert pytest.approx([np.arccosh(2.0)]) == values
+        assert pytest.approx([1 / np.sqrt(3.0)]) == derivatives
+
+        values, derivatives, valid = value_and_derivative('neg', np.array([2.0]))
+        assert pytest.approx([-2.0]) == values
+        assert pytest.approx([-1.0]) == derivatives
+
+    def test_domain_mask(self):
+        x = np.array([4.0, -1.0, 0.0, 9.0])
+        values, derivatives, valid = value_and_derivative('sqrt', x)
+        assert list(valid) == [True, False, False, True]
+        assert pytest.approx([2.0, 3.0]) == values[valid]
+        assert np.isnan(values[~valid]).all()
+        assert np.isnan(derivatives[~valid]).all()
+
+        values, valid = value('arcsin', np.array([0.5, 1.5]))
+        assert list(valid) == [True, False]
+        assert np.isnan(values[1])
+
+    def test_scalar_input(self):
+        values, valid = value('ln', -1.0)
+        assert not valid
+        assert np.isnan(values)
+
+    def test_dtype_preserved(self):
+        values, derivatives, valid = value_and_derivative('exp', np.ones(3, dtype=np.float32))
+        assert values.dtype == np.float32
+        assert derivatives.dtype == np.float32
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            value('gamma', 1.0)
+
+    def test_threads(self):
+        chunks = [np.linspace(-0.9, 0.9, 10000) + i * 1e-6 for i in range(8)]
+        serial = [value_and_derivative('arcsin', chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            threaded = list(pool.map(lambda chunk: value_and_derivative('arcsin', chunk), chunks))
+        for (v1, d1, m1), (v2, d2, m2) in zip(serial, threaded):
+            assert np.array_equal(v1, v2)
+            assert np.array_equal(d1, d2)
+            assert np.array_equal(m1, m2)
+
+class TestDomainPolicies():
+
+    def test_raise(self):
+        with pytest.raises(ArithmeticError):
+            value('ln', np.array([1.0, -1.0]), domain_policy='raise')
+        values, valid = value('ln', np.array([1.0, 2.0]), domain_policy='raise')
+        assert valid.all()
+
+    def test_nan(self):
+        values, derivatives, valid = value_and_derivative('arccosh', np.array([2.0, 0.5]), domain_policy='nan')
+        assert list(valid) == [True, False]
+        assert np.isnan(values[1]) and np.isnan(derivatives[1])
+
+    def test_clip(self):
+        x = np.array([-3.0, 0.5, 3.0])
+        values, derivatives, valid = value_and_derivative('arcsin', x, domain_policy='clip')
+        assert list(valid) == [False, True, False]
+        assert np.isfinite(values).all() and np.isfinite(derivatives).all()
+        assert pytest.approx([-np.pi / 2, np.arcsin(0.5), np.pi / 2]) == values
+
+        values, derivatives, valid = value_and_derivative('sqrt', np.array([-1.0, 0.0]), domain_policy='clip')
+        assert np.isfinite(derivatives).all()
+        assert (values >= 0).all()
+
+    def test_clip_poles_fall_back_to_nan(self):
+        values, derivatives, valid = value_and_derivative('tan', np.array([np.pi / 2, 1.0]), domain_policy='clip')
+        assert list(valid) == [False, True]
+        assert np.isnan(values[0])
+        assert pytest.approx(np.tan(1.0)) == values[1]
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            value('exp', 1.0, domain_policy='ignore')
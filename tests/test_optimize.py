@@ -0,0 +1,78 @@
+# Test code for src/bad_package/optimize.py
+import pytest
+import numpy as np
+
+from bad_package.elementary_functions import *
+from bad_package.optimize import eliminate_common_subexpressions, eliminate_dead_code, fold_constants, optimize
+from bad_package.tape import trace
+
+def _ops(tape):
+    return [op for op, args, param in tape.nodes]
+
+class TestOptimize():
+
+    def test_cse_merges_repeated_terms(self):
+        def func(x):
+            return x[0]**2 * x[1] + x[0]**2 * 3 + sin(x[1]) * sin(x[1])
+        tape = trace(func, [1.0, 2.0])
+        merged = eliminate_common_subexpressions(tape)
+        assert _ops(tape).count('pow') == 2
+        assert _ops(merged).count('pow') == 1
+        assert _ops(merged).count('sin') == 1
+        assert len(merged) < len(tape)
+
+    def test_cse_commutative(self):
+        tape = trace(lambda x: x[0]*x[1] + x[1]*x[0], [1.0, 2.0])
+        assert _ops(eliminate_common_subexpressions(tape)).count('mul') == 1
+
+    def test_cse_keeps_non_commutative_order(self):
+        tape = trace(lambda x: x[0]/x[1] + x[1]/x[0], [1.0, 2.0])
+        assert _ops(eliminate_common_subexpressions(tape)).count('div') == 2
+
+    def test_fold_constant_subgraph(self):
+        # exp(pi * e) * x, with the constant-only branch recorded on the tape
+        tape = trace(lambda x: x, 2.0)
+        a, b = tape.constant(pi), tape.constant(e)
+        product = tape._append('mul', (a, b))
+        power = tape._append('exp', (product,))
+        tape.outputs = [tape._append('mul', (power, 0))]
+        folded = optimize(tape)
+        assert _ops(folded) == ['input', 'const', 'mul']
+        assert pytest.approx(np.exp(pi * e) * 2.0) == folded.evaluate(2.0)[0]
+
+    def test_fold_identities(self):
+        tape = trace(lambda x: (x*1 + 0) / 1, 2.0)
+        folded = eliminate_dead_code(fold_constants(tape))
+        assert _ops(folded) == ['input']
+        assert pytest.approx(1.0) == folded.jacobian(2.0)[1][0, 0]
+
+    def test_fold_keeps_domain_errors(self):
+        tape = trace(lambda x: x + 0*x, 2.0)
+        tape.nodes.append(('const', (), -1.0))
+        tape.nodes.append(('sqrt', (len(tape.nodes) - 1,), None))
+        tape.outputs.append(len(tape.nodes) - 1)
+        folded = optimize(tape)
+        assert 'sqrt' in _ops(folded)
+        with pytest.raises(ArithmeticError):
+            folded.evaluate(2.0)
+
+    def test_dead_code(self):
+        tape = trace(lambda x: x[0] + x[1], [1.0, 2.0])
+        tape.nodes.append(('exp', (0,), None))
+        pruned = eliminate_dead_code(tape)
+        assert 'exp' not in _ops(pruned)
+        assert pruned.n_inputs == 2
+
+    def test_optimize_preserves_results(self):
+        def f1(x):
+            return exp(x[0]**2) * x[0]**2 + logBase(x[1], 2) * pi - e
+        def f2(x):
+            return sqrt(x[0]**2 + x[1]**2) + 0 * x[0]
+        tape = trace([f1, f2], [0.5, 3.0])
+        optimized = optimize(tape)
+        assert len(optimized) < len(tape)
+        points = np.array([[0.5, 3.0], [1.5, 0.25], [-2.0, 7.0]])
+        values, jacobian = tape.jacobian(points)
+        opt_values, opt_jacobian = optimized.jacobian(points)
+        assert pytest.approx(values.ravel()) == opt_values.ravel()
+        assert pytest.approx(jacobian.ravel()) == opt_jacobian.ravel()
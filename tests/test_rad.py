@@ -1,5 +1,6 @@
 import pytest
-from bad_package.rad import ReverseMode
+import threading
+from bad_package.rad import ReverseMode, is_grad_enabled, no_grad
 from bad_package.fad import DualNumber
 import numpy as np
 
@@ -310,3 +311,93 @@ class TestReverseMode:
             [1,2,3] ** rm
             (1,2) ** rm
             DualNumber(2) ** rm
+
+    def test_mul_gradient(self):
+        # Both factors receive the other factor as their partial; the product node is not seeded
+        x, y = ReverseMode(3.0), ReverseMode(4.0)
+        z = x * y + x
+        z.gradient = 1.0
+        assert x.grad() == 5.0
+        assert y.grad() == 3.0
+
+    def test_numpy_scalars(self):
+        rm = ReverseMode(np.float32(2))
+        assert type(rm.real) is float
+        res = rm * np.int64(3) - np.float64(1)
+        assert res.real == 5
+        res.gradient = 1.0
+        assert rm.grad() == 3
+        assert rm.__add__('a') is NotImplemented
+
+class TestBackwardSweep:
+
+    def test_dead_branches(self):
+        x = ReverseMode(2.0)
+        y = ReverseMode(3.0)
+        unused = (x * y) ** 2 + x
+        z = x * y + 1
+        later = z * x
+        z.gradient = 1.0
+        assert x.grad() == 3.0 and y.grad() == 2.0
+        # Branches that do not reach z end with a zero adjoint and do not contribute to the sum
+        assert unused.grad() == 0
+        x.child.append((float('inf'), ReverseMode(1.0)))
+        x.gradient = None
+        assert x.grad() == 3.0
+
+    def test_deep_chain(self):
+        # grad() takes one frame per node, so a 600 node chain fits under the default recursion limit
+        x = ReverseMode(1.0)
+        z = x
+        for _ in range(600):
+            z = z * 1.0
+        z.gradient = 1.0
+        assert x.grad() == 1.0
+
+    def test_high_fan_in_sum(self):
+        b = ReverseMode(1.0)
+        terms = [b * 1e16] + [b * 1.0 for _ in range(1022)] + [b * -1e16]
+        for term in terms:
+            term.gradient = 1.0
+        # Left to right, every 1.0 would be lost against 1e16
+        assert b.grad() == 1022.0
+        b.gradient = None
+        terms[0].gradient = float('inf')
+        terms[-1].gradient = float('inf')
+        assert np.isnan(b.grad())
+
+class TestNoGrad:
+
+    def test_nothing_recorded(self):
+        with no_grad():
+            assert not is_grad_enabled()
+            x = ReverseMode(2.0)
+            y = x * 3 + x ** 2
+            assert y.real == 10.0
+            assert len(x.child) == 0 and len(y.child) == 0
+        assert is_grad_enabled()
+        x = ReverseMode(2.0)
+        y = x * 3
+        assert len(x.child) == 1
+
+    def test_outer_nodes_keep_gradient(self):
+        x = ReverseMode(2.0)
+        z = x * x
+        with no_grad():
+            with no_grad():
+                unused = x * 5 + 1
+            assert not is_grad_enabled()
+        z.gradient = 1.0
+        assert x.grad() == 4.0
+
+    def test_thread_local(self):
+        seen = []
+        def other_thread():
+            x = ReverseMode(1.0)
+            y = x * 2
+            seen.append((is_grad_enabled(), len(x.child)))
+        with no_grad():
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            thread.join()
+        assert seen == [(True, 1)]
@@ -0,0 +1,99 @@
+# Test code for src/bad_package/reductions.py
+import pytest
+import numpy as np
+
+from bad_package import reductions as rd
+from bad_package.elementary_functions import *
+from bad_package.fad import DualNumber
+from bad_package.rad import ReverseMode
+from bad_package.interface import AutoDiff, ReverseAD, grad
+from bad_package.lazy import variables
+from bad_package.tape import trace
+
+def f(x):
+    return rd.logsumexp([x[0] * x[1], x[1], 3.0]) + rd.prod(x) + rd.mean(x) + rd.dot(x, [x[1], 2.0]) + rd.softmax(x)[0]
+
+def jacobian_f(x):
+    a, b = x
+    terms = np.exp([a * b, b, 3.0])
+    s = terms / terms.sum()
+    soft = np.exp(a) / (np.exp(a) + np.exp(b))
+    return [s[0] * b + b + 0.5 + b + soft * (1 - soft), s[0] * a + s[1] + a + 0.5 + a + 2.0 - soft * (1 - soft)]
+
+class TestReductions():
+
+    def test_values(self):
+        assert rd.sum([1, 2.5, np.float32(0.5)]) == 4.0
+        assert rd.sum(np.arange(4)) == 6.0
+        assert rd.sum([]) == 0.0 and rd.prod([]) == 1.0
+        assert rd.prod([2.0, 3, 4.0]) == 24.0
+        assert rd.mean([1.0, 2.0, 6.0]) == 3.0
+        assert rd.dot([1.0, 2.0], np.array([3.0, 4.0])) == 11.0
+        assert pytest.approx(np.log(np.sum(np.exp([1.0, 2.0, 3.0])))) == rd.logsumexp([1.0, 2.0, 3.0])
+        assert pytest.approx(1000 + np.log(2)) == rd.logsumexp([1000.0, 1000.0])
+        assert pytest.approx(np.exp([1.0, 2.0]) / np.exp([1.0, 2.0]).sum()) == rd.softmax([1.0, 2.0])
+        # Correctly rounded sum
+        assert rd.sum([1e16, 1.0, -1e16]) == 1.0
+
+    def test_single_node(self):
+        x = [ReverseMode(float(i)) for i in range(5)]
+        z = rd.sum(x)
+        assert all(len(xi.child) == 1 and xi.child[0][1] is z for xi in x)
+        assert z.real == 10.0 and z.child == []
+
+    def test_prod_partials_with_zero(self):
+        x = [ReverseMode(v) for v in (2.0, 0.0, 3.0)]
+        z = rd.prod(x)
+        z.gradient = 1.0
+        assert [xi.grad() for xi in x] == [0.0, 6.0, 0.0]
+        d = rd.prod([DualNumber(2.0, 0), DualNumber(0.0, 1), 3.0])
+        assert d.real == 0.0 and d.dual == 6.0
+
+    def test_all_modes_agree(self):
+        point = np.array([0.3, 1.2])
+        expected = jacobian_f(point)
+        assert pytest.approx(expected) == AutoDiff(f, point).get_jacobian()[0]
+        assert pytest.approx(expected) == ReverseAD(f, point).get_jacobian()[0]
+        assert pytest.approx(expected) == grad(f)(point)
+        assert pytest.approx(expected) == trace(f, point).jacobian(point)[1][0]
+        values, jacobian = rd.logsumexp(variables(2)).evaluate(point, order=1)
+        assert pytest.approx(np.exp(point) / np.exp(point).sum()) == jacobian
+
+    def test_large_sum_reverse_mode(self):
+        # One level per reduction, so 10**4 terms stay far below the recursion limit
+        def loss(w):
+            return rd.sum([(w[0] * i + w[1] - 2.0 * i) ** 2 for i in range(10000)])
+        jacobian = ReverseAD(loss, np.array([1.0, 0.5])).get_jacobian()[0]
+        i = np.arange(10000)
+        assert pytest.approx([np.sum(2 * (0.5 - i) * i), np.sum(2 * (0.5 - i))]) == jacobian
+
+    def test_softmax_gradient(self):
+        x = [ReverseMode(v) for v in (1.0, 2.0, 3.0)]
+        s = rd.softmax(x)
+        s[2].gradient = 1.0
+        expected = np.exp([1.0, 2.0, 3.0]) / np.exp([1.0, 2.0, 3.0]).sum()
+        assert pytest.approx(expected[2] * (np.eye(3)[2] - expected)) == [xi.grad() for xi in x]
+
+    def test_logsumexp_all_minus_inf(self):
+        assert rd.logsumexp([-np.inf, -np.inf]) == -np.inf
+        z = rd.logsumexp([DualNumber(-np.inf, 1.0), -np.inf])
+        assert z.real == -np.inf and z.dual == 0.0
+        x = [ReverseMode(-np.inf), ReverseMode(-np.inf)]
+        z = rd.logsumexp(x)
+        z.gradient = 1.0
+        assert z.real == -np.inf and [xi.grad() for xi in x] == [0.0, 0.0]
+
+    def test_errors(self):
+        with pytest.raises(TypeError):
+            rd.sum('abc')
+        with pytest.raises(TypeError):
+            rd.sum([1.0, 'a'])
+        with pytest.raises(TypeError):
+            rd.sum([DualNumber(1.0), ReverseMode(1.0)])
+        with pytest.raises(TypeError):
+            rd.dot([DualNumber(1.0)], [ReverseMode(1.0)])
+        with pytest.raises(ValueError):
+            rd.dot([1.0], [1.0, 2.0])
+        for reduction in (rd.mean, rd.logsumexp, rd.softmax):
+            with pytest.raises(ValueError):
+                reduction([])
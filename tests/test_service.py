@@ -0,0 +1,129 @@
+# Test code for src/bad_package/service.py
+import asyncio
+import concurrent.futures
+import pytest
+import numpy as np
+
+from bad_package import service
+from bad_package.service import DifferentiationService
+from bad_package.elementary_functions import *
+
+def func(x):
+    return x[0]**2 * x[1] + sin(x[1])
+
+def scalar(x):
+    return sqrt(x)
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+class TestDifferentiationService():
+
+    def test_jacobian(self):
+        async def main():
+            async with DifferentiationService() as server:
+                return await server.jacobian(func, [1.0, 2.0])
+        values, jacobian = run(main())
+        assert pytest.approx([2 + np.sin(2)]) == values
+        assert pytest.approx([4.0, 1 + np.cos(2)]) == jacobian[0]
+
+    def test_coalesces_concurrent_queries(self, monkeypatch):
+        sizes = []
+        replay = service._replay
+        def counting_replay(tape, points, *args):
+            sizes.append(len(points))
+            return replay(tape, points, *args)
+        monkeypatch.setattr(service, '_replay', counting_replay)
+        points = [[float(i), 1.0] for i in range(10)]
+        async def main():
+            async with DifferentiationService(max_latency=0.01) as server:
+                return await asyncio.gather(*(server.jacobian(func, p) for p in points))
+        results = run(main())
+        assert sizes == [10]
+        assert pytest.approx([2.0 * i for i in range(10)]) == [j[0, 0] for v, j in results]
+
+    def test_max_batch(self, monkeypatch):
+        sizes = []
+        replay = service._replay
+        def counting_replay(tape, points, *args):
+            sizes.append(len(points))
+            return replay(tape, points, *args)
+        monkeypatch.setattr(service, '_replay', counting_replay)
+        async def main():
+            async with DifferentiationService(max_batch=4, max_latency=0.05) as server:
+                return await asyncio.gather(*(server.evaluate(scalar, float(i)) for i in range(1, 10)))
+        results = run(main())
+        # Full batches go out at once, the remainder when its latency timer fires
+        assert sizes == [4, 4, 1]
+        assert pytest.approx(np.sqrt(np.arange(1, 10))) == [v[0] for v in results]
+
+    def test_domain_error_only_fails_its_query(self):
+        async def main():
+            async with DifferentiationService() as server:
+                return await asyncio.gather(server.jacobian(scalar, 4.0), server.jacobian(scalar, -1.0),
+                                            return_exceptions=True)
+        good, bad = run(main())
+        assert pytest.approx([0.25]) == good[1][0]
+        assert isinstance(bad, ArithmeticError)
+
+    def test_first_query_out_of_domain(self):
+        async def main():
+            async with DifferentiationService() as server:
+                bad = await asyncio.gather(server.jacobian(scalar, -1.0), return_exceptions=True)
+                return bad[0], await server.jacobian(scalar, 4.0), len(server.tapes)
+        bad, good, n_tapes = run(main())
+        # The tape traced at the bad point serves the later queries
+        assert isinstance(bad, ArithmeticError)
+        assert pytest.approx([0.25]) == good[1][0]
+        assert n_tapes == 1
+
+    def test_tapes_bounded(self):
+        async def main():
+            async with DifferentiationService(max_tapes=4) as server:
+                values = [await server.evaluate(lambda x, k=k: x * k, 2.0) for k in range(20)]
+                # A reused function stays stored while fresh lambdas push older ones out
+                for k in range(5):
+                    await server.evaluate(scalar, 4.0)
+                    await server.evaluate(lambda x: x + k, 1.0)
+                return values, server.tapes
+        values, tapes = run(main())
+        assert pytest.approx([2.0 * k for k in range(20)]) == [v[0] for v in values]
+        assert len(tapes) == 4
+        assert any(key[0] is scalar for key in tapes)
+
+    def test_close_sends_pending(self):
+        async def main():
+            server = DifferentiationService(max_latency=10.0)
+            query = asyncio.ensure_future(server.evaluate(scalar, 9.0))
+            await asyncio.sleep(0)
+            await server.close()
+            return await query
+        assert pytest.approx([3.0]) == run(main())
+
+    def test_caller_executor(self):
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        async def main():
+            async with DifferentiationService(executor) as server:
+                return await server.evaluate([func, lambda x: sqrt(x[0])], [4.0, 1.0])
+        values = run(main())
+        assert pytest.approx([16 + np.sin(1), 2.0]) == values
+        # The service does not shut down a pool it was given
+        assert executor.submit(lambda: 1).result() == 1
+        executor.shutdown()
+
+    def test_process_pool(self):
+        async def main():
+            async with DifferentiationService('process', max_workers=1) as server:
+                return await server.jacobian(func, [1.0, 2.0])
+        values, jacobian = run(main())
+        assert pytest.approx([4.0, 1 + np.cos(2)]) == jacobian[0]
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            DifferentiationService('fibers')
+        with pytest.raises(ValueError):
+            DifferentiationService(max_batch=0)
+        with pytest.raises(ValueError):
+            DifferentiationService(max_latency=-1)
+        with pytest.raises(ValueError):
+            DifferentiationService(max_tapes=0)
@@ -0,0 +1,101 @@
+# Test code for src/bad_package/sparse.py
+import pytest
+import numpy as np
+
+from bad_package import reductions as rd
+from bad_package.custom import custom_vjp
+from bad_package.elementary_functions import *
+from bad_package.fad import _dual
+from bad_package.interface import AutoDiff
+from bad_package.sparse import SparseTangent, sum_tangents, unit_tangents
+
+def f(x):
+    return x[0]**2 * sin(x[3]) + exp(x[1]) / x[2] - 2**x[4] + x[2]**x[0] + logBase(x[1], 3) - tanh(-x[4])
+
+def chain(x):
+    return sum(cos(x[i] * x[i + 1]) for i in range(len(x) - 1)) + rd.sum([xi**2 for xi in x])
+
+class TestSparseTangent():
+
+    def test_arithmetic(self):
+        a, b, c = unit_tangents(3)
+        t = 2 * a - b / 4 + 0 - -c * 3.0
+        assert isinstance(t, SparseTangent) and t.entries == {0: 2.0, 1: -0.25, 2: 3.0}
+        assert list(t.todense()) == [2.0, -0.25, 3.0]
+        assert (a * 0).entries == {} and (0 + a) is a and len(a) == 3
+        assert list(np.ones(3) + a) == [2.0, 1.0, 1.0]
+        assert list(np.ones(3) - a) == [0.0, 1.0, 1.0]
+        assert list(a - np.ones(3)) == [0.0, -1.0, -1.0]
+        assert (a * np.float64(2.0) + np.float64(0.5) * b).entries == {0: 2.0, 1: 0.5}
+        with pytest.raises(TypeError):
+            a + 1.0
+        with pytest.raises(TypeError):
+            a * a
+
+    def test_turns_dense(self):
+        seeds = unit_tangents(100, max_nnz=4)
+        t = seeds[0]
+        for s in seeds[1:4]:
+            t = t + s
+        assert isinstance(t, SparseTangent)
+        t = t + seeds[4]
+        assert isinstance(t, np.ndarray) and list(np.flatnonzero(t)) == [0, 1, 2, 3, 4]
+        assert list(np.flatnonzero(t + seeds[50])) == [0, 1, 2, 3, 4, 50]
+
+    def test_sum_tangents(self):
+        seeds = unit_tangents(10, max_nnz=3)
+        assert sum_tangents([1.0, 1e100, 1.0, -1e100]) == 2.0
+        small = sum_tangents([seeds[0], 2 * seeds[0], seeds[1]])
+        assert isinstance(small, SparseTangent) and small.entries == {0: 3.0, 1: 1.0}
+        dense = sum_tangents(seeds[:5] + [np.ones(10)])
+        assert list(dense) == [2.0] * 5 + [1.0] * 5
+
+    def test_through_operations(self):
+        x = [_dual(v, t) for v, t in zip([1.2, 0.7, 2.0, 0.3, 0.5], unit_tangents(5))]
+        y = f(x)
+        assert isinstance(y.dual, SparseTangent)
+        expected = AutoDiff(f, np.array([1.2, 0.7, 2.0, 0.3, 0.5])).get_jacobian()[0]
+        assert pytest.approx(expected) == list(y.dual.todense())
+
+    def test_custom_primitive(self):
+        @custom_vjp
+        def norm(a, b):
+            return (a * a + b * b) ** 0.5
+        norm.defvjp(lambda a, b: (norm(a, b), (a, b)), lambda r, g: (g * r[0] / norm(*r), g * r[1] / norm(*r)))
+        ad = AutoDiff(lambda x: norm(x[0], x[2]), np.array([3.0, 1.0, 4.0]), tangents='sparse')
+        assert pytest.approx([0.6, 0.0, 0.8]) == ad.get_jacobian()[0]
+
+class TestAutoDiffSparse():
+
+    def test_matches_scalar_tangents(self):
+        x = np.array([1.2, 0.7, 2.0, 0.3, 0.5])
+        for wrt in (None, [4, 1], [True, False, True, False, False]):
+            scalar = AutoDiff([f, chain], x, wrt=wrt)
+            sparse = AutoDiff([f, chain], x, wrt=wrt, tangents='sparse')
+            assert sparse.get_primal() == scalar.get_primal()
+            for row, expected in zip(sparse.get_jacobian(), scalar.get_jacobian()):
+                assert pytest.approx(expected) == row
+
+    def test_one_pass(self):
+        calls = []
+        def g(x):
+            calls.append(1)
+            return chain(x)
+        x = np.linspace(0.1, 1.0, 200)
+        jacobian = AutoDiff(g, x, tangents='sparse').get_jacobian()
+        assert len(calls) == 1
+        expected = 2 * x
+        expected[:-1] -= np.sin(x[:-1] * x[1:]) * x[1:]
+        expected[1:] -= np.sin(x[:-1] * x[1:]) * x[:-1]
+        assert pytest.approx(expected) == jacobian[0]
+
+    def test_constant_and_scalar(self):
+        ad = AutoDiff([lambda x: 2.0, lambda x: x[1]], np.array([1.0, 2.0]), tangents='sparse')
+        assert ad.get_jacobian() == [[0.0, 0.0], [0.0, 1.0]]
+        assert AutoDiff(lambda x: x**2, 3.0, tangents='sparse').get_jacobian() == 6.0
+        assert AutoDiff(chain, np.array([1.0, 2.0]), tangents='sparse', values_only=True).get_primal() == \
+            AutoDiff(chain, np.array([1.0, 2.0])).get_primal()
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            AutoDiff(chain, np.array([1.0, 2.0]), tangents='full')
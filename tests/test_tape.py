@@ -0,0 +1,240 @@
+# Test code for src/bad_package/tape.py
+import io
+import pytest
+import numpy as np
+
+from bad_package.elementary_functions import *
+from bad_package.interface import AutoDiff
+from bad_package.tape import Tape, TapeNode, trace
+
+class TestTape():
+
+    def test_trace_records_nodes(self):
+        def func(x):
+            return x[0]**2 + 3*x[1] + 5
+        tape = trace(func, np.array([1, 2]))
+        assert tape.n_inputs == 2
+        assert len(tape.outputs) == 1
+        assert [op for op, args, param in tape.nodes].count('input') == 2
+        assert 'pow' in str(tape)
+
+    def test_trace_invalid(self):
+        def func(x):
+            return 2*x
+        with pytest.raises(TypeError):
+            trace('hello', 2)
+        with pytest.raises(TypeError):
+            trace(func, 'world')
+        with pytest.raises(TypeError):
+            trace(func, [])
+        with pytest.raises(TypeError):
+            trace(lambda x: x + '1', 2)
+
+    def test_trace_domain_error(self):
+        with pytest.raises(ArithmeticError):
+            trace(lambda x: sqrt(x), -1.0)
+        # With a non-raising policy the operations are still recorded
+        tape = trace(lambda x: sqrt(x) / (x + 1), -1.0, domain_policy='nan')
+        assert [op for op, args, param in tape.nodes][-1] == 'div'
+        assert pytest.approx(2 / 5) == tape.evaluate(4.0)[0]
+        with pytest.raises(ValueError):
+            trace(lambda x: sqrt(x), 1.0, domain_policy='ignore')
+
+    def test_scalar_evaluate(self):
+        def func(x):
+            return (5*x + 50)/(2*x**2)
+        tape = trace(func, 5)
+        assert pytest.approx([1.5]) == tape.evaluate(5)
+        assert pytest.approx([1.5, (30 + 50)/(2*36)]) == tape.evaluate([5, 6])[:, 0]
+
+    def test_vector_jacobian_single_point(self):
+        def func(x):
+            return x[0]**2 + 3*x[1] + 5
+        tape = trace(func, np.array([1, 2]))
+        for mode in ('forward', 'reverse', 'auto'):
+            values, jacobian = tape.jacobian(np.array([1, 2]), mode=mode)
+            assert pytest.approx([12]) == values
+            assert pytest.approx([2, 3]) == jacobian[0]
+
+    def test_batch_jacobian(self):
+        def func(x):
+            return x[0]**2 + 3*x[1] + 5
+        tape = trace(func, np.array([1, 2]))
+        values, jacobian = tape.jacobian(np.array([[1, 2], [3, 4]]))
+        assert values.shape == (2, 1)
+        assert jacobian.shape == (2, 1, 2)
+        assert pytest.approx([2, 3]) == jacobian[0, 0]
+        assert pytest.approx([6, 3]) == jacobian[1, 0]
+
+    def test_matches_forward_mode(self):
+        def f1(x):
+            return x[1]*sin(x[2]) + exp(x[0]*x[1]) / sqrt(x[2])
+        def f2(x):
+            return x[0]**3 - x[0]*x[2] + logBase(x[1], 3) - 2**x[0]
+        def f3(x):
+            return arctan(x[0]) * tanh(x[1]) + cosh(x[2]) / (1 + sec(x[0]))
+        functions = [f1, f2, f3]
+        x = np.array([0.5, 2.0, 4.0])
+        tape = trace(functions, x)
+        expected = AutoDiff(functions, x)
+        for mode in ('forward', 'reverse'):
+            values, jacobian = tape.jacobian(x, mode=mode)
+            assert pytest.approx(expected.get_primal()) == values
+            for row, expected_row in zip(jacobian, expected.get_jacobian()):
+                assert pytest.approx(expected_row) == row
+
+    def test_jacobian_into_out(self):
+        tape = trace([lambda x: x[0]*x[1], lambda x: x[0] + x[1]], [1.0, 2.0])
+        out = np.full((3, 2, 2), np.nan)
+        values, jacobian = tape.jacobian(np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]), out=out)
+        assert jacobian is out
+        assert pytest.approx([2.0, 1.0, 1.0, 1.0]) == out[0].ravel()
+        single = np.empty((2, 2))
+        assert tape.jacobian([1.0, 2.0], out=single)[1] is single
+        with pytest.raises(ValueError):
+            tape.jacobian([1.0, 2.0], out=np.empty((2, 3)))
+
+    def test_chunked_replay(self):
+        tape = trace([lambda x: exp(sin(x[0])**2 + 3*x[1]), lambda x: ln(x[0]) * x[1]], [0.5, 0.5])
+        points = np.random.default_rng(0).uniform(-0.5, 1, size=(1000, 2))
+        values, jacobian, valid = tape.jacobian(points, chunk=None, domain_policy='nan')
+        for chunk in (1, 7, 256, 5000):
+            for mode in ('forward', 'reverse'):
+                chunked = tape.jacobian(points, mode=mode, chunk=chunk, domain_policy='nan')
+                np.testing.assert_array_equal(values, chunked[0])
+                np.testing.assert_allclose(jacobian, chunked[1], rtol=1e-15)
+                np.testing.assert_array_equal(valid, chunked[2])
+            np.testing.assert_array_equal(values, tape.evaluate(points, chunk=chunk, domain_policy='nan')[0])
+        assert tape.evaluate(np.empty((0, 2))).shape == (0, 2)
+        with pytest.raises(ValueError):
+            tape.jacobian(points, chunk=0)
+        with pytest.raises(ArithmeticError):
+            tape.evaluate(points, chunk=100)
+
+    def test_paired_functions(self):
+        tape = trace([lambda x: sin(x[0]) * cos(x[0]) + sinh(x[1]), lambda x: cosh(x[1]) - cos(x[0])], [0.3, 0.7])
+        points = np.array([[0.3, 0.7], [-1.2, 2.0]])
+        values, jacobian = tape.jacobian(points)
+        a, b = points[:, 0], points[:, 1]
+        assert pytest.approx(np.sin(a)*np.cos(a) + np.sinh(b)) == values[:, 0]
+        assert pytest.approx(np.cos(2*a)) == jacobian[:, 0, 0]
+        assert pytest.approx(np.cosh(b)) == jacobian[:, 0, 1]
+        assert pytest.approx(np.sin(a)) == jacobian[:, 1, 0]
+        assert pytest.approx(np.sinh(b)) == jacobian[:, 1, 1]
+
+    def test_constant_output(self):
+        tape = trace([lambda x: 3.0, lambda x: x[0]*x[1]], [1.0, 2.0])
+        values, jacobian = tape.jacobian([[1.0, 2.0], [2.0, 2.0]])
+        assert pytest.approx([3.0, 3.0]) == values[:, 0]
+        assert pytest.approx([0.0, 0.0]) == jacobian[1, 0]
+
+    def test_wrong_shape(self):
+        tape = trace(lambda x: x[0] + x[1], [1.0, 2.0])
+        with pytest.raises(ValueError):
+            tape.evaluate([1.0, 2.0, 3.0])
+        with pytest.raises(ValueError):
+            tape.jacobian([1.0, 2.0], mode='sideways')
+
+    def test_replay_domain_error(self):
+        tape = trace(lambda x: ln(x), 2.0)
+        with pytest.raises(ArithmeticError):
+            tape.evaluate([2.0, -1.0])
+
+    def test_save_load(self):
+        def func(x):
+            return exp(sin(x[0])**2 + 3*x[1]) + logBase(x[0], 2)
+        tape = trace(func, [1.0, 2.0])
+        buffer = io.BytesIO()
+        tape.save(buffer)
+        buffer.seek(0)
+        loaded = Tape.load(buffer)
+        assert loaded.nodes == tape.nodes
+        assert loaded.outputs == tape.outputs
+        points = np.array([[1.0, 0.5], [2.0, -1.0]])
+        assert pytest.approx(tape.jacobian(points)[1]) == loaded.jacobian(points)[1]
+
+    def test_tapenode_mixing(self):
+        a, b = trace(lambda x: x, 1.0), trace(lambda x: x, 1.0)
+        x = TapeNode(a, 0, 1.0)
+        y = TapeNode(b, 0, 1.0)
+        with pytest.raises(ValueError):
+            x + y
+
+class TestTapePrecision():
+
+    # Expressions from test_derivs.py, evaluated over a batch around the points used there
+    expressions = [
+        (lambda x: exp(x**2), np.linspace(1.5, 2.5, 101)),
+        (lambda x: sin(2*x) + 3, np.linspace(pi - 1, pi + 1, 101)),
+        (lambda x: ln(2*x**3), np.linspace(3, 5, 101)),
+        (lambda x: ((1 + 2*x**2)*(x**3)**2)/((x+19*x**3)**(1/2) * (4*x)**(5/2)) + ((1 + 3*x)**(1/2))/(x + (1+x**2)**(1/2)),
+         np.linspace(15, 17, 101)),
+    ]
+
+    def test_float32_storage(self):
+        tape = trace(lambda x: exp(x[0]**2) * x[1], [1.0, 2.0])
+        values, jacobian = tape.jacobian(np.ones((4, 2)), dtype=np.float32)
+        assert values.dtype == np.float32
+        assert jacobian.dtype == np.float32
+        assert tape.evaluate(np.ones((4, 2)), dtype=np.float32).dtype == np.float32
+
+    def test_float64_accumulation(self):
+        tape = trace(lambda x: exp(x[0]**2) * x[1], [1.0, 2.0])
+        values, jacobian = tape.jacobian(np.ones((4, 2)), dtype=np.float32, accumulate_dtype=np.float64)
+        assert values.dtype == np.float32
+        assert jacobian.dtype == np.float64
+
+    def test_invalid_dtype(self):
+        tape = trace(lambda x: 2*x, 1.0)
+        with pytest.raises(TypeError):
+            tape.evaluate(1.0, dtype=np.int64)
+        with pytest.raises(TypeError):
+            tape.jacobian(1.0, accumulate_dtype=np.int32)
+
+    @pytest.mark.parametrize('index', range(4))
+    def test_float32_error_bound(self, index):
+        # Documented bound: normwise relative error below 1e-5 for these well-conditioned functions
+        func, points = self.expressions[index]
+        tape = trace(func, float(points[0]))
+        values, jacobian = tape.jacobian(points)
+        for accumulate in (None, np.float64):
+            values32, jacobian32 = tape.jacobian(points, dtype=np.float32, accumulate_dtype=accumulate)
+            assert np.max(np.abs(values32 - values)) / np.max(np.abs(values)) < 1e-5
+            assert np.max(np.abs(jacobian32 - jacobian)) / np.max(np.abs(jacobian)) < 1e-5
+
+class TestTapeDomainPolicies():
+
+    def func(self, x):
+        return sqrt(x[0]) * ln(x[1]) + arcsin(x[0] / 4)
+
+    def test_raise_by_default(self):
+        tape = trace(self.func, [1.0, 2.0])
+        with pytest.raises(ArithmeticError):
+            tape.jacobian(np.array([[1.0, 2.0], [-1.0, 2.0]]))
+
+    def test_nan_mask(self):
+        tape = trace(self.func, [1.0, 2.0])
+        points = np.array([[1.0, 2.0], [-1.0, 2.0], [1.0, -3.0], [5.0, 2.0], [2.0, 3.0]])
+        values, jacobian, valid = tape.jacobian(points, domain_policy='nan')
+        assert list(valid) == [True, False, False, False, True]
+        expected_values, expected_jacobian = tape.jacobian(points[valid])
+        assert pytest.approx(expected_values.ravel()) == values[valid].ravel()
+        assert pytest.approx(expected_jacobian.ravel()) == jacobian[valid].ravel()
+        assert np.isnan(values[~valid]).all()
+
+        values, valid = tape.evaluate(points, domain_policy='nan')
+        assert list(valid) == [True, False, False, False, True]
+
+    def test_clip(self):
+        tape = trace(self.func, [1.0, 2.0])
+        points = np.array([[1.0, 2.0], [5.0, 2.0]])
+        values, jacobian, valid = tape.jacobian(points, domain_policy='clip')
+        assert list(valid) == [True, False]
+        assert np.isfinite(values).all()
+        assert pytest.approx(np.sqrt(5.0) * np.log(2.0) + np.pi / 2) == values[1, 0]
+
+    def test_single_point(self):
+        tape = trace(self.func, [1.0, 2.0])
+        values, valid = tape.evaluate([-1.0, 2.0], domain_policy='nan')
+        assert valid is False
+        assert np.isnan(values[0])
@@ -0,0 +1,57 @@
+# Test code for src/bad_package/validation.py
+import pytest
+import numpy as np
+
+from bad_package.validation import CATALOGUE, check_catalogue, check_gradients, complex_step, finite_difference
+from bad_package.elementary_functions import *
+from bad_package.fad import DualNumber
+
+def f(x):
+    return x[0] / x[1] + sin(x[0] * x[1])
+
+def jacobian_f(x):
+    return np.array([[1/x[1] + x[1]*np.cos(x[0]*x[1]), -x[0]/x[1]**2 + x[0]*np.cos(x[0]*x[1])]])
+
+class TestValidation():
+
+    def test_complex_step_exact(self):
+        x = [1.3, 0.7]
+        assert np.max(np.abs(complex_step(f, x) - jacobian_f(x))) < 1e-15
+
+    def test_finite_difference(self):
+        x = [1.3, 0.7]
+        assert finite_difference(f, x).shape == (1, 2)
+        assert np.max(np.abs(finite_difference(f, x) - jacobian_f(x))) < 1e-8
+
+    def test_vector_function(self):
+        functions = [f, lambda x: exp(x[0]) * x[1]]
+        assert complex_step(functions, [0.5, 2.0]).shape == (2, 2)
+        assert pytest.approx(np.exp(0.5) * 2.0) == complex_step(functions, [0.5, 2.0])[1, 0]
+
+    def test_single_variable(self):
+        assert pytest.approx(np.cos(0.4)) == complex_step(sin, 0.4)[0, 0]
+        assert pytest.approx(np.cos(0.4)) == finite_difference(sin, 0.4)[0, 0]
+
+    def test_check_gradients(self):
+        report = check_gradients(f, np.random.default_rng(1).uniform(0.5, 2, size=(10, 2)))
+        assert report.passed()
+        assert report.n_points == 10
+        assert report.max_error['complex_step'] == 0.0
+        assert report.max_error['finite_difference'] < 1e-7
+        assert all(report.time[method] > 0 for method in report.time)
+        assert 'finite_difference' in str(report)
+        assert 'passed: True' in repr(report)
+
+    def test_catalogue(self):
+        reports = check_catalogue(n_points=5)
+        assert set(reports) == set(CATALOGUE)
+        assert [name for name, report in reports.items() if not report.passed()] == []
+
+    def test_detects_wrong_rule(self, monkeypatch):
+        # A forward mode product rule dropping one term: only AutoDiff fails
+        monkeypatch.setattr(DualNumber, '__mul__', lambda self, other: DualNumber(
+            self.real * getattr(other, 'real', other), self.dual * getattr(other, 'real', other)))
+        report = check_gradients(lambda x: x[0] * x[1], [[1.0, 2.0], [3.0, 0.5]])
+        assert not report.passed()
+        assert report.max_relative_error['AutoDiff'] > 0.1
+        assert report.max_relative_error['ReverseAD'] < 1e-12